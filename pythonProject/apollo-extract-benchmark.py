@@ -0,0 +1,78 @@
+import json
+import os
+import re
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+from apollo_state import extract_apollo_state
+
+# 브라우저나 requests 로 저장해 둔 페이지 HTML 디렉토리
+PAGES_DIR = sys.argv[1] if len(sys.argv) > 1 else "saved_pages"
+REPEAT = int(os.environ.get("BENCH_REPEAT", 20))
+PREFIXES = ("PlaceSummary:", "Menu:", "PlaceDetailBase:")
+
+
+def legacy_extract(html_text):
+    """기존 크롤러들의 BeautifulSoup + 비탐욕 정규식 경로"""
+    parser = BeautifulSoup(html_text, "lxml")
+    for script in parser.find_all("script"):
+        if script.string and "window.__APOLLO_STATE__" in script.string:
+            match = re.search(r"window\.__APOLLO_STATE__\s*=\s*({.*?});", script.string, re.DOTALL)
+            if match:
+                try:
+                    apollo_json = json.loads(match.group(1))
+                except json.JSONDecodeError:
+                    return None
+                return {
+                    key: value for key, value in apollo_json.items()
+                    if key.startswith(PREFIXES) and isinstance(value, dict)
+                }
+    return None
+
+
+def fast_extract(html_text):
+    return extract_apollo_state(html_text, PREFIXES)
+
+
+def bench(fn, pages):
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        for html_text in pages:
+            fn(html_text)
+    return (time.perf_counter() - started) / (REPEAT * len(pages)) * 1000
+
+
+if __name__ == "__main__":
+    paths = sorted(
+        os.path.join(PAGES_DIR, f) for f in os.listdir(PAGES_DIR)
+        if f.endswith(".html") or f.endswith(".htm")
+    )
+    if not paths:
+        print(f"⚠️ {PAGES_DIR} 에 저장된 HTML 이 없습니다.")
+        sys.exit(1)
+
+    pages = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            pages.append(f.read())
+    total_mb = sum(len(p) for p in pages) / 1024 / 1024
+    print(f"📂 페이지 {len(pages)}개 ({total_mb:.1f}MB), 반복 {REPEAT}회")
+
+    # 결과 비교: 기존 정규식이 `};` 에서 잘리는 페이지를 따로 센다
+    legacy_missed, mismatched = 0, 0
+    for path, html_text in zip(paths, pages):
+        legacy, fast = legacy_extract(html_text), fast_extract(html_text)
+        if legacy is None and fast is not None:
+            legacy_missed += 1
+            print(f"🟡 기존 방식 추출 실패, 새 방식 성공: {os.path.basename(path)}")
+        elif legacy != fast:
+            mismatched += 1
+            print(f"⚠️ 결과 불일치: {os.path.basename(path)}")
+
+    legacy_ms = bench(legacy_extract, pages)
+    fast_ms = bench(fast_extract, pages)
+    print(f"⏱️ BeautifulSoup + 정규식: {legacy_ms:.2f}ms/페이지")
+    print(f"⏱️ raw_decode 추출기:     {fast_ms:.2f}ms/페이지 ({legacy_ms / fast_ms:.1f}배)")
+    print(f"📊 기존 방식만 실패: {legacy_missed}건 / 불일치: {mismatched}건")
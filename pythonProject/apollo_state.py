@@ -0,0 +1,99 @@
+import json
+
+APOLLO_MARKER = "window.__APOLLO_STATE__"
+RQ_PUSH_MARKER = "window.__RQ_STREAMING_STATE__.push("
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+
+
+def _skip_whitespace(text, pos):
+    while pos < len(text) and text[pos] in _WHITESPACE:
+        pos += 1
+    return pos
+
+
+def decode_apollo_state(html_text: str):
+    """
+    HTML 원문에서 `window.__APOLLO_STATE__ =` 뒤의 JSON 값 하나만 raw_decode 로 디코딩한다.
+    BeautifulSoup 파싱이나 정규식 없이 한 번 훑어서 끝나고, 값 안에 `};` 가 있어도 잘리지 않는다.
+    찾지 못하거나 디코딩에 실패하면 None.
+    """
+    pos = html_text.find(APOLLO_MARKER)
+    while pos != -1:
+        pos = _skip_whitespace(html_text, pos + len(APOLLO_MARKER))
+        # `==` 비교나 단순 참조는 건너뛰고 대입문만 본다
+        if html_text.startswith("=", pos) and not html_text.startswith("==", pos):
+            pos = _skip_whitespace(html_text, pos + 1)
+            try:
+                state, _ = _decoder.raw_decode(html_text, pos)
+            except json.JSONDecodeError as e:
+                print(f"❌ APOLLO_STATE JSON 파싱 실패: {e}")
+                return None
+            if isinstance(state, dict):
+                return state
+        pos = html_text.find(APOLLO_MARKER, pos)
+    return None
+
+
+def extract_apollo_state(html_text: str, prefixes=None):
+    """
+    APOLLO_STATE 를 dict 로 돌려준다.
+    prefixes 를 주면 ("PlaceSummary:", "Menu:", "PlaceDetailBase:" 등) 해당 접두사로 시작하고
+    값이 dict 인 항목만 남긴다. APOLLO_STATE 가 없으면 None.
+    """
+    state = decode_apollo_state(html_text)
+    if state is None or not prefixes:
+        return state
+    if isinstance(prefixes, str):
+        prefixes = (prefixes,)
+    else:
+        prefixes = tuple(prefixes)
+    return {
+        key: value for key, value in state.items()
+        if key.startswith(prefixes) and isinstance(value, dict)
+    }
+
+
+def iter_rq_pushes(html_text: str):
+    """`window.__RQ_STREAMING_STATE__.push(...)` 호출마다 인자 JSON 을 하나씩 돌려준다."""
+    pos = html_text.find(RQ_PUSH_MARKER)
+    while pos != -1:
+        pos = _skip_whitespace(html_text, pos + len(RQ_PUSH_MARKER))
+        try:
+            payload, pos = _decoder.raw_decode(html_text, pos)
+        except json.JSONDecodeError:
+            pass
+        else:
+            yield payload
+        pos = html_text.find(RQ_PUSH_MARKER, pos)
+
+
+def extract_rq_items(html_text: str):
+    """
+    window.__RQ_STREAMING_STATE__.push({...}); 블록 안의 JSON을 추출해서
+    queries[].state.data.items 리스트를 전부 반환한다.
+    """
+    all_items = []
+    found_pushes = 0
+
+    for parsed in iter_rq_pushes(html_text):
+        found_pushes += 1
+        queries = parsed.get("queries", []) if isinstance(parsed, dict) else []
+        if not isinstance(queries, list):
+            continue
+
+        for q_index, q in enumerate(queries):
+            items = q.get("state", {}).get("data", {}).get("items", [])
+            if isinstance(items, list) and items:
+                print(f"✅ Script 내에서 {len(items)}개의 items 발견 (query index: {q_index})")
+                all_items.extend(items)
+
+    if found_pushes == 0:
+        print("🟡 RQ_STREAMING_STATE push 호출을 찾지 못했습니다.")
+    elif not all_items:
+        print("🟡 push 호출은 찾았으나, 유효한 'items' 데이터를 포함한 호출이 없었습니다.")
+    else:
+        print(f"✅ 최종 추출된 items: {len(all_items)}개")
+
+    return all_items
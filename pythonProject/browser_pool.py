@@ -0,0 +1,264 @@
+import asyncio
+import contextlib
+import os
+import time
+
+from zendriver import cdp
+
+# 브라우저 하나가 이 값을 넘으면 반납 시 백그라운드에서 새 인스턴스로 교체
+MAX_RSS_MB = int(os.environ.get("BROWSER_MAX_RSS_MB", 1500))
+MAX_TABS = int(os.environ.get("BROWSER_MAX_TABS", 8))
+# 기본은 프로세스당 브라우저 하나 (교체는 죽은/한도 초과 인스턴스를 닫은 뒤 새로 띄운다).
+# 2 이상이면 크래시 시 바로 넘겨받을 예비 브라우저를 미리 띄워 둔다.
+POOL_SIZE = int(os.environ.get("BROWSER_POOL_SIZE", 1))
+HEALTH_CHECK_TIMEOUT = 5
+
+
+def process_tree_rss_mb(pid):
+    """
+    크롬은 렌더러/GPU 등 자식 프로세스가 여럿이라 /proc 를 훑어 pid 이하 전체 트리의 RSS 합을 구한다.
+    /proc 가 없는 환경(mac 등)에서는 None.
+    """
+    if not pid or not os.path.isdir("/proc"):
+        return None
+
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                # comm 에 공백/괄호가 들어갈 수 있어 마지막 ')' 뒤부터 자른다
+                fields = f.read().rsplit(")", 1)[1].split()
+            children.setdefault(int(fields[1]), []).append(int(entry))
+        except (OSError, IndexError, ValueError):
+            continue
+
+    total_kb = 0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        stack.extend(children.get(current, []))
+        try:
+            with open(f"/proc/{current}/status", "r") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+        except OSError:
+            continue
+    return total_kb / 1024
+
+
+def browser_pid(browser):
+    process = getattr(browser, "_process", None)
+    return getattr(browser, "_process_pid", None) or getattr(process, "pid", None)
+
+
+class BrowserPool:
+    """
+    미리 띄워 둔 zendriver 브라우저를 돌려 쓰는 풀.
+    - acquire(): 대기 중인 브라우저를 꺼내 health check 후 돌려준다.
+    - release(): 반납 시 RSS / 탭 수가 한도를 넘으면 백그라운드에서 교체한다.
+    - discard(): 크래시 난 브라우저를 버리고 백그라운드에서 새로 띄운다. 다른 워커는 그동안 남은 인스턴스로 계속 진행.
+    """
+
+    def __init__(self, launch, size=POOL_SIZE, max_rss_mb=MAX_RSS_MB, max_tabs=MAX_TABS):
+        self.launch = launch
+        self.size = size
+        self.max_rss_mb = max_rss_mb
+        self.max_tabs = max_tabs
+        self.idle = asyncio.Queue()
+        self.in_use = set()
+        self.replacing = set()
+        self.closed = False
+        self.stats = {"launched": 0, "recycled": 0, "crashed": 0}
+
+    async def start(self):
+        await asyncio.gather(*(self._launch_into_pool() for _ in range(self.size)))
+        print(f"✅ 브라우저 풀 준비 완료 ({self.size}개)")
+        return self
+
+    async def _launch_into_pool(self):
+        started = time.perf_counter()
+        browser = await self.launch()
+        self.stats["launched"] += 1
+        print(f"🚀 브라우저 실행 완료 ({time.perf_counter() - started:.1f}초)")
+        if self.closed:
+            await self._stop(browser)
+            return
+        self.idle.put_nowait(browser)
+
+    async def _stop(self, browser):
+        try:
+            await browser.stop()
+        except Exception:
+            pass
+
+    async def _replace(self, browser):
+        await self._stop(browser)
+        for attempt in range(3):
+            try:
+                await self._launch_into_pool()
+                return
+            except Exception as e:
+                print(f"⚠️ 브라우저 교체 실행 실패 {attempt+1}/3: {e}")
+                await asyncio.sleep(2)
+        print("❌ 브라우저 교체 실패: 풀 크기가 줄어듭니다.")
+        # idle.get() 에서 기다리는 acquire 를 깨워 풀 크기 검사부터 다시 하게 한다 (직접 하나 띄움).
+        # 완료 콜백보다 먼저 깨어날 수 있으니 replacing 에서는 여기서 빼 둔다.
+        self.replacing.discard(asyncio.current_task())
+        self.idle.put_nowait(None)
+
+    def _schedule_replace(self, browser):
+        task = asyncio.create_task(self._replace(browser))
+        self.replacing.add(task)
+        task.add_done_callback(self.replacing.discard)
+
+    async def is_healthy(self, browser):
+        try:
+            await asyncio.wait_for(browser.connection.send(cdp.browser.get_version()), HEALTH_CHECK_TIMEOUT)
+            return True
+        except Exception:
+            return False
+
+    def needs_recycle(self, browser):
+        tabs = len(browser.tabs)
+        if tabs > self.max_tabs:
+            return f"탭 {tabs}개"
+        rss_mb = process_tree_rss_mb(browser_pid(browser))
+        if rss_mb is not None and rss_mb > self.max_rss_mb:
+            return f"RSS {rss_mb:.0f}MB"
+        return None
+
+    async def acquire(self):
+        while True:
+            if self.idle.empty() and len(self.in_use) + len(self.replacing) < self.size:
+                # 교체 실패 등으로 풀이 줄어든 경우 직접 하나 띄워 채운다
+                await self._launch_into_pool()
+            browser = await self.idle.get()
+            if browser is None:
+                continue
+            if await self.is_healthy(browser):
+                self.in_use.add(browser)
+                return browser
+            print("💥 응답 없는 브라우저 발견 → 백그라운드 교체")
+            self.stats["crashed"] += 1
+            self._schedule_replace(browser)
+
+    def release(self, browser):
+        self.in_use.discard(browser)
+        reason = self.needs_recycle(browser)
+        if reason:
+            print(f"♻️ 브라우저 교체 ({reason})")
+            self.stats["recycled"] += 1
+            self._schedule_replace(browser)
+        else:
+            self.idle.put_nowait(browser)
+
+    def discard(self, browser):
+        self.in_use.discard(browser)
+        self.stats["crashed"] += 1
+        self._schedule_replace(browser)
+
+    async def swap(self, browser, crashed=False):
+        """쓰던 브라우저를 반납(또는 폐기)하고 다음 브라우저를 받아온다."""
+        if crashed:
+            self.discard(browser)
+        else:
+            self.release(browser)
+        return await self.acquire()
+
+    async def maybe_recycle(self, browser):
+        """한도를 넘은 경우에만 교체하고, 아니면 같은 브라우저를 그대로 계속 쓴다."""
+        if self.needs_recycle(browser) is None:
+            return browser
+        return await self.swap(browser)
+
+    async def recover(self, browser):
+        """작업 실패 후 호출. 브라우저가 죽었으면 폐기, 살아 있으면(페이지 오류 등) 반납하고 다음 브라우저를 받는다."""
+        crashed = not await self.is_healthy(browser)
+        print(f"🔄 브라우저 {'교체' if crashed else '재사용'} 중...")
+        return await self.swap(browser, crashed=crashed)
+
+    async def close(self):
+        self.closed = True
+        if self.replacing:
+            await asyncio.gather(*self.replacing, return_exceptions=True)
+        while not self.idle.empty():
+            browser = self.idle.get_nowait()
+            if browser is not None:
+                await self._stop(browser)
+        for browser in list(self.in_use):
+            await self._stop(browser)
+        self.in_use.clear()
+        print(f"🛑 브라우저 풀 종료 (실행 {self.stats['launched']} / 교체 {self.stats['recycled']} / 크래시 {self.stats['crashed']})")
+
+
+class SharedBrowser:
+    """
+    여러 탭 워커가 같이 쓰는 브라우저 하나를 풀에서 빌려 쓰는 래퍼 (new-crawler 처럼 브라우저 하나 + 탭 여러 개인 경우).
+    브라우저가 바뀔 때마다 generation 이 올라가고, 워커는 자기 탭의 generation 이 다르면 새 브라우저에서 탭을 다시 연다.
+    - recover(): 장애를 본 워커가 호출. 같은 장애를 여러 워커가 보고해도 한 번만 교체한다.
+    - maybe_recycle(): RSS / 탭 수 한도를 넘으면 진행 중인 레코드(record())가 끝나길 기다렸다가 교체한다.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.browser = None
+        self.generation = 0
+        self.lock = asyncio.Lock()
+        self.active = 0
+        self.idle = asyncio.Event()
+        self.idle.set()
+        self.open = asyncio.Event()
+        self.open.set()
+        self.draining = False
+
+    async def start(self):
+        await self.pool.start()
+        self.browser = await self.pool.acquire()
+        return self
+
+    @contextlib.asynccontextmanager
+    async def record(self):
+        """레코드 하나를 처리하는 동안 브라우저를 쓰는 중으로 표시한다. 교체 대기 중이면 교체가 끝난 뒤 시작."""
+        await self.open.wait()
+        self.active += 1
+        self.idle.clear()
+        try:
+            yield
+        finally:
+            self.active -= 1
+            if self.active == 0:
+                self.idle.set()
+
+    async def _swap(self, crashed):
+        self.browser = await self.pool.swap(self.browser, crashed=crashed)
+        self.generation += 1
+
+    async def recover(self, generation):
+        """generation 의 브라우저에서 장애를 본 경우. 이미 다른 워커가 바꿨거나 아직 살아 있으면 그대로 둔다."""
+        async with self.lock:
+            if generation != self.generation or await self.pool.is_healthy(self.browser):
+                return False
+            print("💥 공유 브라우저 응답 없음 → 교체")
+            await self._swap(crashed=True)
+            return True
+
+    async def maybe_recycle(self):
+        if self.draining or self.pool.needs_recycle(self.browser) is None:
+            return
+        self.draining = True
+        self.open.clear()
+        try:
+            await self.idle.wait()
+            async with self.lock:
+                print(f"♻️ 공유 브라우저 교체 ({self.pool.needs_recycle(self.browser) or '한도 초과'})")
+                await self._swap(crashed=False)
+        finally:
+            self.draining = False
+            self.open.set()
+
+    async def close(self):
+        await self.pool.close()
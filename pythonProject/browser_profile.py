@@ -0,0 +1,356 @@
+import asyncio
+import fcntl
+import json
+import os
+import re
+import shutil
+import socket
+import sys
+import time
+
+import zendriver as zd
+
+from browser_pool import browser_pid, process_tree_rss_mb
+
+# "headless": 컨테이너 기본값 (headless=new + GPU/부가 기능 끔 + 렌더러 수 제한)
+# "headed": 예전처럼 창을 띄우는 모드 (로컬 디버깅용)
+BROWSER_PROFILE = os.environ.get("BROWSER_PROFILE", "headless")
+# 같은 호스트의 인스턴스들이 정적 리소스 디스크 캐시를 같이 쓴다 (0 이면 프로필 디렉토리 안의 캐시 사용)
+SHARED_CACHE = os.environ.get("BROWSER_SHARED_CACHE", "1") == "1"
+# CACHE_DIR 아래에 스냅샷 버전별 캐시 디렉토리를 두고, current 심볼릭 링크가 새 브라우저가 쓸 버전을 가리킨다.
+# 이미 떠 있는 크롬은 시작할 때 받은 버전 디렉토리를 계속 쓰므로, 새 스냅샷은 링크만 바꿔 끼워 배포한다.
+CACHE_DIR = os.environ.get("BROWSER_CACHE_DIR", "/tmp/foodpick-browser/cache")
+CACHE_POINTER = os.path.join(CACHE_DIR, "current")
+BASE_CACHE_VERSION = "base"
+CACHE_SIZE_MB = int(os.environ.get("BROWSER_CACHE_SIZE_MB", 256))
+# 재시작해도 같은 슬롯 디렉토리를 다시 쓰는 영구 프로필. {root} {crawler} {slot} 치환.
+PROFILE_ROOT = os.environ.get("BROWSER_PROFILE_ROOT", "/tmp/foodpick-browser/profiles")
+USER_DATA_DIR_TEMPLATE = os.environ.get("BROWSER_USER_DATA_DIR", "{root}/{crawler}-{slot}")
+MAX_PROFILE_SLOTS = 16
+RENDERER_PROCESS_LIMIT = int(os.environ.get("BROWSER_RENDERER_LIMIT", 2))
+# 사이트 정적 리소스(JS/CSS 번들, 서비스 워커)를 미리 받아 둔 프로필 스냅샷 (python browser_profile.py warm 으로 생성).
+# 있으면 슬롯 프로필 / 공유 캐시가 스냅샷보다 오래됐을 때 복사해 넣고 시작한다.
+WARM_PROFILE_DIR = os.environ.get("BROWSER_WARM_PROFILE", "/tmp/foodpick-browser/warm")
+# 1 이면 실행할 때마다 스냅샷에서 프로필을 새로 복사 (쿠키/방문 기록 없이 항상 같은 상태에서 시작)
+WARM_RESET = os.environ.get("BROWSER_WARM_RESET", "0") == "1"
+WARM_URLS = [u for u in os.environ.get("BROWSER_WARM_URLS", "").split(",") if u] or [
+    "https://m.place.naver.com/restaurant/list?query=김밥",
+    "https://m.place.naver.com/restaurant/list?query=카페",
+]
+WARM_STAMP = "warm.json"
+# 프로필 안의 캐시 디렉토리 이름 (공유 캐시를 쓰지 않을 때)
+PROFILE_CACHE_DIR = "DiskCache"
+# 스냅샷에서 복사하지 않는 것: 실행 중 잠금 파일, 크래시 덤프
+WARM_IGNORE = ("Singleton*", "*.lock", "Crashpad", "lockfile")
+
+# 모든 프로필 공통 (예전 크롤러별 browser_args)
+COMMON_ARGS = [
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-setuid-sandbox",
+    "--disable-software-rasterizer",
+    "--disable-blink-features=AutomationControlled",
+    "--window-size=1280,800",  # 반드시 사이즈 지정
+    "--disable-infobars",
+    "--disable-extensions",
+    "--disable-popup-blocking",
+    "--enable-logging=stderr",
+    "--log-level=1",
+]
+# --disable-features 는 마지막 값만 적용되므로 zendriver 기본값(IsolateOrigins,site-per-process)도 같이 넣는다
+DISABLED_FEATURES = [
+    "IsolateOrigins", "site-per-process", "Translate", "MediaRouter", "OptimizationHints",
+    "BackForwardCache", "AutofillServerCommunication", "InterestFeedContentSuggestions", "PaintHolding",
+]
+LOW_FOOTPRINT_ARGS = [
+    "--disable-gpu",
+    "--disable-gpu-compositing",
+    "--disable-accelerated-2d-canvas",
+    "--disable-features=" + ",".join(DISABLED_FEATURES),
+    f"--renderer-process-limit={RENDERER_PROCESS_LIMIT}",
+    "--disable-sync",
+    "--disable-default-apps",
+    "--mute-audio",
+    "--metrics-recording-only",
+]
+
+PROFILES = {
+    "headless": {"headless": True, "args": COMMON_ARGS + LOW_FOOTPRINT_ARGS},
+    "headed": {"headless": False, "args": COMMON_ARGS},
+}
+
+# 프로필별 실행 시간 / 실행 직후 RSS 누적 (profile_report 로 출력)
+LAUNCH_STATS = {}
+_reserved_dirs = set()
+
+
+def profile_lock_owner(user_data_dir):
+    """크롬이 프로필 디렉토리에 만드는 SingletonLock(-> '호스트명-pid') 을 읽어 (호스트명, pid)."""
+    try:
+        host, _, pid = os.readlink(os.path.join(user_data_dir, "SingletonLock")).rpartition("-")
+        return host, int(pid)
+    except (OSError, ValueError):
+        return None
+
+
+def profile_in_use(user_data_dir):
+    if user_data_dir in _reserved_dirs:
+        return True
+    owner = profile_lock_owner(user_data_dir)
+    if owner is None:
+        return False
+    host, pid = owner
+    if host != socket.gethostname():
+        # 다른 컨테이너가 같은 볼륨을 쓰는 경우: 살아 있는지 확인할 수 없으니 사용 중으로 본다
+        return True
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+def reserve_user_data_dir(crawler):
+    """
+    비어 있는 가장 낮은 번호의 프로필 슬롯을 고른다. 같은 슬롯을 계속 다시 쓰므로 쿠키/캐시가 재시작 후에도 남는다.
+    (크롬이 SingletonLock 을 만들기 전까지는 프로세스 안에서 예약해 두 워커가 같은 슬롯을 잡지 않게 한다)
+    """
+    for slot in range(MAX_PROFILE_SLOTS):
+        user_data_dir = USER_DATA_DIR_TEMPLATE.format(root=PROFILE_ROOT, crawler=crawler, slot=slot)
+        if not profile_in_use(user_data_dir):
+            os.makedirs(user_data_dir, exist_ok=True)
+            _reserved_dirs.add(user_data_dir)
+            return user_data_dir
+    raise RuntimeError(f"🚫 사용 가능한 브라우저 프로필 슬롯이 없습니다 ({MAX_PROFILE_SLOTS}개 사용 중)")
+
+
+def current_cache_dir():
+    """공유 캐시의 현재 버전 디렉토리 (링크가 없으면 스냅샷 없이 쓰는 base)."""
+    if os.path.islink(CACHE_POINTER):
+        return os.path.realpath(CACHE_POINTER)
+    return os.path.join(CACHE_DIR, BASE_CACHE_VERSION)
+
+
+def cache_dir_for(user_data_dir):
+    return current_cache_dir() if SHARED_CACHE else os.path.join(user_data_dir, PROFILE_CACHE_DIR)
+
+
+def profile_args(profile, cache_dir):
+    # 캐시 위치를 항상 명시해 두어야 스냅샷의 캐시를 어디에 복사할지 정해진다
+    os.makedirs(cache_dir, exist_ok=True)
+    return list(PROFILES[profile]["args"]) + [
+        f"--disk-cache-dir={cache_dir}", f"--disk-cache-size={CACHE_SIZE_MB * 1024 * 1024}",
+    ]
+
+
+def read_stamp(directory):
+    try:
+        with open(os.path.join(directory, WARM_STAMP), encoding="utf-8") as f:
+            return json.load(f).get("created_at")
+    except (OSError, ValueError):
+        return None
+
+
+def copy_snapshot(source, target, stamp, ignore=None):
+    if os.path.exists(target):
+        shutil.rmtree(target)
+    shutil.copytree(source, target, ignore=ignore)
+    with open(os.path.join(target, WARM_STAMP), "w", encoding="utf-8") as f:
+        json.dump({"created_at": stamp}, f)
+
+
+def publish_warm_cache(warm_cache, warm_stamp):
+    """
+    스냅샷 캐시를 새 버전 디렉토리로 복사한 뒤 current 링크를 원자적으로 바꾼다.
+    쓰고 있는 캐시 디렉토리는 지우지도 덮어쓰지도 않는다. (예전 버전은 그 버전으로 뜬 크롬이 끝난 뒤 지워도 된다)
+    """
+    version_dir = os.path.join(CACHE_DIR, "v-" + re.sub(r"\D", "", warm_stamp))
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # 같은 호스트의 다른 크롤러 프로세스가 동시에 같은 버전을 만들지 않도록 파일 잠금
+    with open(CACHE_DIR.rstrip("/") + ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if read_stamp(current_cache_dir()) == warm_stamp:
+            return False
+        if read_stamp(version_dir) != warm_stamp:
+            building = f"{version_dir}.building-{os.getpid()}"
+            copy_snapshot(warm_cache, building, warm_stamp)
+            if os.path.exists(version_dir):
+                # 복사 도중 죽어 스탬프 없이 남은 버전 (링크가 가리킨 적 없음)
+                shutil.rmtree(version_dir)
+            os.replace(building, version_dir)
+        pointer = f"{CACHE_POINTER}.{os.getpid()}"
+        if os.path.lexists(pointer):
+            os.remove(pointer)
+        os.symlink(version_dir, pointer)
+        os.replace(pointer, CACHE_POINTER)
+    return True
+
+
+def seed_from_warm_profile(user_data_dir):
+    """
+    스냅샷이 있으면 슬롯 프로필(과 공유 캐시)이 스냅샷보다 오래됐을 때만 복사한다.
+    재시작해도 JS/CSS 번들이 HTTP 캐시에 있어 첫 페이지가 평소 페이지와 비슷한 속도로 뜬다.
+    파일 복사와 잠금 대기가 있으므로 launch_browser 는 이 함수를 스레드에서 돌린다.
+    """
+    warm_stamp = read_stamp(WARM_PROFILE_DIR)
+    if warm_stamp is None:
+        return False
+
+    started = time.perf_counter()
+    seeded = []
+    if WARM_RESET or read_stamp(user_data_dir) != warm_stamp:
+        # 공유 캐시를 쓰면 스냅샷의 캐시는 프로필이 아니라 CACHE_DIR 로 한 번만 복사한다
+        ignore = WARM_IGNORE + ((PROFILE_CACHE_DIR,) if SHARED_CACHE else ())
+        copy_snapshot(WARM_PROFILE_DIR, user_data_dir, warm_stamp, shutil.ignore_patterns(*ignore))
+        seeded.append("프로필")
+
+    warm_cache = os.path.join(WARM_PROFILE_DIR, PROFILE_CACHE_DIR)
+    if SHARED_CACHE and os.path.isdir(warm_cache) and publish_warm_cache(warm_cache, warm_stamp):
+        seeded.append("공유 캐시")
+
+    if seeded:
+        print(f"🔥 웜 스냅샷({warm_stamp}) → {' / '.join(seeded)} 복사 ({time.perf_counter() - started:.2f}초)")
+    return True
+
+
+def record_launch(profile, seconds, rss_mb):
+    stats = LAUNCH_STATS.setdefault(profile, {"launches": 0, "seconds": 0.0, "rss_mb": 0.0, "rss_samples": 0})
+    stats["launches"] += 1
+    stats["seconds"] += seconds
+    if rss_mb is not None:
+        stats["rss_mb"] += rss_mb
+        stats["rss_samples"] += 1
+
+
+async def launch_browser(crawler, executable=None, profile=None):
+    """BROWSER_PROFILE(또는 profile) 설정으로 zendriver 브라우저를 띄우고 실행 시간 / RSS 를 기록한다."""
+    profile = profile or BROWSER_PROFILE
+    config = PROFILES[profile]
+    user_data_dir = reserve_user_data_dir(crawler)
+    started = time.perf_counter()
+    try:
+        # 복사 / 파일 잠금 대기 동안 다른 탭 워커가 멈추지 않도록 이벤트 루프 밖에서 한다
+        warm = await asyncio.to_thread(seed_from_warm_profile, user_data_dir)
+        browser = await zd.start(
+            headless=config["headless"],
+            user_data_dir=user_data_dir,
+            browser_executable_path=executable,
+            browser_args=profile_args(profile, cache_dir_for(user_data_dir)),
+        )
+    finally:
+        _reserved_dirs.discard(user_data_dir)
+    seconds = time.perf_counter() - started
+    rss_mb = process_tree_rss_mb(browser_pid(browser))
+    record_launch(profile, seconds, rss_mb)
+    # get_classified 가 첫 페이지 / 이후 페이지 로딩 시간을 나눠 기록한다
+    browser._profile_name = profile
+    browser._pages_loaded = 0
+    rss = f"{rss_mb:.0f}MB" if rss_mb is not None else "?"
+    print(f"🚀 [{profile}{', warm' if warm else ''}] 브라우저 시작 {seconds:.2f}초 / RSS {rss} ({os.path.basename(user_data_dir)})")
+    return browser
+
+
+def record_page_load(tab, seconds):
+    """재시작 직후 첫 페이지와 그 뒤 페이지의 로딩 시간을 프로필별로 따로 모은다."""
+    browser = getattr(tab, "browser", None)
+    profile = getattr(browser, "_profile_name", None)
+    if profile is None:
+        return
+    stats = LAUNCH_STATS[profile]
+    key = "first_page" if browser._pages_loaded == 0 else "steady_page"
+    stats[key] = stats.get(key, 0.0) + seconds
+    stats[key + "s"] = stats.get(key + "s", 0) + 1
+    browser._pages_loaded += 1
+
+
+def profile_report():
+    for profile, stats in LAUNCH_STATS.items():
+        launches = stats["launches"]
+        rss = f"{stats['rss_mb'] / stats['rss_samples']:.0f}MB" if stats["rss_samples"] else "?"
+        print(f"📊 [{profile}] 실행 {launches}회 / 평균 시작 {stats['seconds'] / launches:.2f}초 / 평균 실행 직후 RSS {rss}")
+        if stats.get("first_pages") and stats.get("steady_pages"):
+            print(f"   첫 페이지 평균 {stats['first_page'] / stats['first_pages']:.2f}초"
+                  f" / 이후 페이지 평균 {stats['steady_page'] / stats['steady_pages']:.2f}초")
+
+
+async def build_warm_profile(urls=None, profile=None):
+    """
+    WARM_PROFILE_DIR 에 새 프로필을 만들고 urls 를 차례로 열어 HTTP 캐시 / 서비스 워커를 채운 뒤 스냅샷으로 남긴다.
+    크롤러와 같은 프로필 인자로 띄우고 캐시는 스냅샷 안(DiskCache)에 둔다.
+    """
+    urls = urls or WARM_URLS
+    profile = profile or BROWSER_PROFILE
+    building = WARM_PROFILE_DIR.rstrip("/") + ".building"
+    if os.path.exists(building):
+        shutil.rmtree(building)
+    os.makedirs(building)
+
+    browser = await zd.start(
+        headless=PROFILES[profile]["headless"],
+        user_data_dir=building,
+        browser_args=profile_args(profile, os.path.join(building, PROFILE_CACHE_DIR)),
+    )
+    try:
+        for url in urls:
+            started = time.perf_counter()
+            await browser.get(url)
+            await browser.wait(2)
+            print(f"🔥 웜업 {url} ({time.perf_counter() - started:.1f}초)")
+    finally:
+        await browser.stop()
+
+    stamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    with open(os.path.join(building, WARM_STAMP), "w", encoding="utf-8") as f:
+        json.dump({"created_at": stamp, "urls": urls, "profile": profile}, f, ensure_ascii=False)
+    # 이미 돌고 있는 크롤러가 반쯤 바뀐 스냅샷을 복사하지 않도록 완성본을 통째로 바꿔 끼운다
+    if os.path.exists(WARM_PROFILE_DIR):
+        shutil.rmtree(WARM_PROFILE_DIR)
+    os.replace(building, WARM_PROFILE_DIR)
+    print(f"✅ 웜 스냅샷 생성: {WARM_PROFILE_DIR} ({stamp})")
+
+
+async def measure_profiles(url, profiles, rounds=3):
+    """
+    프로필마다 rounds 번 브라우저를 띄워 url 을 연 뒤
+    시작 시간, 첫 페이지 시간, 페이지를 연 뒤의 프로세스 트리 RSS 를 비교해 출력한다.
+    """
+    results = {}
+    for profile in profiles:
+        page_seconds, page_rss = [], []
+        for _ in range(rounds):
+            browser = await launch_browser("measure", profile=profile)
+            try:
+                started = time.perf_counter()
+                await browser.get(url)
+                page_seconds.append(time.perf_counter() - started)
+                await asyncio.sleep(1)
+                page_rss.append(process_tree_rss_mb(browser_pid(browser)))
+            finally:
+                await browser.stop()
+        stats = LAUNCH_STATS[profile]
+        samples = [r for r in page_rss if r is not None]
+        results[profile] = {
+            "launch_seconds": stats["seconds"] / stats["launches"],
+            "page_seconds": sum(page_seconds) / len(page_seconds),
+            "rss_mb": sum(samples) / len(samples) if samples else None,
+        }
+
+    print(f"\n📏 프로필 비교 ({url}, {rounds}회 평균)")
+    for profile, r in results.items():
+        rss = f"{r['rss_mb']:.0f}MB" if r["rss_mb"] is not None else "?"
+        print(f"  {profile:<9} 시작 {r['launch_seconds']:.2f}초 / 첫 페이지 {r['page_seconds']:.2f}초 / 페이지 로딩 후 RSS {rss}")
+    return results
+
+
+if __name__ == "__main__":
+    # 사용법: python browser_profile.py warm [URL ...]       (웜 스냅샷 생성)
+    #         python browser_profile.py [URL] [프로필 ...]    (프로필별 시작 시간 / 메모리 비교)
+    if len(sys.argv) > 1 and sys.argv[1] == "warm":
+        asyncio.run(build_warm_profile(sys.argv[2:] or None))
+    else:
+        asyncio.run(measure_profiles(
+            sys.argv[1] if len(sys.argv) > 1 else "https://m.place.naver.com/restaurant/list?query=김밥",
+            sys.argv[2:] or list(PROFILES),
+        ))
@@ -10,13 +10,22 @@ import pandas as pd
 import pprint
 import sqlite3
 import zendriver as zd
+from jsonl_sink import JsonlWriter
+from browser_pool import BrowserPool
+from page_check import get_classified
+from browser_profile import launch_browser, profile_report
+from resource_blocking import install_resource_blocking
+from retry_policy import BROWSER, PARSE, PAGE_POLICY, SELECTOR_POLICY, PageLoadError, retry_report, start_record_budget
+from apollo_state import extract_apollo_state
+from http_fetch import ApolloHttpFetcher, BASE_URL, FETCH_MODE
 import urllib
 import re
 from re import search, sub, compile as re_compile # compile 추가
 import os
 import sys
 
-headless = False
+# 요청 차단 로그 / 브라우저 프로필 디렉토리에서 이 크롤러를 가리키는 이름
+CRAWLER_NAME = "crawl-menu"
 
 def load_10_restaurant_names_and_addresses():
     conn = sqlite3.connect('food_merged_final.db')
@@ -60,39 +69,9 @@ def sanitize_filename(name):
     name = re.sub(r'[\\/*?:"<>|]', "", name).replace(" ", "_")
     return name[:100] if len(name) > 100 else name
 
-async def load_page_with_wait(browser, url):
-    page = await browser.get(url)
-
-    tmp_parser = BeautifulSoup(await page.get_content(), "lxml")
-    if any(err in tmp_parser.get_text().lower() for err in [
-        "500", "internal server error", "proxy error", "nginx", "html error", "bad gateway"
-    ]):
-        time.sleep(3)
-        raise Exception("❌ 페이지 로드 실패: 서버 오류")
-    await page.wait_for("div.place_business_list_wrapper", timeout=10)
-    return page
-
-
-async def load_page_with_wait02(browser, url):
-    page = await browser.get(url)
-    tmp_parser = BeautifulSoup(await page.get_content(), "lxml")
-    if any(err in tmp_parser.get_text().lower() for err in [
-        "500", "internal server error", "proxy error", "nginx", "html error", "bad gateway"
-    ]):
-        time.sleep(3)
-        raise Exception("❌ 페이지 로드 실패: 서버 오류")
-    await page.wait_for("div.place_fixed_maintab", timeout=10)
-    return page
-
-
-async def with_retry(func, retries=5, delay=1):
-    for attempt in range(retries):
-        try:
-            return await func()
-        except Exception as e:
-            print(f"⚠️ 재시도 {attempt+1}/{retries} 실패: {e}")
-            await asyncio.sleep(delay)
-    raise Exception("❌ 모든 재시도 실패")
+async def with_retry(func):
+    # 셀렉터 대기용: 여기서의 타임아웃은 '요소 없음'(parse) 으로 보고 짧게만 다시 시도한다
+    return await SELECTOR_POLICY.run(func, timeout_as=PARSE)
 
 
 async def wait_for_selector_with_retry(page, selector, timeout=10, interval=1):
@@ -140,28 +119,6 @@ def extract_dynamic_place_info(soup: BeautifulSoup):
             place_info[key] = value_block.get_text(strip=True)
     return place_info
 
-def append_to_json_file(data, filepath):
-    # 파일이 있으면 기존 데이터 로드
-    if os.path.exists(filepath):
-        with open(filepath, "r", encoding="utf-8") as f:
-            try:
-                existing = json.load(f)
-            except json.JSONDecodeError:
-                existing = []
-    else:
-        existing = []
-
-    # 중복 방지 (title 기준)
-    titles = {entry.get("title") for entry in existing}
-    if data.get("title") not in titles:
-        existing.append(data)
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(existing, f, ensure_ascii=False, indent=2)
-        print(f"📦 저장 완료: {data['title']}")
-    else:
-        print(f"⚠️ 중복으로 저장 건너뜀: {data['title']}")
-
-
 def log_error_json(error_info, filepath):
     error_info["timestamp"] = time.strftime("%Y-%m-%d %H:%M:%S")
     with open(filepath, "a", encoding="utf-8") as f:
@@ -169,39 +126,23 @@ def log_error_json(error_info, filepath):
     print(f"❌ 오류 기록 완료: {error_info['title'] if 'title' in error_info else '알 수 없는 오류'}")
 
 
-async def with_browser_retry(browser_ref, executable, browser_args, coro_fn, retries=5, delay=2):
-    for attempt in range(retries):
-        try:
-            result = await coro_fn(browser_ref[0])
-            html = await result.get_content()
-            soup = BeautifulSoup(html, "lxml")
-            page_text = soup.get_text().lower()
-            for err in [
-                "500", "internal server error", "proxy error", "nginx",
-                "sigkill", "sigtrap", "aw snap", "페이지를 표시하는 도중 문제"
-            ]:
-                if err in page_text:
-                    print(f"❌ 페이지 로드 실패: 에러 탐지됨 → '{err}'")
-                    raise Exception(f"🛑 HTML 내 에러 페이지 탐지됨: '{err}'")
-            return result
-        except Exception as e:
-            print(f"⚠️ 브라우저 작업 실패 {attempt+1}/{retries}: {e}")
-            try:
-                await browser_ref[0].stop()
-            except:
-                pass
-            print("🔄 브라우저 재시작 중...")
-            browser_ref = [await start_browser(executable)]
-            await asyncio.sleep(delay)
-    raise Exception("❌ 브라우저 재시도 모두 실패")
+def recover_on_browser_fault(browser_ref, pool):
+    """
+    RetryPolicy 의 on_failure. 에러 페이지 / 타임아웃은 같은 브라우저로 백오프 후 다시 시도하고,
+    브라우저 장애로 분류됐거나 헬스체크에 실패할 때만 풀에서 교체한다.
+    """
+    async def on_failure(error_class, error):
+        if error_class == BROWSER or not await pool.is_healthy(browser_ref[0]):
+            # 호출한 쪽의 browser_ref 도 같이 바뀌도록 리스트 안의 값을 교체한다
+            browser_ref[0] = await pool.recover(browser_ref[0])
+    return on_failure
 
 
 async def start_browser(executable):
-    return await zd.start(
-        headless=headless,
-        browser_executable_path=executable,
-        browser_args=browser_args
-    )
+    # headless / 실행 인자 / 프로필 디렉토리는 browser_profile 의 공통 설정(BROWSER_PROFILE)을 따른다
+    browser = await launch_browser(CRAWLER_NAME, executable)
+    await install_resource_blocking(browser.main_tab, CRAWLER_NAME)
+    return browser
 
 async def wait_for_browser_ready(port, timeout=10):
     import socket
@@ -214,102 +155,15 @@ async def wait_for_browser_ready(port, timeout=10):
     raise Exception(f"🚫 브라우저 포트 {port} 연결 실패")
 
 
-async def with_browser_get(url, browser_ref, executable, retries=5, delay=2):
-    for attempt in range(retries):
-        try:
-            print(f"📡 시도 {attempt+1}/{retries}: {url}")
-            page = await browser_ref[0].get(url)
-            html = await page.get_content()
-            soup = BeautifulSoup(html, "lxml")
-            if any(err in soup.get_text().lower() for err in [
-                "500", "internal server error", "proxy error", "nginx", "html error", "bad gateway"
-            ]):
-                raise Exception("🛑 HTML 내 에러 페이지 탐지됨")
-            return page
-        except Exception as e:
-            print(f"⚠️ 브라우저 작업 실패 {attempt+1}/{retries}: {e}")
-            print("🔄 브라우저 재시작 중...")
-            try:
-                await browser_ref[0].stop()
-            except:
-                pass
-            await asyncio.sleep(delay)
-            browser_ref[0] = await start_browser(executable)
-    raise Exception("❌ 브라우저 재시도 모두 실패")
-
-def normalize(text: str) -> str:
-    if not text:
-        return ''
-    text = re.sub(r'\s+', '', text)                 # 모든 공백 제거
-    text = re.sub(r'[^\w가-힣]', '', text)           # 특수문자 제거
-    text = re.sub(r'[\u200b\u200c\u200d\ufeff\xa0]', '', text)  # 비가시 문자 제거
-    return text.lower()
-
+async def with_browser_get(url, browser_ref, pool, policy=PAGE_POLICY):
+    async def attempt():
+        print(f"📡 요청: {url}")
+        page, reason = await get_classified(browser_ref[0].main_tab, url)
+        if reason:
+            raise PageLoadError(reason)
+        return page
 
-
-def extract_rq_items(html_text: str):
-    """
-    window.__RQ_STREAMING_STATE__.push({...}); 블록 안의 JSON을 추출해서
-    items 리스트를 전부 반환한다.
-    """
-    parser = BeautifulSoup(html_text, "lxml")
-    scripts = parser.find_all("script")
-    # pprint.pprint(scripts) # 디버깅용
-
-    # window.__RQ_STREAMING_STATE__.push(...) 를 찾는 정규식
-    # JSON 객체가 복잡하고 여러 줄일 수 있으므로 관대한 패턴 사용
-    push_regex = re_compile(
-        r'window\.__RQ_STREAMING_STATE__\.push\((.*?)\)\s*;?\s*$', # 끝부분 공백/세미콜론 허용
-        re.DOTALL | re.MULTILINE # 여러 줄에 걸쳐 매칭
-    )
-
-    all_items = []
-    found_pushes = 0
-
-    for script in scripts:
-        if not script.string:
-            continue
-
-        # 정규식으로 push 호출 부분 찾기
-        matches = push_regex.findall(script.string.strip()) # 스크립트 내용 앞뒤 공백 제거
-        # pprint.pprint(matches) # 디버깅용
-        for match in matches:
-            found_pushes += 1
-            # print(f"DEBUG: Found push content: {match[:200]}...") # 디버깅용
-            try:
-                # JSON 파싱 시도
-                parsed = json.loads(match)
-
-                # 'queries' 키 확인 및 순회
-                queries = parsed.get("queries", [])
-                if not isinstance(queries, list):
-                    # print("DEBUG: 'queries' is not a list.")
-                    continue
-
-                for q_index, q in enumerate(queries):
-                    # 'state', 'data', 'items' 경로 확인
-                    items = q.get("state", {}).get("data", {}).get("items", [])
-
-                    # items가 리스트이고 내용이 있는지 확인
-                    if isinstance(items, list) and items:
-                        print(f"✅ Script 내에서 {len(items)}개의 items 발견 (query index: {q_index})")
-                        all_items.extend(items) # 찾은 아이템 추가
-
-            except json.JSONDecodeError as e:
-                # print(f"⚠️ JSON 파싱 실패: {e}. Content: {match[:300]}...") # 디버깅용
-                continue # 파싱 실패 시 다음 매치 또는 스크립트로
-            except Exception as e:
-                print(f"⚠️ 데이터 추출 중 예상치 못한 오류: {e}")
-                continue
-
-    if found_pushes == 0:
-         print("🟡 RQ_STREAMING_STATE push 호출을 찾지 못했습니다.")
-    elif not all_items:
-        print("🟡 push 호출은 찾았으나, 유효한 'items' 데이터를 포함한 호출이 없었습니다.")
-    else:
-         print(f"✅ 최종 추출된 items: {len(all_items)}개")
-
-    return all_items
+    return await policy.run(attempt, on_failure=recover_on_browser_fault(browser_ref, pool))
 
 def extract_menu_items_from_apollo(apollo_json):
     menu_items = []
@@ -378,65 +232,50 @@ async def crawler():
         elif os.path.exists("/usr/bin/chromium"):
             executable = "/usr/bin/chromium"
 
-    try:
-        browser_ref = [await start_browser(executable)]
+    # http 모드에서는 APOLLO_STATE 가 없는 페이지가 나올 때 처음으로 브라우저를 띄운다
+    browser_ref = [None]
+    pool = BrowserPool(lambda: start_browser(executable))
+    http_fetcher = await ApolloHttpFetcher().open()
+    print(f"ℹ️ 수집 모드: {FETCH_MODE}")
 
-        print("✅ Zendriver 시작 완료.")
+    try:
+        if FETCH_MODE != "http":
+            await pool.start()
+            browser_ref[0] = await pool.acquire()
+            print("✅ Zendriver 시작 완료.")
         success, fail, need_check = 0, 0, 0
 
         for index, (id, business_name, naver_id) in enumerate(restaurant_infos):
-            if (index + 1) % 50 == 0:
-                await page.close()
-                await browser_ref[0].stop()
-                print("🔄 메모리 유출 방지 브라우저 재시작 중...")
-                browser_ref = [await start_browser(executable)]
-                print("✅ 메모리 유출 방지 브라우저 재시작 완료.")
+            # 고정 주기 재시작 대신 RSS / 탭 수가 한도를 넘을 때만 교체
+            if browser_ref[0] is not None:
+                browser_ref[0] = await pool.maybe_recycle(browser_ref[0])
 
             try:
+                start_record_budget()
                 #search_query = make_search_query(business_name, road_address)
                 search_query = re.sub(r'\D', '', naver_id).strip()
 
                 print(f"🔍 [{index + 1} | {len(restaurant_infos)}] 검색 쿼리: {search_query}")
                 encoded_query = urllib.parse.quote(search_query)
-                mob_url = f"https://m.place.naver.com/place/{encoded_query}/menu"
+                mob_url = f"{BASE_URL}/place/{encoded_query}/menu"
                 print(f"🔗 [{index + 1} | {len(restaurant_infos)}] {business_name}")
                 print(f"🔗 [{index + 1} | {len(restaurant_infos)}] {search_query} URL: {mob_url}")
 
-                page = await with_browser_get(mob_url, browser_ref, executable, retries=5, delay=3)
-                await page.wait_for("div.place_fixed_maintab", timeout=10)
-                html_src = await page.get_content()
-                soup = BeautifulSoup(html_src, 'lxml')
-
-                scripts = soup.find_all('script')
-                apollo_data_raw = None
-                for script in scripts:
-                    # Check if the script content exists and contains the target string
-                    if script.string and "window.__APOLLO_STATE__" in script.string:
-                        # --- Corrected Regex ---
-                        # Removed the '$' anchor to match even if other JS code follows the APOLLO_STATE assignment.
-                        # Added non-greedy match {.*?} just in case of nested structures, though {.*} often works too.
-                        match = re.search(r"window\.__APOLLO_STATE__\s*=\s*({.*?});", script.string, re.DOTALL)
-                        if match:
-                            apollo_data_raw = match.group(1)
-                            print("✅ APOLLO_STATE 스크립트 블록 찾음.")
-                            break  # Exit the loop once found
-
-                if not apollo_data_raw:
+                html_src = None
+                if FETCH_MODE == "http":
+                    html_src = await http_fetcher.fetch_apollo_html(f"/place/{encoded_query}/menu")
+                if html_src is None:
+                    if browser_ref[0] is None:
+                        browser_ref[0] = await pool.acquire()
+                        print("✅ Zendriver 시작 완료.")
+                    page = await with_browser_get(mob_url, browser_ref, pool)
+                    await page.wait_for("div.place_fixed_maintab", timeout=10)
+                    html_src = await page.get_content()
+                apollo_json = extract_apollo_state(html_src, ("PlaceDetailBase:", "Menu:"))
+                if apollo_json is None:
                     print("🟡 APOLLO_STATE 데이터를 포함하는 스크립트를 찾지 못했습니다.")
-                    return []
-
-                try:
-                    # Attempt to load the extracted string as JSON
-                    apollo_json = json.loads(apollo_data_raw)
-                    print("✅ APOLLO_STATE JSON 파싱 성공.")
-                    #pprint.pprint(apollo_json)  # Optional: Print the parsed JSON for debugging
-                except json.JSONDecodeError as e:
-                    print(f"❌ JSON 파싱 실패: {e}")
-                    # Optional: Print a snippet of the raw data for debugging JSON errors
-                    # print("--- 파싱 시도한 데이터 (일부) ---")
-                    # print(apollo_data_raw[:500] + "..." if apollo_data_raw else "N/A")
-                    # print("-----------------------------")
-                    return []
+                    need_check += 1
+                    continue
 
                 menu_items, cordinates = extract_menu_items_from_apollo(apollo_json)
 
@@ -450,7 +289,7 @@ async def crawler():
                 }
                 # print(data)
 
-                append_to_json_file(data, output_path)
+                output_sink.append(data)
                 success += 1
 
             except Exception as e:
@@ -460,8 +299,13 @@ async def crawler():
 
 
     finally:
-        await browser_ref[0].stop()
-        print("🛑 Zendriver 종료 완료")
+        output_sink.close()
+        await http_fetcher.close()
+        await pool.close()
+        profile_report()
+        retry_report()
+        if browser_ref[0] is not None:
+            print("🛑 Zendriver 종료 완료")
         print("🛑 크롤러 종료 완료")
         print(f"\n✅ 완료: {success} / ❌ 실패: {fail} / ⚠️ 확인 필요: {need_check}")
 
@@ -491,21 +335,7 @@ if __name__ == "__main__":
     print("📂 ErrorLog 저장 경로:", ERROR_DIR)
 
     start_index = int(os.environ.get("START_INDEX", sys.argv[1] if len(sys.argv) > 1 else 0))
-    output_path = os.path.join(DATA_DIR, f"crawl_menu_{start_index}.json")
-
-    browser_args = [
-        "--no-sandbox",
-        "--disable-dev-shm-usage",
-        "--disable-setuid-sandbox",
-        "--disable-software-rasterizer",
-        "--disable-blink-features=AutomationControlled",
-        "--window-size=1280x800",  # 반드시 사이즈 지정
-        # "--start-maximized",  # headless에서도 최대화처럼 보이게
-        "--disable-infobars",
-        "--disable-extensions",
-        "--disable-popup-blocking",
-        "--enable-logging=stderr",
-        "--log-level=1",
-    ]
+    output_path = os.path.join(DATA_DIR, f"crawl_menu_{start_index}.jsonl")
+    output_sink = JsonlWriter(output_path)
 
     asyncio.run(crawler())
\ No newline at end of file
@@ -0,0 +1,164 @@
+import hashlib
+import json
+import sqlite3
+import sys
+import time
+
+from jsonl_sink import iter_dir_records
+from menu_items import ensure_menu_schema, refresh_menu_items
+
+DB_PATH = "food_merged_final.db"
+BATCH_SIZE = 5000
+
+
+def menu_values(item):
+    menu = item.get("menu", [])
+    if not isinstance(menu, list):
+        return None
+    return (json.dumps(menu, ensure_ascii=False),)
+
+
+def geo_values(item):
+    coords = item.get("cordinates", {})
+    lat, lng = coords.get("latitude"), coords.get("longitude")
+    if not lat or not lng:
+        return None
+    return (lat, lng)
+
+
+# 크롤 결과 종류별: 기본 디렉토리, 채울 restaurant_merged 컬럼, 레코드 → 컬럼 값
+# (setup / refresh: 추가 테이블 준비, 배치마다 바뀐 행 기준으로 추가 테이블 갱신)
+LOADERS = {
+    "menu": {
+        "directory": "menu_crawl", "columns": ("MENU",), "values": menu_values,
+        "setup": ensure_menu_schema, "refresh": refresh_menu_items,
+    },
+    "geo": {"directory": "geolocation_crawl", "columns": ("LATITUDE", "LONGITUDE"), "values": geo_values},
+}
+
+
+def content_hash(values):
+    return hashlib.blake2b(json.dumps(values, ensure_ascii=False).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def ensure_schema(conn, loader):
+    columns = loader["columns"]
+    existing = [col[1].upper() for col in conn.execute("PRAGMA table_info(restaurant_merged)")]
+    for column in columns:
+        if column.upper() not in existing:
+            conn.execute(f"ALTER TABLE restaurant_merged ADD COLUMN {column} TEXT DEFAULT null")
+    # 마지막으로 반영한 내용의 해시. 같은 파일을 다시 돌리면 바뀐 행만 UPDATE 한다.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS crawl_load_hash (
+            kind TEXT NOT NULL,
+            id INTEGER NOT NULL,
+            hash TEXT NOT NULL,
+            PRIMARY KEY (kind, id)
+        )
+    """)
+    if "setup" in loader:
+        loader["setup"](conn)
+
+
+def staged_rows(kind, directory):
+    values_of = LOADERS[kind]["values"]
+    for item in iter_dir_records(directory):
+        row_id = item.get("id")
+        if row_id is None:
+            continue
+        values = values_of(item)
+        if values is None:
+            continue
+        yield (row_id, content_hash(values), *values)
+
+
+def apply_batch(conn, kind):
+    """stage 테이블의 한 배치를 반영하고 (변경 없음으로 건너뛴 수, 업데이트 수) 를 돌려준다."""
+    loader = LOADERS[kind]
+    columns = loader["columns"]
+    # 해시가 같고 대상 컬럼이 이미 채워져 있으면 그대로 둔다 (restaurant_merged 를 새로 만든 경우엔 다시 채운다)
+    skipped = conn.execute(f"""
+        DELETE FROM temp.load_stage
+        WHERE id IN (
+            SELECT s.id FROM temp.load_stage s
+            JOIN crawl_load_hash h ON h.kind = ? AND h.id = s.id AND h.hash = s.hash
+            JOIN restaurant_merged r ON r.ID = s.id AND r.{columns[0]} IS NOT NULL
+        )
+    """, (kind,)).rowcount
+
+    assignments = ", ".join(f"{col} = s.{col}" for col in columns)
+    updated = conn.execute(f"""
+        UPDATE restaurant_merged SET {assignments}
+        FROM temp.load_stage s
+        WHERE restaurant_merged.ID = s.id
+    """).rowcount
+    if "refresh" in loader:
+        loader["refresh"](conn)
+    conn.execute("""
+        INSERT OR REPLACE INTO crawl_load_hash (kind, id, hash)
+        SELECT ?, s.id, s.hash FROM temp.load_stage s
+        WHERE s.id IN (SELECT ID FROM restaurant_merged)
+    """, (kind,))
+    conn.execute("DELETE FROM temp.load_stage")
+    return skipped, updated
+
+
+def load_crawl_output(kind, directory=None, db_path=DB_PATH, batch_size=BATCH_SIZE):
+    """
+    크롤 결과 디렉토리(.jsonl / 예전 .json)를 스트리밍하며 batch_size 건씩 temp 테이블에 넣고
+    UPDATE ... FROM 조인 한 번으로 restaurant_merged 에 반영한다. 같은 id 가 여러 번 나오면 마지막 값이 남는다.
+    """
+    loader = LOADERS[kind]
+    directory = directory or loader["directory"]
+    columns = loader["columns"]
+    started = time.time()
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    ensure_schema(conn, loader)
+    column_defs = ", ".join(f"{col} TEXT" for col in columns)
+    conn.execute(f"CREATE TEMP TABLE load_stage (id INTEGER PRIMARY KEY, hash TEXT, {column_defs})")
+    insert_sql = f"INSERT OR REPLACE INTO temp.load_stage VALUES (?, ?, {', '.join('?' for _ in columns)})"
+
+    read, skipped, updated = 0, 0, 0
+    batch = []
+    conn.execute("BEGIN")
+    try:
+        for row in staged_rows(kind, directory):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                conn.executemany(insert_sql, batch)
+                read += len(batch)
+                batch_skipped, batch_updated = apply_batch(conn, kind)
+                skipped += batch_skipped
+                updated += batch_updated
+                batch = []
+                print(f"🔁 {read}건 처리 ({read / (time.time() - started):.0f}행/초, 업데이트 {updated} / 변경 없음 {skipped})")
+        if batch:
+            conn.executemany(insert_sql, batch)
+            read += len(batch)
+            batch_skipped, batch_updated = apply_batch(conn, kind)
+            skipped += batch_skipped
+            updated += batch_updated
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+    elapsed = time.time() - started
+    print(f"✅ [{kind}] {read}건 처리: 업데이트 {updated} / 변경 없음 {skipped} / 대상 없음·중복 {read - updated - skipped}"
+          f" ({elapsed:.1f}초, {read / elapsed if elapsed else 0:.0f}행/초)")
+    return updated
+
+
+if __name__ == "__main__":
+    # 사용법: python crawl_loader.py menu|geo [디렉토리] [DB 경로]
+    if len(sys.argv) < 2 or sys.argv[1] not in LOADERS:
+        print(f"사용법: python crawl_loader.py {{{'|'.join(LOADERS)}}} [디렉토리] [DB 경로]")
+        sys.exit(1)
+    load_crawl_output(
+        sys.argv[1],
+        sys.argv[2] if len(sys.argv) > 2 else None,
+        sys.argv[3] if len(sys.argv) > 3 else DB_PATH,
+    )
@@ -0,0 +1,115 @@
+import pprint
+import sqlite3
+import time
+
+import chardet
+import pandas as pd
+
+from normalization import ADDRESS_BLOCK_COLUMN, NORMALIZED_NAME_COLUMN, address_block_series, normalize_series
+
+CSV_PATH = 'fulldata_07_24_04_P_일반음식점.csv'
+CHUNK_SIZE = 50_000
+
+# 나머지 컬럼은 모두 TEXT 로 읽는다 (청크마다 타입 추론이 달라지지 않게)
+INTEGER_COLUMNS = ("번호",)
+REAL_COLUMNS = ("도로명우편번호", "소재지면적")
+REAL_COLUMN_PREFIXES = ("좌표정보",)
+
+SQLITE_TYPES = {"Int64": "INTEGER", "float64": "REAL", "str": "TEXT"}
+
+
+def detect_encoding(file_path, sample_size=1024 * 1024):
+    with open(file_path, 'rb') as f:
+        sample = f.read(sample_size)
+    encoding = chardet.detect(sample)['encoding']
+    print(f"Detected encoding: {encoding}")
+    # 앞 1MB 만 보고 EUC-KR 로 판단해도 뒤쪽에 확장 완성형 글자가 있을 수 있어 상위 집합으로 읽는다
+    if encoding and encoding.lower().replace('-', '') == 'euckr':
+        return 'cp949'
+    return encoding
+
+
+def column_dtypes(columns):
+    dtypes = {}
+    for column in columns:
+        if column in INTEGER_COLUMNS:
+            dtypes[column] = "Int64"
+        elif column in REAL_COLUMNS or column.startswith(REAL_COLUMN_PREFIXES):
+            dtypes[column] = "float64"
+        else:
+            dtypes[column] = "str"
+    return dtypes
+
+
+def create_restaurants_table(conn, dtypes):
+    columns = [f'"{name}" {SQLITE_TYPES[dtype]}' for name, dtype in dtypes.items()]
+    columns += [f'"{NORMALIZED_NAME_COLUMN}" TEXT', f'"{ADDRESS_BLOCK_COLUMN}" TEXT', 'CRAWL INTEGER DEFAULT 0']
+    conn.execute("DROP TABLE IF EXISTS restaurants")
+    conn.execute(f"CREATE TABLE restaurants ({', '.join(columns)})")
+
+
+def prepare_chunk(chunk):
+    """폐업 제외 + 매칭용 정규화 키 추가 후 sqlite 에 바로 넣을 수 있게 결측값을 None 으로 바꾼다."""
+    if '영업상태명' in chunk.columns:
+        chunk = chunk[chunk['영업상태명'] != '폐업']
+    chunk = chunk.assign(**{
+        NORMALIZED_NAME_COLUMN: normalize_series(chunk['사업장명']),
+        ADDRESS_BLOCK_COLUMN: address_block_series(chunk['도로명전체주소']),
+    })
+    return chunk.astype(object).where(chunk.notna(), None)
+
+
+def ingest_restaurant_csv(file_path=CSV_PATH, db_path='food_data.db', chunksize=CHUNK_SIZE):
+    """
+    인허가 CSV 를 청크 단위로 읽어 restaurants 테이블을 새로 만든다.
+    파일 크기와 상관없이 메모리에는 청크 하나만 올라가고, 삽입은 한 트랜잭션으로 묶은 뒤
+    인덱스는 마지막에 한 번 만든다.
+    """
+    started = time.time()
+    encoding = detect_encoding(file_path)
+    header = pd.read_csv(file_path, encoding=encoding, nrows=0).columns
+    dtypes = column_dtypes(header)
+    if '영업상태명' in dtypes:
+        print("🛠️ '영업상태명' 컬럼을 기준으로 폐업 데이터 걸러내는 중...")
+    else:
+        print("⚠️ '영업상태명' 컬럼이 없습니다. 폐업 데이터 걸러내지 않습니다.")
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    # food_data.db 에는 crawl_queue / CRAWL 플래그도 있으므로 저널은 끄지 않는다.
+    # WAL + synchronous=NORMAL 이면 커밋마다 fsync 하지 않아도 비정상 종료 시 트랜잭션 단위로만 되돌아간다.
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-200000")
+
+    read_rows, stored_rows = 0, 0
+    conn.execute("BEGIN")
+    try:
+        create_restaurants_table(conn, dtypes)
+        column_names = ", ".join(f'"{name}"' for name in [*dtypes, NORMALIZED_NAME_COLUMN, ADDRESS_BLOCK_COLUMN])
+        qmarks = ", ".join("?" for _ in range(len(dtypes) + 2))
+        insert_sql = f"INSERT INTO restaurants ({column_names}) VALUES ({qmarks})"
+
+        reader = pd.read_csv(file_path, encoding=encoding, dtype=dtypes, chunksize=chunksize)
+        for chunk in reader:
+            if read_rows == 0:
+                pprint.pprint(chunk.head())
+            read_rows += len(chunk)
+            chunk = prepare_chunk(chunk)
+            conn.executemany(insert_sql, chunk.itertuples(index=False, name=None))
+            stored_rows += len(chunk)
+            print(f"📥 {read_rows}행 읽음 / {stored_rows}행 저장 ({read_rows / (time.time() - started):.0f}행/초)")
+
+        print("🧱 인덱스 생성 중...")
+        conn.execute("CREATE INDEX idx_restaurants_번호 ON restaurants(번호)")
+        conn.execute("CREATE INDEX idx_restaurants_crawl ON restaurants(CRAWL)")
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+    print(f"Total records: {read_rows} (폐업 제외 후 {stored_rows}건 저장)")
+    print(f"✅ restaurants 적재 완료 ({time.time() - started:.1f}초)")
+    return stored_rows
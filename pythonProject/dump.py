@@ -1,105 +1,376 @@
+import csv
+import hashlib
+import io
+import itertools
+import os
 import sqlite3
+import sys
+import time
+
 from psycopg2 import connect
-from psycopg2.extras import execute_values
 from tqdm import tqdm  # ✅ pip install tqdm
 
-# SQLite 연결
-sqlite_conn = sqlite3.connect('food_merged_final.db')
-sqlite_cursor = sqlite_conn.cursor()
-
-# PostgreSQL 연결
-pg_conn = connect(
-    dbname='foodpick',
-    user='foodpick',
-    password='foodpick123',
-    host='localhost',
-    port='5000'
+# 로컬 테스트용 PostGIS 컨테이너:
+#   docker run -d -p 5000:5432 -e POSTGRES_DB=foodpick -e POSTGRES_USER=foodpick \
+#       -e POSTGRES_PASSWORD=foodpick123 postgis/postgis:16-3.4
+#
+# 사용법: python dump.py [incremental|swap|full]
+#   incremental: row_hash 가 바뀐 행만 INSERT ... ON CONFLICT DO UPDATE (대상 테이블이 없으면 swap 으로 처음 적재)
+#   swap:        *_new 테이블에 전체 적재 후 짧은 트랜잭션에서 이름만 바꿔치기 (조회 중단 없음)
+#   full:        기존 테이블을 지우고 같은 트랜잭션에서 다시 적재 (적재 동안 조회가 잠긴다)
+DUMP_MODE = os.environ.get("DUMP_MODE", "incremental")
+SQLITE_PATH = os.environ.get("DUMP_SQLITE_PATH", "food_merged_final.db")
+PG_CONFIG = {
+    "dbname": os.environ.get("PG_DBNAME", "foodpick"),
+    "user": os.environ.get("PG_USER", "foodpick"),
+    "password": os.environ.get("PG_PASSWORD", "foodpick123"),
+    "host": os.environ.get("PG_HOST", "localhost"),
+    "port": os.environ.get("PG_PORT", "5000"),
+}
+FETCH_SIZE = 5000
+COPY_READ_SIZE = 1024 * 1024
+# COPY CSV 에서 NULL 로 읽히는 값 (따옴표 없는 \N). 빈 문자열("")과 구분된다.
+COPY_NULL = "\\N"
+
+# SQLite restaurant_merged → PostgreSQL restaurant_merged (ID 는 id 로 그대로 옮긴다)
+RESTAURANT_COLUMNS = (
+    "사업장명", "인허가일자", "영업상태명", "상세영업상태명",
+    "소재지전체주소", "도로명전체주소", "도로명우편번호", "최종수정시점", "데이터갱신일자",
+    "업태구분명", "네이버_상호명", "네이버_주소", "네이버_전화번호",
+    "네이버_URL", "네이버_PLACE_ID_URL", "네이버_place_info",
+    "네이버_tab_list", "menu", "LATITUDE", "LONGITUDE",
 )
-pg_conn.autocommit = True  # ✅ VACUUM용 필수 설정
-pg_cursor = pg_conn.cursor()
-
-# PostgreSQL 테이블 생성 (+ PostGIS geom 컬럼 포함)
-pg_cursor.execute("""
-    DROP TABLE IF EXISTS restaurant_merged;
-    CREATE TABLE restaurant_merged (
-        id SERIAL PRIMARY KEY,
-        사업장명 TEXT,
-        인허가일자 TEXT,
-        영업상태명 TEXT,
-        상세영업상태명 TEXT,
-        소재지전체주소 TEXT,
-        도로명전체주소 TEXT,
-        도로명우편번호 TEXT,
-        최종수정시점 TEXT,
-        데이터갱신일자 TEXT,
-        업태구분명 TEXT,
-        네이버_상호명 TEXT,
-        네이버_주소 TEXT,
-        네이버_전화번호 TEXT,
-        네이버_URL TEXT,
-        네이버_PLACE_ID_URL TEXT,
-        네이버_place_info TEXT,
-        네이버_tab_list TEXT,
-        menu TEXT,
-        LATITUDE TEXT,
-        LONGITUDE TEXT,
-        geom geometry(Point, 4326)
-    );
-""")
-pg_conn.commit()
-
-print("✅ PostgreSQL 테이블 생성 완료.")
-
-# SQLite → PostgreSQL 데이터 읽기
-sqlite_cursor.execute("SELECT * FROM restaurant_merged")
-rows = sqlite_cursor.fetchall()
-print(f"✅ SQLite에서 {len(rows)}건 데이터 조회 완료.")
-print("🚀 PostgreSQL에 데이터 이관 중...")
-
-# ✅ BATCH INSERT
-BATCH_SIZE = 1000
-for i in tqdm(range(0, len(rows), BATCH_SIZE)):
-    batch = rows[i:i + BATCH_SIZE]
-    values = []
-
-    for row in batch:
-        data = row[1:]  # ID 제외
-        lat = data[-2]
-        lon = data[-1]
-        try:
-            if lat and lon:
-                lat_f = float(lat)
-                lon_f = float(lon)
-                geom_wkt = f'SRID=4326;POINT({lon_f} {lat_f})'
-            else:
-                geom_wkt = None
-        except:
-            geom_wkt = None
-        values.append((*data, geom_wkt))
-
-    execute_values(pg_cursor, """
-        INSERT INTO restaurant_merged (
-            사업장명, 인허가일자, 영업상태명, 상세영업상태명,
-            소재지전체주소, 도로명전체주소, 도로명우편번호, 최종수정시점, 데이터갱신일자,
-            업태구분명, 네이버_상호명, 네이버_주소, 네이버_전화번호,
-            네이버_URL, 네이버_PLACE_ID_URL, 네이버_place_info,
-            네이버_tab_list, menu, LATITUDE, LONGITUDE,
-            geom
-        )
-        VALUES %s
-    """, values)
+MENU_ITEM_COLUMNS = ("id", "restaurant_id", "position", "name", "price", "price_won", "description")
+
+# 숫자로 읽히는 좌표만 geom 으로 만든다 (빈 값 / 깨진 값은 NULL)
+COORDINATE_PATTERN = r"^\s*-?[0-9]+(\.[0-9]+)?\s*$"
+
+
+def pg_connect():
+    conn = connect(**PG_CONFIG)
+    conn.set_client_encoding("UTF8")
+    return conn
+
+
+def create_restaurant_table(pg_cursor, table="restaurant_merged"):
+    # geom 은 LATITUDE / LONGITUDE 에서 계산되는 생성 컬럼 (파이썬에서 WKT 를 만들지 않는다)
+    pg_cursor.execute(f"""
+        CREATE TABLE {table} (
+            id SERIAL PRIMARY KEY,
+            사업장명 TEXT,
+            인허가일자 TEXT,
+            영업상태명 TEXT,
+            상세영업상태명 TEXT,
+            소재지전체주소 TEXT,
+            도로명전체주소 TEXT,
+            도로명우편번호 TEXT,
+            최종수정시점 TEXT,
+            데이터갱신일자 TEXT,
+            업태구분명 TEXT,
+            네이버_상호명 TEXT,
+            네이버_주소 TEXT,
+            네이버_전화번호 TEXT,
+            네이버_URL TEXT,
+            네이버_PLACE_ID_URL TEXT,
+            네이버_place_info TEXT,
+            네이버_tab_list TEXT,
+            menu TEXT,
+            LATITUDE TEXT,
+            LONGITUDE TEXT,
+            row_hash TEXT,
+            geom geometry(Point, 4326) GENERATED ALWAYS AS (
+                CASE WHEN LATITUDE ~ '{COORDINATE_PATTERN}' AND LONGITUDE ~ '{COORDINATE_PATTERN}'
+                     THEN ST_SetSRID(ST_MakePoint(LONGITUDE::double precision, LATITUDE::double precision), 4326)
+                END
+            ) STORED
+        );
+    """)
+
+
+def create_menu_item_table(pg_cursor, table="menu_item", restaurant_table="restaurant_merged"):
+    pg_cursor.execute(f"""
+        CREATE TABLE {table} (
+            id INTEGER PRIMARY KEY,
+            restaurant_id INTEGER NOT NULL REFERENCES {restaurant_table}(id) ON DELETE CASCADE,
+            position INTEGER,
+            name TEXT,
+            price TEXT,
+            price_won INTEGER,
+            description TEXT
+        );
+    """)
+
+
+def create_restaurant_indexes(pg_cursor, table="restaurant_merged"):
+    pg_cursor.execute(f"CREATE INDEX idx_{table}_geom ON {table} USING GIST (geom);")
+
+
+def create_menu_item_indexes(pg_cursor, table="menu_item"):
+    pg_cursor.execute(f"CREATE INDEX idx_{table}_restaurant ON {table} (restaurant_id);")
+    pg_cursor.execute(f"CREATE INDEX idx_{table}_price ON {table} (price_won, restaurant_id);")
+    pg_cursor.execute(f"""
+        CREATE INDEX idx_{table}_search ON {table}
+        USING GIN (to_tsvector('simple', COALESCE(name, '') || ' ' || COALESCE(description, '')));
+    """)
+
+
+def sqlite_select_restaurants(sqlite_conn, where_sql=""):
+    """restaurant_merged 를 PostgreSQL 컬럼 순서대로 읽는 커서. 아직 로더가 안 돌아 없는 컬럼은 NULL."""
+    existing = {col[1].upper() for col in sqlite_conn.execute("PRAGMA table_info(restaurant_merged)")}
+    selected = [col if col.upper() in existing else f"NULL AS {col}" for col in RESTAURANT_COLUMNS]
+    return sqlite_conn.execute(f"SELECT ID, {', '.join(selected)} FROM restaurant_merged {where_sql}")
+
+
+def sqlite_has_table(sqlite_conn, table):
+    return sqlite_conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone() is not None
+
+
+def row_hash(row):
+    """행 전체(id 포함) 내용 해시. 증분 동기화에서 바뀐 행을 고르는 데 쓴다."""
+    return hashlib.blake2b(repr(tuple(row)).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def with_row_hash(rows):
+    for row in rows:
+        yield (*row, row_hash(row))
+
+
+class CopyStream:
+    """
+    SQLite 커서(또는 행 이터레이터)를 COPY ... FROM STDIN (FORMAT csv) 입력으로 흘려보내는 파일 객체.
+    copy_expert 가 read(size) 를 부를 때마다 버퍼가 비었으면 fetch_size 행만 CSV 로 만든다.
+    """
+
+    def __init__(self, rows, progress=None, fetch_size=FETCH_SIZE):
+        self.rows_iter = iter(rows)
+        self.progress = progress
+        self.fetch_size = fetch_size
+        self.text = io.StringIO()
+        self.writer = csv.writer(self.text, lineterminator="\n")
+        self.buffer = b""
+        self.pos = 0
+        self.rows = 0
+
+    def _next_batch(self):
+        rows = list(itertools.islice(self.rows_iter, self.fetch_size))
+        self.text.seek(0)
+        self.text.truncate()
+        self.writer.writerows([COPY_NULL if value is None else value for value in row] for row in rows)
+        self.buffer = self.text.getvalue().encode("utf-8")
+        self.pos = 0
+        self.rows += len(rows)
+        if rows and self.progress is not None:
+            self.progress.update(len(rows))
+
+    def read(self, size=-1):
+        if self.pos >= len(self.buffer):
+            self._next_batch()
+        end = len(self.buffer) if size is None or size < 0 else self.pos + size
+        chunk = self.buffer[self.pos:end]
+        self.pos += len(chunk)
+        return chunk
+
+
+def copy_rows(pg_cursor, table, columns, rows, total=None, freeze=False):
+    """행 이터레이터를 그대로 COPY 로 흘려 넣고 넣은 행 수를 돌려준다."""
+    options = f"FORMAT csv, NULL '{COPY_NULL}'" + (", FREEZE" if freeze else "")
+    with tqdm(total=total, desc=table) as progress:
+        stream = CopyStream(rows, progress)
+        pg_cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH ({options})", stream, size=COPY_READ_SIZE)
+    return stream.rows
+
+
+def sqlite_select_menu_items(sqlite_conn, where_sql="WHERE restaurant_id IN (SELECT ID FROM restaurant_merged)"):
+    return sqlite_conn.execute(f"SELECT {', '.join(MENU_ITEM_COLUMNS)} FROM menu_item {where_sql}")
+
+
+def load_tables(sqlite_conn, pg_cursor, suffix=""):
+    """
+    restaurant_merged{suffix} / menu_item{suffix} 를 만들고 COPY(FREEZE) → 인덱스 → ANALYZE 까지 한다.
+    호출 측 트랜잭션 안에서 부른다 (FREEZE 는 같은 트랜잭션에서 만든 테이블에만 쓸 수 있다).
+    """
+    restaurant_table, menu_table = f"restaurant_merged{suffix}", f"menu_item{suffix}"
+    total = sqlite_conn.execute("SELECT COUNT(*) FROM restaurant_merged").fetchone()[0]
+    print(f"✅ SQLite restaurant_merged {total}건 → PostgreSQL {restaurant_table} COPY 시작")
+
+    pg_cursor.execute("CREATE EXTENSION IF NOT EXISTS postgis;")
+    pg_cursor.execute(f"DROP TABLE IF EXISTS {menu_table}; DROP TABLE IF EXISTS {restaurant_table};")
+    create_restaurant_table(pg_cursor, restaurant_table)
+    print("✅ PostgreSQL 테이블 생성 완료.")
+
+    # 같은 트랜잭션에서 만든 테이블이라 FREEZE 로 넣으면 적재 후 VACUUM 이 필요 없다
+    copied = copy_rows(pg_cursor, restaurant_table, ("id", *RESTAURANT_COLUMNS, "row_hash"),
+                       with_row_hash(sqlite_select_restaurants(sqlite_conn)), total, freeze=True)
+    pg_cursor.execute(f"SELECT setval(pg_get_serial_sequence('{restaurant_table}', 'id'), COALESCE(MAX(id), 1)) FROM {restaurant_table};")
+    create_restaurant_indexes(pg_cursor, restaurant_table)
+    print(f"🎉 전체 {copied}건 데이터 이관 및 공간좌표 추가 완료.")
+
+    # 메뉴 정규화 테이블 (menu_items.py 로 만든 SQLite menu_item). 증분 동기화에서도 쓰도록 비어 있어도 만든다.
+    create_menu_item_table(pg_cursor, menu_table, restaurant_table)
+    if sqlite_has_table(sqlite_conn, "menu_item"):
+        menu_count = copy_rows(pg_cursor, menu_table, MENU_ITEM_COLUMNS, sqlite_select_menu_items(sqlite_conn), freeze=True)
+        print(f"🍽️ menu_item {menu_count}건 이관 완료.")
+    else:
+        print("⚠️ SQLite 에 menu_item 테이블이 없습니다. (python menu_items.py 로 생성)")
+    create_menu_item_indexes(pg_cursor, menu_table)
+
+    # 🔧 통계 반영
+    pg_cursor.execute(f"ANALYZE {restaurant_table};")
+    pg_cursor.execute(f"ANALYZE {menu_table};")
+
+
+def full_dump(sqlite_conn, pg_conn):
+    """기존 테이블을 지우고 한 트랜잭션에서 다시 적재. 커밋 전까지 기존 테이블 조회가 잠긴다."""
+    started = time.time()
+    load_tables(sqlite_conn, pg_conn.cursor())
+    pg_conn.commit()
+    print(f"✅ 커밋 및 ANALYZE 완료 ({time.time() - started:.1f}초)")
+
+
+def rename_table(pg_cursor, old, new):
+    """테이블과 함께 제약조건 / 인덱스 / 시퀀스 이름의 old 부분도 new 로 바꾼다."""
+    pg_cursor.execute("SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass", (old,))
+    for (name,) in pg_cursor.fetchall():
+        if old in name:
+            pg_cursor.execute(f'ALTER TABLE {old} RENAME CONSTRAINT "{name}" TO "{name.replace(old, new)}";')
+    pg_cursor.execute("SELECT indexname FROM pg_indexes WHERE tablename = %s", (old,))
+    for (name,) in pg_cursor.fetchall():
+        if old in name:
+            pg_cursor.execute(f'ALTER INDEX "{name}" RENAME TO "{name.replace(old, new)}";')
+    pg_cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", (old,))
+    sequence = pg_cursor.fetchone()[0]
+    if sequence:
+        pg_cursor.execute(f"ALTER SEQUENCE {sequence} RENAME TO {new}_id_seq;")
+    pg_cursor.execute(f"ALTER TABLE {old} RENAME TO {new};")
+
+
+def swap_dump(sqlite_conn, pg_conn):
+    """*_new 테이블에 전체 적재한 뒤, 짧은 트랜잭션에서 기존 테이블을 지우고 이름을 바꾼다."""
+    started = time.time()
+    pg_cursor = pg_conn.cursor()
+    load_tables(sqlite_conn, pg_cursor, suffix="_new")
+    pg_conn.commit()
+    print(f"✅ 새 테이블 적재 완료 ({time.time() - started:.1f}초). 교체 중...")
+
+    # 여기서만 기존 테이블에 ACCESS EXCLUSIVE 잠금이 걸린다 (DROP + RENAME 뿐이라 금방 끝난다)
+    pg_cursor.execute("DROP TABLE IF EXISTS menu_item; DROP TABLE IF EXISTS restaurant_merged;")
+    rename_table(pg_cursor, "restaurant_merged_new", "restaurant_merged")
+    rename_table(pg_cursor, "menu_item_new", "menu_item")
+    pg_conn.commit()
+    print(f"🔁 테이블 교체 완료 (전체 {time.time() - started:.1f}초)")
+
+
+def pg_table_has_row_hash(pg_cursor):
+    pg_cursor.execute("""
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'restaurant_merged' AND column_name = 'row_hash'
+    """)
+    return pg_cursor.fetchone() is not None
+
+
+def incremental_sync(sqlite_conn, pg_conn):
+    """
+    SQLite 행 해시를 (id, row_hash) 만 임시 테이블로 COPY 하고, 저장된 row_hash 와의 비교는 PostgreSQL 안에서
+    조인으로 한다 (파이썬에 id → 해시 전체를 올리지 않는다). 바뀐 id 만 SQLite 임시 테이블로 받아
+    그 행만 다시 COPY 한 뒤 INSERT ... ON CONFLICT (id) DO UPDATE 로 반영한다.
+    SQLite 에서 사라진 id 는 지우고(메뉴는 CASCADE), 바뀐 가게의 menu_item 은 다시 넣는다.
+    (최종수정시점 은 네이버 / 메뉴 / 좌표 컬럼이 바뀌어도 그대로라 워터마크 대신 행 해시를 쓴다.)
+    """
+    started = time.time()
+    pg_cursor = pg_conn.cursor()
+    if not pg_table_has_row_hash(pg_cursor):
+        print("⚠️ 대상 테이블이 없거나 row_hash 컬럼이 없습니다. swap 모드로 전체 적재합니다.")
+        pg_conn.rollback()
+        swap_dump(sqlite_conn, pg_conn)
+        return
+
+    # 1) SQLite 전체 행의 (id, row_hash) 만 올린다
+    pg_cursor.execute("CREATE TEMP TABLE restaurant_hash_stage (id INTEGER PRIMARY KEY, row_hash TEXT) ON COMMIT DROP")
+    total = copy_rows(pg_cursor, "restaurant_hash_stage", ("id", "row_hash"),
+                      ((row[0], row_hash(row)) for row in sqlite_select_restaurants(sqlite_conn)))
+    pg_cursor.execute("ANALYZE restaurant_hash_stage")
+
+    # 2) 해시가 다르거나 새로 생긴 id 를 PostgreSQL 안에서 고른다
+    pg_cursor.execute("""
+        CREATE TEMP TABLE sync_changed ON COMMIT DROP AS
+        SELECT s.id FROM restaurant_hash_stage s
+        LEFT JOIN restaurant_merged r ON r.id = s.id
+        WHERE r.row_hash IS DISTINCT FROM s.row_hash
+    """)
+    changed = pg_cursor.rowcount
+    print(f"🔍 전체 {total}건 중 변경 {changed}건")
+
+    # 3) 바뀐 id 를 서버 측 커서로 나눠 받아 SQLite 임시 테이블에 넣고, 그 행만 COPY
+    sqlite_conn.execute("CREATE TEMP TABLE IF NOT EXISTS sync_ids (id INTEGER PRIMARY KEY)")
+    sqlite_conn.execute("DELETE FROM temp.sync_ids")
+    with pg_conn.cursor(name="changed_ids") as id_cursor:
+        id_cursor.itersize = FETCH_SIZE
+        id_cursor.execute("SELECT id FROM sync_changed")
+        sqlite_conn.executemany("INSERT INTO temp.sync_ids (id) VALUES (?)", id_cursor)
+
+    columns = ("id", *RESTAURANT_COLUMNS, "row_hash")
+    pg_cursor.execute(f"""
+        CREATE TEMP TABLE restaurant_stage ON COMMIT DROP AS
+        SELECT {', '.join(columns)} FROM restaurant_merged WITH NO DATA
+    """)
+    staged = copy_rows(pg_cursor, "restaurant_stage", columns, with_row_hash(
+        sqlite_select_restaurants(sqlite_conn, "WHERE ID IN (SELECT id FROM temp.sync_ids)")
+    ), changed)
+    updates = ", ".join(f"{col} = EXCLUDED.{col}" for col in columns[1:])
+    pg_cursor.execute(f"""
+        INSERT INTO restaurant_merged ({', '.join(columns)})
+        SELECT {', '.join(columns)} FROM restaurant_stage
+        ON CONFLICT (id) DO UPDATE SET {updates}
+    """)
+    upserted = pg_cursor.rowcount
+
+    pg_cursor.execute("""
+        DELETE FROM restaurant_merged r
+        WHERE NOT EXISTS (SELECT 1 FROM restaurant_hash_stage s WHERE s.id = r.id)
+    """)
+    removed = pg_cursor.rowcount
+
+    menu_count = 0
+    if changed and sqlite_has_table(sqlite_conn, "menu_item"):
+        pg_cursor.execute("DELETE FROM menu_item WHERE restaurant_id IN (SELECT id FROM sync_changed)")
+        pg_cursor.execute(f"""
+            CREATE TEMP TABLE menu_item_stage ON COMMIT DROP AS
+            SELECT {', '.join(MENU_ITEM_COLUMNS)} FROM menu_item WITH NO DATA
+        """)
+        copy_rows(pg_cursor, "menu_item_stage", MENU_ITEM_COLUMNS,
+                  sqlite_select_menu_items(sqlite_conn, "WHERE restaurant_id IN (SELECT id FROM temp.sync_ids)"))
+        menu_updates = ", ".join(f"{col} = EXCLUDED.{col}" for col in MENU_ITEM_COLUMNS[1:])
+        pg_cursor.execute(f"""
+            INSERT INTO menu_item ({', '.join(MENU_ITEM_COLUMNS)})
+            SELECT {', '.join(MENU_ITEM_COLUMNS)} FROM menu_item_stage
+            ON CONFLICT (id) DO UPDATE SET {menu_updates}
+        """)
+        menu_count = pg_cursor.rowcount
 
+    pg_cursor.execute("SELECT setval(pg_get_serial_sequence('restaurant_merged', 'id'), COALESCE(MAX(id), 1)) FROM restaurant_merged;")
     pg_conn.commit()
+    print(f"✅ 증분 동기화 완료: 변경 {staged}건 upsert {upserted} / 삭제 {removed} / 메뉴 {menu_count}건"
+          f" (전체 {total}건 중, {time.time() - started:.1f}초)")
 
-print(f"🎉 전체 {len(rows)}건 데이터 이관 및 공간좌표 추가 완료.")
 
-pg_cursor.execute("CREATE INDEX IF NOT EXISTS idx_geom ON restaurant_merged USING GIST (geom);")
+MODES = {"incremental": incremental_sync, "swap": swap_dump, "full": full_dump}
 
-# 🔧 최적화 실행
-pg_cursor.execute("VACUUM ANALYZE restaurant_merged;")
-print("✅ VACUUM ANALYZE 완료: 통계 최적화 반영됨")
 
+if __name__ == "__main__":
+    mode = sys.argv[1] if len(sys.argv) > 1 else DUMP_MODE
+    if mode not in MODES:
+        print(f"사용법: python dump.py [{'|'.join(MODES)}]")
+        sys.exit(1)
 
-# 연결 종료
-sqlite_conn.close()
-pg_conn.close()
+    sqlite_conn = sqlite3.connect(SQLITE_PATH)
+    pg_conn = pg_connect()
+    try:
+        MODES[mode](sqlite_conn, pg_conn)
+    except Exception:
+        pg_conn.rollback()
+        raise
+    finally:
+        sqlite_conn.close()
+        pg_conn.close()
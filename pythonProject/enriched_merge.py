@@ -0,0 +1,127 @@
+import json
+import sqlite3
+import time
+
+# restaurants 에서 그대로 가져오는 원본 컬럼 (restaurant_merged 컬럼 순서와 같다)
+SOURCE_COLUMNS = (
+    "사업장명", "인허가일자", "영업상태명", "상세영업상태명",
+    "소재지전체주소", "도로명전체주소", "도로명우편번호",
+    "최종수정시점", "데이터갱신일자", "업태구분명",
+)
+# 크롤링 결과에서 채우는 컬럼
+NAVER_COLUMNS = (
+    "네이버_상호명", "네이버_주소", "네이버_전화번호",
+    "네이버_URL", "네이버_PLACE_ID_URL",
+    "네이버_place_info", "네이버_tab_list",
+)
+
+
+def create_merged_table(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS restaurant_merged (
+        ID INTEGER PRIMARY KEY AUTOINCREMENT,
+        사업장명 TEXT,
+        인허가일자 TEXT,
+        영업상태명 TEXT,
+        상세영업상태명 TEXT,
+        소재지전체주소 TEXT,
+        도로명전체주소 TEXT,
+        도로명우편번호 REAL,
+        최종수정시점 TEXT,
+        데이터갱신일자 TEXT,
+        업태구분명 TEXT,
+        네이버_상호명 TEXT,
+        네이버_주소 TEXT,
+        네이버_전화번호 TEXT,
+        네이버_URL TEXT,
+        네이버_PLACE_ID_URL TEXT,
+        네이버_place_info TEXT,
+        네이버_tab_list TEXT,
+        MENU TEXT
+    )
+    """)
+
+
+def place_id_url(item):
+    # new-crawler.py 는 문자열 하나, main.py 는 후보 링크 리스트로 저장한다
+    links = item.get("unique_links", "")
+    if isinstance(links, list):
+        return links[0] if links else ""
+    return links or ""
+
+
+def stage_rows(enriched):
+    for item in enriched:
+        no = item.get("번호")
+        if no is None:
+            continue
+        place = item.get("place_info", {})
+        yield (
+            no,
+            place.get("title", ""),
+            place.get("주소", ""),
+            place.get("전화번호", ""),
+            item.get("url", ""),
+            place_id_url(item),
+            json.dumps(place, ensure_ascii=False),
+            json.dumps(item.get("tab_list", []), ensure_ascii=False),
+        )
+
+
+def merge_enriched(enriched, db_path='food_merged_final.db', source_db_path='food_data.db'):
+    """
+    매칭된 크롤링 결과(번호 포함)를 temp 테이블에 적재한 뒤, ATTACH 한 원본 DB 의 restaurants 와
+    INSERT ... SELECT ... JOIN 한 번으로 restaurant_merged 를 채운다.
+    enriched 는 이터러블이면 되고 파이썬 쪽에는 행을 모아 두지 않는다. 원본에 없는 번호는 JOIN 에서 빠진다.
+    (메모리가 일정하려면 입력도 .jsonl 이어야 한다. 예전 .json 배열은 iter_file_records 가 통째로 읽는다)
+    """
+    started = time.time()
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.execute("ATTACH DATABASE ? AS source", (source_db_path,))
+    try:
+        create_merged_table(conn)
+        conn.execute("CREATE INDEX IF NOT EXISTS source.idx_restaurants_번호 ON restaurants(번호)")
+        conn.execute("""
+        CREATE TEMP TABLE enriched_stage (
+            seq INTEGER PRIMARY KEY,
+            번호 INTEGER,
+            네이버_상호명 TEXT,
+            네이버_주소 TEXT,
+            네이버_전화번호 TEXT,
+            네이버_URL TEXT,
+            네이버_PLACE_ID_URL TEXT,
+            네이버_place_info TEXT,
+            네이버_tab_list TEXT
+        )
+        """)
+
+        conn.execute("BEGIN")
+        staged = conn.executemany(
+            f"INSERT INTO temp.enriched_stage (번호, {', '.join(NAVER_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            stage_rows(enriched),
+        ).rowcount
+        print(f"📥 매칭 결과 {staged}건 임시 테이블 적재")
+
+        target_columns = ", ".join(SOURCE_COLUMNS + NAVER_COLUMNS)
+        selected_columns = ", ".join(
+            [f"r.{col}" for col in SOURCE_COLUMNS] + [f"e.{col}" for col in NAVER_COLUMNS]
+        )
+        inserted = conn.execute(f"""
+        INSERT INTO restaurant_merged ({target_columns})
+        SELECT {selected_columns}
+        FROM temp.enriched_stage e
+        JOIN source.restaurants r ON r.번호 = e.번호
+        ORDER BY e.seq
+        """).rowcount
+        conn.execute("COMMIT")
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.execute("DROP TABLE IF EXISTS temp.enriched_stage")
+        conn.execute("DETACH DATABASE source")
+        conn.close()
+
+    print(f"✅ 최종 삽입 완료: {inserted}건 (원본에 없는 번호 {staged - inserted}건 제외, {time.time() - started:.1f}초)")
+    return inserted
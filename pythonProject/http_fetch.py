@@ -0,0 +1,81 @@
+import asyncio
+import os
+import time
+
+import aiohttp
+
+# 테스트 시 저장해 둔 HTML 을 내려주는 로컬 서버로 바꿔 끼울 수 있도록 환경변수로 받는다
+BASE_URL = os.environ.get("NAVER_PLACE_BASE_URL", "https://m.place.naver.com")
+# "http": HTML 을 먼저 HTTP 로 받아보고 APOLLO_STATE 가 없을 때만 브라우저 사용
+# "browser": 예전처럼 모든 페이지를 브라우저로 로딩
+FETCH_MODE = os.environ.get("FETCH_MODE", "http")
+
+APOLLO_MARKER = "window.__APOLLO_STATE__"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36"
+
+
+class ApolloHttpFetcher:
+    """
+    APOLLO_STATE 가 서버 렌더링 HTML 에 그대로 들어있는 페이지(/place/{id}/menu, searchByAddress 등)를
+    브라우저 없이 커넥션 풀을 공유하는 aiohttp 세션으로 받아온다.
+    """
+
+    def __init__(self, concurrency=8, timeout=10, retries=2, delay=1):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.delay = delay
+        self.session = None
+        self.stats = {"http": 0, "fallback": 0, "seconds": 0.0}
+
+    async def open(self):
+        connector = aiohttp.TCPConnector(limit=self.concurrency, ttl_dns_cache=300)
+        self.session = aiohttp.ClientSession(
+            base_url=BASE_URL,
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={"User-Agent": USER_AGENT, "Accept-Language": "ko-KR,ko;q=0.9"},
+        )
+        return self
+
+    async def close(self):
+        if self.session is None:
+            return
+        await self.session.close()
+        self.session = None
+        if self.stats["http"]:
+            avg_ms = self.stats["seconds"] / self.stats["http"] * 1000
+            print(f"🌐 HTTP 수집 {self.stats['http']}건 (평균 {avg_ms:.0f}ms) / 브라우저 대체 {self.stats['fallback']}건")
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def fetch(self, path):
+        """(status, html) 을 돌려준다. 네트워크 오류는 retries 만큼 재시도 후 (None, None)."""
+        for attempt in range(self.retries + 1):
+            try:
+                async with self.session.get(path) as response:
+                    return response.status, await response.text()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"⚠️ HTTP 요청 실패 {attempt+1}/{self.retries + 1}: {path} → {e}")
+                await asyncio.sleep(self.delay)
+        return None, None
+
+    async def fetch_apollo_html(self, path):
+        """
+        APOLLO_STATE 를 포함한 HTML 을 받으면 그대로 돌려주고,
+        상태코드가 200 이 아니거나 APOLLO_STATE 가 없으면 None (호출 측에서 브라우저로 대체).
+        """
+        started = time.perf_counter()
+        status, html = await self.fetch(path)
+        if status == 200 and html and APOLLO_MARKER in html:
+            self.stats["http"] += 1
+            self.stats["seconds"] += time.perf_counter() - started
+            return html
+
+        print(f"🟡 HTTP 응답에 APOLLO_STATE 없음 (status={status}) → 브라우저로 대체: {path}")
+        self.stats["fallback"] += 1
+        return None
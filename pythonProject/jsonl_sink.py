@@ -0,0 +1,101 @@
+import json
+import os
+
+
+class JsonlWriter:
+    """
+    크롤링 결과를 한 줄에 레코드 하나씩 이어 쓰는 JSONL 출력기.
+    기존 파일의 중복 키(title 등)는 시작할 때 한 번만 읽어 메모리에 올리고,
+    디스크 동기화(fsync)는 fsync_every 건마다 묶어서 한다.
+    """
+
+    def __init__(self, filepath, key="title", fsync_every=50):
+        self.filepath = filepath
+        self.key = key
+        self.fsync_every = fsync_every
+        self.seen = set()
+        self.pending = 0
+
+        if os.path.exists(filepath):
+            for entry in iter_file_records(filepath):
+                self.seen.add(entry.get(key))
+            print(f"📂 기존 출력 {len(self.seen)}건 키 인덱스 로드: {filepath}")
+
+        self.file = open(filepath, "a", encoding="utf-8")
+        # 비정상 종료로 마지막 줄이 끊겼다면 새 레코드가 그 줄에 붙지 않게 줄바꿈부터 넣는다
+        if self.file.tell() > 0:
+            with open(filepath, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    self.file.write("\n")
+
+    def append(self, data):
+        # 중복 방지 (key 기준)
+        value = data.get(self.key)
+        if value in self.seen:
+            print(f"⚠️ 중복으로 저장 건너뜀: {value}")
+            return False
+
+        self.file.write(json.dumps(data, ensure_ascii=False) + "\n")
+        self.seen.add(value)
+        self.pending += 1
+        if self.pending >= self.fsync_every:
+            self.sync()
+        print(f"📦 저장 완료: {value}")
+        return True
+
+    def sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending = 0
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.sync()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def iter_file_records(path):
+    """
+    .jsonl 은 한 줄씩 스트리밍으로 읽고, 예전 형식(.json 배열)은 통째로 읽어 레코드를 하나씩 돌려준다.
+    깨진 줄(쓰는 도중 종료된 마지막 줄 등)은 건너뛴다.
+    """
+    if path.endswith(".jsonl"):
+        with open(path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    print(f"❌ JSONL 파싱 실패: {path}:{line_no} → {e}")
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError as e:
+            print(f"❌ JSON 로드 실패: {path} → {e}")
+            return
+    yield from data
+
+
+def list_record_files(directory):
+    return sorted(
+        os.path.join(directory, f) for f in os.listdir(directory)
+        if f.endswith(".json") or f.endswith(".jsonl")
+    )
+
+
+def iter_dir_records(directory):
+    for path in list_record_files(directory):
+        print(f"🔍 처리 중: {os.path.basename(path)}")
+        yield from iter_file_records(path)
@@ -12,56 +12,26 @@ import pandas as pd
 import pprint
 import sqlite3
 import zendriver as zd
+from jsonl_sink import JsonlWriter
+from browser_pool import BrowserPool
+from page_check import classify_loaded_page, document_status_tracker, get_classified
+from browser_profile import launch_browser, profile_report
+from resource_blocking import install_resource_blocking
+from retry_policy import BROWSER, PARSE, PAGE_POLICY, SELECTOR_POLICY, PageLoadError, retry_report, start_record_budget
+from csv_ingest import ingest_restaurant_csv
 import urllib
 import re
 import os
 import sys
 
-headless = False
+# 요청 차단 로그 / 브라우저 프로필 디렉토리에서 이 크롤러를 가리키는 이름
+CRAWLER_NAME = "main"
 
 def store_first_db():
+    # 인허가 CSV 를 청크 단위로 스트리밍 적재 (폐업 제외, 정규화 키 / 인덱스 포함)
+    stored = ingest_restaurant_csv('fulldata_07_24_04_P_일반음식점.csv', 'food_data.db')
 
-    file_path = 'fulldata_07_24_04_P_일반음식점.csv'
-
-    with open(file_path, 'rb') as f:
-        sample = f.read(1024 * 1024)  # 1MB
-
-    # 샘플 데이터로 인코딩 감지
-    encoding_data = chardet.detect(sample)
-    detected_encoding = encoding_data['encoding']
-    print(f"Detected encoding: {detected_encoding}")
-
-    data = pd.read_csv(file_path, encoding=detected_encoding, low_memory=False)
-    pprint.pprint(data.head())
-    print("Data loaded successfully.")
-
-    # for column in data.columns:
-    #     unique_values = data[column].dropna().unique()
-    #     print(f"📌 컬럼: {column}")
-    #     print(f"   ▶ 고유값 {len(unique_values)}개")
-    #     print(f"   ▶ 샘플: {unique_values[:10]}")  # 처음 10개만 보여줌
-    #     print("-" * 50)
-
-    #check data length
-    print(f"Total records: {len(data)}")
-
-    # 폐업 제외
-    if '영업상태명' in data.columns:
-        print("🛠️ '영업상태명' 컬럼을 기준으로 폐업 데이터 걸러내는 중...")
-        data = data[data['영업상태명'] != '폐업']
-    else:
-        print("⚠️ '영업상태명' 컬럼이 없습니다. 폐업 데이터 걸러내지 않습니다.")
-
-    # SQLite 데이터베이스 연결
-    conn = sqlite3.connect('food_data.db')
-
-    # DataFrame을 SQLite 테이블로 저장
-    data.to_sql('restaurants', conn, if_exists='replace', index=False)
-
-    # 연결 끊기
-    conn.close()
-
-    print(f"✅ 폐업 제외 후 {len(data)}건 저장 완료! (DB: food_data.db, Table: restaurants)")
+    print(f"✅ 폐업 제외 후 {stored}건 저장 완료! (DB: food_data.db, Table: restaurants)")
 
 def load_10_restaurant_names_and_addresses():
     conn = sqlite3.connect('food_data.db')
@@ -95,39 +65,9 @@ def sanitize_filename(name):
     name = re.sub(r'[\\/*?:"<>|]', "", name).replace(" ", "_")
     return name[:100] if len(name) > 100 else name
 
-async def load_page_with_wait(browser, url):
-    page = await browser.get(url)
-
-    tmp_parser = BeautifulSoup(await page.get_content(), "lxml")
-    if any(err in tmp_parser.get_text().lower() for err in [
-        "500", "internal server error", "proxy error", "nginx", "html error", "bad gateway"
-    ]):
-        time.sleep(3)
-        raise Exception("❌ 페이지 로드 실패: 서버 오류")
-    await page.wait_for("div.place_business_list_wrapper", timeout=10)
-    return page
-
-
-async def load_page_with_wait02(browser, url):
-    page = await browser.get(url)
-    tmp_parser = BeautifulSoup(await page.get_content(), "lxml")
-    if any(err in tmp_parser.get_text().lower() for err in [
-        "500", "internal server error", "proxy error", "nginx", "html error", "bad gateway"
-    ]):
-        time.sleep(3)
-        raise Exception("❌ 페이지 로드 실패: 서버 오류")
-    await page.wait_for("div.place_fixed_maintab", timeout=10)
-    return page
-
-
-async def with_retry(func, retries=5, delay=1):
-    for attempt in range(retries):
-        try:
-            return await func()
-        except Exception as e:
-            print(f"⚠️ 재시도 {attempt+1}/{retries} 실패: {e}")
-            await asyncio.sleep(delay)
-    raise Exception("❌ 모든 재시도 실패")
+async def with_retry(func):
+    # 셀렉터 대기용: 여기서의 타임아웃은 '요소 없음'(parse) 으로 보고 짧게만 다시 시도한다
+    return await SELECTOR_POLICY.run(func, timeout_as=PARSE)
 
 
 async def wait_for_selector_with_retry(page, selector, timeout=10, interval=1):
@@ -175,28 +115,6 @@ def extract_dynamic_place_info(soup: BeautifulSoup):
             place_info[key] = value_block.get_text(strip=True)
     return place_info
 
-def append_to_json_file(data, filepath):
-    # 파일이 있으면 기존 데이터 로드
-    if os.path.exists(filepath):
-        with open(filepath, "r", encoding="utf-8") as f:
-            try:
-                existing = json.load(f)
-            except json.JSONDecodeError:
-                existing = []
-    else:
-        existing = []
-
-    # 중복 방지 (title 기준)
-    titles = {entry.get("title") for entry in existing}
-    if data.get("title") not in titles:
-        existing.append(data)
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(existing, f, ensure_ascii=False, indent=2)
-        print(f"📦 저장 완료: {data['title']}")
-    else:
-        print(f"⚠️ 중복으로 저장 건너뜀: {data['title']}")
-
-
 def log_error_json(error_info, filepath):
     error_info["timestamp"] = time.strftime("%Y-%m-%d %H:%M:%S")
     with open(filepath, "a", encoding="utf-8") as f:
@@ -204,39 +122,37 @@ def log_error_json(error_info, filepath):
     print(f"❌ 오류 기록 완료: {error_info['title'] if 'title' in error_info else '알 수 없는 오류'}")
 
 
-async def with_browser_retry(browser_ref, executable, browser_args, coro_fn, retries=5, delay=2):
-    for attempt in range(retries):
-        try:
-            result = await coro_fn(browser_ref[0])
-            html = await result.get_content()
-            soup = BeautifulSoup(html, "lxml")
-            page_text = soup.get_text().lower()
-            for err in [
-                "500", "internal server error", "proxy error", "nginx",
-                "sigkill", "sigtrap", "aw snap", "페이지를 표시하는 도중 문제"
-            ]:
-                if err in page_text:
-                    print(f"❌ 페이지 로드 실패: 에러 탐지됨 → '{err}'")
-                    raise Exception(f"🛑 HTML 내 에러 페이지 탐지됨: '{err}'")
-            return result
-        except Exception as e:
-            print(f"⚠️ 브라우저 작업 실패 {attempt+1}/{retries}: {e}")
-            try:
-                await browser_ref[0].stop()
-            except:
-                pass
-            print("🔄 브라우저 재시작 중...")
-            browser_ref = [await start_browser(executable)]
-            await asyncio.sleep(delay)
-    raise Exception("❌ 브라우저 재시도 모두 실패")
+def recover_on_browser_fault(browser_ref, pool):
+    """
+    RetryPolicy 의 on_failure. 에러 페이지 / 타임아웃은 같은 브라우저로 백오프 후 다시 시도하고,
+    브라우저 장애로 분류됐거나 헬스체크에 실패할 때만 풀에서 교체한다.
+    """
+    async def on_failure(error_class, error):
+        if error_class == BROWSER or not await pool.is_healthy(browser_ref[0]):
+            # 호출한 쪽의 browser_ref 도 같이 바뀌도록 리스트 안의 값을 교체한다
+            browser_ref[0] = await pool.recover(browser_ref[0])
+    return on_failure
+
+
+async def with_browser_retry(browser_ref, pool, coro_fn, policy=PAGE_POLICY):
+    async def attempt():
+        tracker = await document_status_tracker(browser_ref[0].main_tab)
+        tracker.reset()
+        result = await coro_fn(browser_ref[0])
+        reason, _ = await classify_loaded_page(result, tracker)
+        if reason:
+            print(f"❌ 페이지 로드 실패: 에러 탐지됨 → {reason}")
+            raise PageLoadError(reason)
+        return result
+
+    return await policy.run(attempt, on_failure=recover_on_browser_fault(browser_ref, pool))
 
 
 async def start_browser(executable):
-    return await zd.start(
-        headless=headless,
-        browser_executable_path=executable,
-        browser_args=browser_args
-    )
+    # headless / 실행 인자 / 프로필 디렉토리는 browser_profile 의 공통 설정(BROWSER_PROFILE)을 따른다
+    browser = await launch_browser(CRAWLER_NAME, executable)
+    await install_resource_blocking(browser.main_tab, CRAWLER_NAME)
+    return browser
 
 async def wait_for_browser_ready(port, timeout=10):
     import socket
@@ -249,28 +165,15 @@ async def wait_for_browser_ready(port, timeout=10):
     raise Exception(f"🚫 브라우저 포트 {port} 연결 실패")
 
 
-async def with_browser_get(url, browser_ref, executable, retries=5, delay=2):
-    for attempt in range(retries):
-        try:
-            print(f"📡 시도 {attempt+1}/{retries}: {url}")
-            page = await browser_ref[0].get(url)
-            html = await page.get_content()
-            soup = BeautifulSoup(html, "lxml")
-            if any(err in soup.get_text().lower() for err in [
-                "500", "internal server error", "proxy error", "nginx", "html error", "bad gateway"
-            ]):
-                raise Exception("🛑 HTML 내 에러 페이지 탐지됨")
-            return page
-        except Exception as e:
-            print(f"⚠️ 브라우저 작업 실패 {attempt+1}/{retries}: {e}")
-            print("🔄 브라우저 재시작 중...")
-            try:
-                await browser_ref[0].stop()
-            except:
-                pass
-            browser_ref[0] = await start_browser(executable)
-            await asyncio.sleep(delay)
-    raise Exception("❌ 브라우저 재시도 모두 실패")
+async def with_browser_get(url, browser_ref, pool, policy=PAGE_POLICY):
+    async def attempt():
+        print(f"📡 요청: {url}")
+        page, reason = await get_classified(browser_ref[0].main_tab, url)
+        if reason:
+            raise PageLoadError(reason)
+        return page
+
+    return await policy.run(attempt, on_failure=recover_on_browser_fault(browser_ref, pool))
 
 async def crawler():
     restaurant_infos = load_10_restaurant_names_and_addresses()
@@ -296,21 +199,24 @@ async def crawler():
         elif os.path.exists("/usr/bin/chromium"):
             executable = "/usr/bin/chromium"
 
+    pool = BrowserPool(lambda: start_browser(executable))
     try:
-        browser_ref = [await start_browser(executable)]
+        await pool.start()
+        browser_ref = [await pool.acquire()]
 
         print("✅ Zendriver 시작 완료.")
         success, fail, need_check = 0, 0, 0
 
         for index, (id, business_name, road_address) in enumerate(restaurant_infos):
             try:
+                start_record_budget()
                 search_query = make_search_query(business_name, road_address)
                 encoded_query = urllib.parse.quote(search_query)
                 mob_url = f"https://m.place.naver.com/restaurant/list?query={encoded_query}&x=126&y=37"
                 print(f"🔗 [{index+1}] {search_query}")
                 print(f"🔗 [{index+1}] {search_query} URL: {mob_url}")
 
-                page = await with_browser_get(mob_url, browser_ref, executable, retries=5, delay=3)
+                page = await with_browser_get(mob_url, browser_ref, pool)
                 await with_retry(lambda: page.wait_for("div.place_business_list_wrapper", timeout=10))
                 soup = BeautifulSoup(await page.get_content(), "lxml")
                 if soup.select("div[class='FYvSc']") or "조건에 맞는 업체가 없습니다" in soup.get_text():
@@ -365,8 +271,8 @@ async def crawler():
 
                 #await with_retry(lambda: page.get(f"https://m.place.naver.com{valid_links[0]}"))
 
-                await with_browser_retry(
-                    browser_ref, executable, browser_args,
+                page = await with_browser_retry(
+                    browser_ref, pool,
                     lambda b: b.get(f"https://m.place.naver.com{valid_links[0]}")
                 )
                 print(f"🔗 [{index+1}] {search_query} {valid_links[0]} 로딩 완료")
@@ -399,15 +305,11 @@ async def crawler():
                     "url": mob_url
                 }
 
-                append_to_json_file(data, output_path)
+                output_sink.append(data)
                 success += 1
 
-                if (index + 1) % 10 == 0:
-                    await page.close()
-                    await browser_ref[0].stop()
-                    print("🔄 메모리 유출 방지 브라우저 재시작 중...")
-                    browser_ref = [await start_browser(executable)]
-                    print("✅ 메모리 유출 방지 브라우저 재시작 완료.")
+                # 고정 주기 재시작 대신 RSS / 탭 수가 한도를 넘을 때만 교체
+                browser_ref[0] = await pool.maybe_recycle(browser_ref[0])
 
             except Exception as e:
                 print(f"❌ 오류: {e}")
@@ -427,7 +329,10 @@ async def crawler():
         print(f"\n✅ 완료: {success} / ❌ 실패: {fail} / ⚠️ 확인 필요: {need_check}")
 
     finally:
-        await browser_ref[0].stop()
+        output_sink.close()
+        await pool.close()
+        profile_report()
+        retry_report()
         print("🛑 Zendriver 종료 완료")
 
 
@@ -456,20 +361,7 @@ if __name__ == "__main__":
     print("📂 ErrorLog 저장 경로:", ERROR_DIR)
 
     start_index = int(os.environ.get("START_INDEX", sys.argv[1] if len(sys.argv) > 1 else 0))
-    output_path = os.path.join(DATA_DIR, f"output_{start_index}.json")
-
-    browser_args = [
-        "--no-sandbox",
-        "--disable-dev-shm-usage",
-        "--disable-setuid-sandbox",
-        "--disable-software-rasterizer",
-        "--disable-blink-features=AutomationControlled",
-        "--window-size=1280x800",  # 반드시 사이즈 지정
-        "--disable-infobars",
-        "--disable-extensions",
-        "--disable-popup-blocking",
-        "--enable-logging=stderr",
-        "--log-level=1",
-    ]
+    output_path = os.path.join(DATA_DIR, f"output_{start_index}.jsonl")
+    output_sink = JsonlWriter(output_path)
 
     asyncio.run(crawler())
\ No newline at end of file
@@ -0,0 +1,188 @@
+import re
+import sqlite3
+import sys
+import time
+
+DB_PATH = "food_merged_final.db"
+
+# 금액 하나: "30,000" / "1.5만" / "1만 5천" 처럼 숫자(+만/천) 조각이 이어진 것
+_AMOUNT = r"(?:\d[\d,]*(?:\.\d+)?\s*[만천]\s*)*\d[\d,]*(?:\.\d+)?\s*[만천]?"
+# "2인 30,000원" 처럼 앞에 다른 숫자가 있어도 '원' 바로 앞의 금액을 읽는다.
+# 범위("10,000~15,000원")는 앞 금액, '원' 이 없으면("10,000~15,000") 첫 금액. "변동", "시가" 는 None.
+_WON_PRICE = re.compile(f"({_AMOUNT})\\s*(?:[~-]\\s*{_AMOUNT}\\s*)?원")
+_PRICE = re.compile(f"({_AMOUNT})")
+_PRICE_PART = re.compile(r"(\d[\d,]*(?:\.\d+)?)\s*([만천]?)")
+_UNITS = {"만": 10000, "천": 1000, "": 1}
+
+# trigram 토크나이저(SQLite 3.34+)는 띄어쓰기 없는 한글 메뉴명도 부분 일치로 찾는다 (3글자 이상 검색어).
+FTS_TOKENIZE = "trigram" if sqlite3.sqlite_version_info >= (3, 34, 0) else "unicode61"
+
+
+def parse_price_won(price):
+    if price is None:
+        return None
+    if isinstance(price, (int, float)):
+        return int(price)
+    match = _WON_PRICE.search(price) or _PRICE.search(price)
+    if not match:
+        return None
+    # "1만 5천" 은 조각마다 단위를 곱해 더한다
+    amount = sum(
+        float(number.replace(",", "")) * _UNITS[unit]
+        for number, unit in _PRICE_PART.findall(match.group(1))
+    )
+    return int(amount)
+
+
+MENU_ITEM_FIELDS = ("restaurant_id", "position", "name", "price", "price_won", "description")
+
+
+def create_menu_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS menu_item (
+            id INTEGER PRIMARY KEY,
+            restaurant_id INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            name TEXT,
+            price TEXT,
+            price_won INTEGER,
+            description TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_menu_item_restaurant ON menu_item(restaurant_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_menu_item_price ON menu_item(price_won, restaurant_id)")
+    # 메뉴 행 id 는 (가게, 메뉴명) 기준으로 유지한다 (FTS rowid / dump.py 증분 동기화가 id 로 맞춘다)
+    has_key = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_menu_item_name'"
+    ).fetchone()
+    if not has_key:
+        # 예전 테이블에 같은 가게 / 같은 메뉴명 행이 여러 개면 첫 행만 남긴다
+        removed = conn.execute("""
+            DELETE FROM menu_item WHERE id NOT IN (SELECT MIN(id) FROM menu_item GROUP BY restaurant_id, name)
+        """).rowcount
+        if removed:
+            print(f"🧹 중복 메뉴 행 {removed}건 정리")
+        conn.execute("CREATE UNIQUE INDEX idx_menu_item_name ON menu_item(restaurant_id, name)")
+
+
+def create_menu_fts(conn):
+    """menu_item 을 content 로 쓰는 FTS5 인덱스 + 동기화 트리거. FTS5 가 없는 빌드면 False."""
+    try:
+        conn.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS menu_item_fts USING fts5(
+                name, description, content='menu_item', content_rowid='id', tokenize='{FTS_TOKENIZE}'
+            )
+        """)
+    except sqlite3.OperationalError as e:
+        print(f"⚠️ FTS5 를 사용할 수 없어 메뉴 검색 인덱스를 만들지 않습니다: {e}")
+        return False
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS menu_item_fts_insert AFTER INSERT ON menu_item BEGIN
+            INSERT INTO menu_item_fts (rowid, name, description) VALUES (new.id, new.name, new.description);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS menu_item_fts_delete AFTER DELETE ON menu_item BEGIN
+            INSERT INTO menu_item_fts (menu_item_fts, rowid, name, description)
+            VALUES ('delete', old.id, old.name, old.description);
+        END
+    """)
+    # upsert 로 설명이 바뀐 행은 같은 rowid 로 지웠다가 다시 넣는다
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS menu_item_fts_update AFTER UPDATE OF name, description ON menu_item BEGIN
+            INSERT INTO menu_item_fts (menu_item_fts, rowid, name, description)
+            VALUES ('delete', old.id, old.name, old.description);
+            INSERT INTO menu_item_fts (rowid, name, description) VALUES (new.id, new.name, new.description);
+        END
+    """)
+    return True
+
+
+def ensure_menu_schema(conn):
+    conn.create_function("parse_price_won", 1, parse_price_won, deterministic=True)
+    existed = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'menu_item'").fetchone()
+    create_menu_table(conn)
+    create_menu_fts(conn)
+    if not existed:
+        # 이미 MENU 가 채워진 DB 면 처음 한 번 기존 데이터로 채운다 (해시가 같아 건너뛰는 행도 메뉴 행은 생기도록)
+        backfilled = upsert_menu_items(conn, "r.MENU IS NOT NULL")
+        if backfilled:
+            print(f"🧱 기존 MENU 에서 menu_item {backfilled}건 생성")
+
+
+def upsert_menu_items(conn, where_sql="1"):
+    """
+    restaurant_merged.MENU(JSON) 를 json_each 로 풀어 menu_item 에 반영한다. where_sql 은 r(restaurant_merged) 기준 조건.
+    (가게, 메뉴명) 이 같은 행은 id 를 그대로 두고 바뀐 값만 UPDATE, 메뉴에서 빠진 행은 지운다.
+    메뉴명이 없는 항목은 건너뛰고, 한 가게에 같은 메뉴명이 여러 번 나오면 마지막 항목 값이 남는다.
+    반영(추가 / 변경)된 행 수를 돌려준다.
+    """
+    conn.execute(f"""
+        CREATE TEMP TABLE IF NOT EXISTS menu_stage AS SELECT {', '.join(MENU_ITEM_FIELDS)} FROM menu_item WHERE 0
+    """)
+    conn.execute("DELETE FROM temp.menu_stage")
+    conn.execute(f"""
+        INSERT INTO temp.menu_stage ({', '.join(MENU_ITEM_FIELDS)})
+        SELECT r.ID, j.key,
+               json_extract(j.value, '$.name'),
+               json_extract(j.value, '$.price'),
+               parse_price_won(json_extract(j.value, '$.price')),
+               json_extract(j.value, '$.description')
+        FROM restaurant_merged r,
+             json_each(CASE WHEN json_valid(r.MENU) THEN r.MENU ELSE '[]' END) j
+        WHERE {where_sql} AND json_type(j.value) = 'object' AND json_extract(j.value, '$.name') IS NOT NULL
+    """)
+    conn.execute(f"""
+        DELETE FROM menu_item
+        WHERE restaurant_id IN (SELECT r.ID FROM restaurant_merged r WHERE {where_sql})
+          AND (name IS NULL OR (restaurant_id, name) NOT IN (SELECT restaurant_id, name FROM temp.menu_stage))
+    """)
+    changed = ", ".join(f"{col} = excluded.{col}" for col in MENU_ITEM_FIELDS[1:])
+    differs = " OR ".join(f"menu_item.{col} IS NOT excluded.{col}" for col in MENU_ITEM_FIELDS[1:])
+    # WHERE true: INSERT ... SELECT 뒤의 ON CONFLICT 가 조인 구문으로 읽히지 않도록
+    return conn.execute(f"""
+        INSERT INTO menu_item ({', '.join(MENU_ITEM_FIELDS)})
+        SELECT {', '.join(MENU_ITEM_FIELDS)} FROM temp.menu_stage WHERE true ORDER BY restaurant_id, position
+        ON CONFLICT (restaurant_id, name) DO UPDATE SET {changed} WHERE {differs}
+    """).rowcount
+
+
+def refresh_menu_items(conn):
+    """crawl_loader 배치 훅: 방금 MENU 가 바뀐 가게(temp.load_stage)의 메뉴 행만 다시 맞춘다."""
+    return upsert_menu_items(conn, "r.ID IN (SELECT id FROM temp.load_stage)")
+
+
+def rebuild_menu_items(db_path=DB_PATH):
+    """
+    restaurant_merged.MENU 전체를 menu_item 에 다시 반영하고 FTS 인덱스를 다시 만든다.
+    기존 행 id 는 (가게, 메뉴명) 기준으로 유지되므로 FTS rowid / PostgreSQL 쪽 id 가 밀리지 않는다.
+    """
+    started = time.time()
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.create_function("parse_price_won", 1, parse_price_won, deterministic=True)
+    conn.execute("BEGIN")
+    try:
+        create_menu_table(conn)
+        has_fts = create_menu_fts(conn)
+        upserted = upsert_menu_items(conn)
+        # 더 이상 restaurant_merged 에 없는 가게의 메뉴
+        orphans = conn.execute(
+            "DELETE FROM menu_item WHERE restaurant_id NOT IN (SELECT ID FROM restaurant_merged)"
+        ).rowcount
+        if has_fts:
+            conn.execute("INSERT INTO menu_item_fts (menu_item_fts) VALUES ('rebuild')")
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    print(f"✅ menu_item {upserted}건 추가/변경, 없어진 가게 메뉴 {orphans}건 삭제 ({time.time() - started:.1f}초)")
+    # dump.py incremental 은 restaurant_merged 행 해시가 바뀐 가게의 메뉴만 다시 보낸다
+    print("ℹ️ 가격 파싱 규칙만 바뀐 경우 PostgreSQL 반영은 dump.py swap 으로 전체 적재하세요.")
+    return upserted
+
+
+if __name__ == "__main__":
+    # 사용법: python menu_items.py [DB 경로]  (기존 MENU 컬럼에서 menu_item 을 다시 만든다)
+    rebuild_menu_items(sys.argv[1] if len(sys.argv) > 1 else DB_PATH)
@@ -1,96 +1,41 @@
 import asyncio
 import json
-import random
 import time
-from asyncio import wait_for
-from multiprocessing.managers import PoolProxy
-from re import search
-from time import sleep
-import lxml
 import platform
 from bs4 import BeautifulSoup
-import chardet
-import pandas as pd
-import pprint
-import sqlite3
-import zendriver as zd
-import urllib
+from jsonl_sink import JsonlWriter
+from work_queue import CrawlQueue
+from browser_pool import BrowserPool, SharedBrowser
+from page_check import get_classified
+from browser_profile import launch_browser, profile_report
+from resource_blocking import install_resource_blocking
+from retry_policy import BROWSER, PARSE, PAGE_POLICY, SELECTOR_POLICY, PageLoadError, retry_report, start_record_budget
+from apollo_state import extract_apollo_state
+from http_fetch import ApolloHttpFetcher, BASE_URL, FETCH_MODE
+from normalization import normalize, normalize_address_for_comparison
+from csv_ingest import ingest_restaurant_csv
+import urllib.parse
 import re
-from re import search, sub, compile as re_compile # compile 추가
 import os
 import sys
 
-headless = False
+# 요청 차단 로그 / 브라우저 프로필 디렉토리에서 이 크롤러를 가리키는 이름
+CRAWLER_NAME = "new-crawler"
+# 하나의 브라우저 안에서 동시에 돌릴 탭(워커) 수
+TAB_COUNT = int(os.environ.get("CRAWL_TAB_COUNT", min(4, os.cpu_count() or 1)))
+# 워커 탭 하나가 이 건수만큼 처리하면 탭을 새로 연다 (메모리 유출 방지)
+TAB_RECYCLE_INTERVAL = 10
 
-def store_first_db():
-
-    file_path = 'fulldata_07_24_04_P_일반음식점.csv'
-
-    with open(file_path, 'rb') as f:
-        sample = f.read(1024 * 1024)  # 1MB
-
-    # 샘플 데이터로 인코딩 감지
-    encoding_data = chardet.detect(sample)
-    detected_encoding = encoding_data['encoding']
-    print(f"Detected encoding: {detected_encoding}")
-
-    data = pd.read_csv(file_path, encoding=detected_encoding, low_memory=False)
-    pprint.pprint(data.head())
-    print("Data loaded successfully.")
-
-    # for column in data.columns:
-    #     unique_values = data[column].dropna().unique()
-    #     print(f"📌 컬럼: {column}")
-    #     print(f"   ▶ 고유값 {len(unique_values)}개")
-    #     print(f"   ▶ 샘플: {unique_values[:10]}")  # 처음 10개만 보여줌
-    #     print("-" * 50)
-
-    #check data length
-    print(f"Total records: {len(data)}")
-
-    # 폐업 제외
-    if '영업상태명' in data.columns:
-        print("🛠️ '영업상태명' 컬럼을 기준으로 폐업 데이터 걸러내는 중...")
-        data = data[data['영업상태명'] != '폐업']
-    else:
-        print("⚠️ '영업상태명' 컬럼이 없습니다. 폐업 데이터 걸러내지 않습니다.")
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SCREENSHOT_DIR = os.path.join(BASE_DIR, "screenshots")
+DATA_DIR = os.path.join(BASE_DIR, "web_data")
+ERROR_DIR = os.path.join(BASE_DIR, "error_logs")
 
-    # SQLite 데이터베이스 연결
-    conn = sqlite3.connect('food_data.db')
-
-    # DataFrame을 SQLite 테이블로 저장
-    data.to_sql('restaurants', conn, if_exists='replace', index=False)
-
-    # 연결 끊기
-    conn.close()
-
-    print(f"✅ 폐업 제외 후 {len(data)}건 저장 완료! (DB: food_data.db, Table: restaurants)")
-
-def load_10_restaurant_names_and_addresses():
-    conn = sqlite3.connect('food_data.db')
-    cursor = conn.cursor()
-    cursor.execute("SELECT 번호, 사업장명, 도로명전체주소 FROM restaurants where CRAWL = 0 LIMIT 200;")
-    rows = cursor.fetchall()
-
-    conn.close()
-
-    restaurant_infos = []
-    for row in rows:
-        id, business_name, road_address = row
-        if id and business_name and road_address:
-            restaurant_infos.append((id, business_name, road_address))
-    return restaurant_infos
+def store_first_db():
+    # 인허가 CSV 를 청크 단위로 스트리밍 적재 (폐업 제외, 정규화 키 / 인덱스 포함)
+    stored = ingest_restaurant_csv('fulldata_07_24_04_P_일반음식점.csv', 'food_data.db')
 
-def load_restaurant_subset(start, end):
-    conn = sqlite3.connect("/app/food_data.db")
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT 번호, 사업장명, 도로명전체주소 FROM restaurants LIMIT ? OFFSET ?",
-        (end - start, start),
-    )
-    rows = cursor.fetchall()
-    conn.close()
-    return [(id, name, addr) for id, name, addr in rows if name and addr]
+    print(f"✅ 폐업 제외 후 {stored}건 저장 완료! (DB: food_data.db, Table: restaurants)")
 
 def make_search_query(business_name, road_address):
     # 도로명 주소 앞 3단계까지만
@@ -108,39 +53,9 @@ def sanitize_filename(name):
     name = re.sub(r'[\\/*?:"<>|]', "", name).replace(" ", "_")
     return name[:100] if len(name) > 100 else name
 
-async def load_page_with_wait(browser, url):
-    page = await browser.get(url)
-
-    tmp_parser = BeautifulSoup(await page.get_content(), "lxml")
-    if any(err in tmp_parser.get_text().lower() for err in [
-        "500", "internal server error", "proxy error", "nginx", "html error", "bad gateway"
-    ]):
-        time.sleep(3)
-        raise Exception("❌ 페이지 로드 실패: 서버 오류")
-    await page.wait_for("div.place_business_list_wrapper", timeout=10)
-    return page
-
-
-async def load_page_with_wait02(browser, url):
-    page = await browser.get(url)
-    tmp_parser = BeautifulSoup(await page.get_content(), "lxml")
-    if any(err in tmp_parser.get_text().lower() for err in [
-        "500", "internal server error", "proxy error", "nginx", "html error", "bad gateway"
-    ]):
-        time.sleep(3)
-        raise Exception("❌ 페이지 로드 실패: 서버 오류")
-    await page.wait_for("div.place_fixed_maintab", timeout=10)
-    return page
-
-
-async def with_retry(func, retries=30, delay=1):
-    for attempt in range(retries):
-        try:
-            return await func()
-        except Exception as e:
-            print(f"⚠️ 재시도 {attempt+1}/{retries} 실패: {e}")
-            await asyncio.sleep(delay)
-    raise Exception("❌ 모든 재시도 실패")
+async def with_retry(func):
+    # 셀렉터 대기용: 여기서의 타임아웃은 '요소 없음'(parse) 으로 보고 짧게만 다시 시도한다
+    return await SELECTOR_POLICY.run(func, timeout_as=PARSE)
 
 
 async def wait_for_selector_with_retry(page, selector, timeout=10, interval=1):
@@ -188,28 +103,6 @@ def extract_dynamic_place_info(soup: BeautifulSoup):
             place_info[key] = value_block.get_text(strip=True)
     return place_info
 
-def append_to_json_file(data, filepath):
-    # 파일이 있으면 기존 데이터 로드
-    if os.path.exists(filepath):
-        with open(filepath, "r", encoding="utf-8") as f:
-            try:
-                existing = json.load(f)
-            except json.JSONDecodeError:
-                existing = []
-    else:
-        existing = []
-
-    # 중복 방지 (title 기준)
-    titles = {entry.get("title") for entry in existing}
-    if data.get("title") not in titles:
-        existing.append(data)
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(existing, f, ensure_ascii=False, indent=2)
-        print(f"📦 저장 완료: {data['title']}")
-    else:
-        print(f"⚠️ 중복으로 저장 건너뜀: {data['title']}")
-
-
 def log_error_json(error_info, filepath):
     error_info["timestamp"] = time.strftime("%Y-%m-%d %H:%M:%S")
     with open(filepath, "a", encoding="utf-8") as f:
@@ -217,39 +110,11 @@ def log_error_json(error_info, filepath):
     print(f"❌ 오류 기록 완료: {error_info['title'] if 'title' in error_info else '알 수 없는 오류'}")
 
 
-async def with_browser_retry(browser_ref, executable, browser_args, coro_fn, retries=30, delay=2):
-    for attempt in range(retries):
-        try:
-            result = await coro_fn(browser_ref[0])
-            html = await result.get_content()
-            soup = BeautifulSoup(html, "lxml")
-            page_text = soup.get_text().lower()
-            for err in [
-                "500", "internal server error", "proxy error", "nginx",
-                "sigkill", "sigtrap", "aw snap", "페이지를 표시하는 도중 문제"
-            ]:
-                if err in page_text:
-                    print(f"❌ 페이지 로드 실패: 에러 탐지됨 → '{err}'")
-                    raise Exception(f"🛑 HTML 내 에러 페이지 탐지됨: '{err}'")
-            return result
-        except Exception as e:
-            print(f"⚠️ 브라우저 작업 실패 {attempt+1}/{retries}: {e}")
-            try:
-                await browser_ref[0].stop()
-            except:
-                pass
-            print("🔄 브라우저 재시작 중...")
-            browser_ref = [await start_browser(executable)]
-            await asyncio.sleep(delay)
-    raise Exception("❌ 브라우저 재시도 모두 실패")
-
-
 async def start_browser(executable):
-    return await zd.start(
-        headless=headless,
-        browser_executable_path=executable,
-        browser_args=browser_args
-    )
+    # headless / 실행 인자 / 프로필 디렉토리는 browser_profile 의 공통 설정(BROWSER_PROFILE)을 따른다
+    browser = await launch_browser(CRAWLER_NAME, executable)
+    await install_resource_blocking(browser.main_tab, CRAWLER_NAME)
+    return browser
 
 async def wait_for_browser_ready(port, timeout=10):
     import socket
@@ -262,51 +127,6 @@ async def wait_for_browser_ready(port, timeout=10):
     raise Exception(f"🚫 브라우저 포트 {port} 연결 실패")
 
 
-async def with_browser_get(url, browser_ref, executable, retries=30, delay=2):
-    for attempt in range(retries):
-        try:
-            print(f"📡 시도 {attempt+1}/{retries}: {url}")
-            page = await browser_ref[0].get(url)
-            html = await page.get_content()
-            soup = BeautifulSoup(html, "lxml")
-            if any(err in soup.get_text().lower() for err in [
-                "500", "internal server error", "proxy error", "nginx", "html error", "bad gateway"
-            ]):
-                raise Exception("🛑 HTML 내 에러 페이지 탐지됨")
-            return page
-        except Exception as e:
-            print(f"⚠️ 브라우저 작업 실패 {attempt+1}/{retries}: {e}")
-            print("🔄 브라우저 재시작 중...")
-            try:
-                await browser_ref[0].stop()
-            except:
-                pass
-            await asyncio.sleep(delay)
-            browser_ref[0] = await start_browser(executable)
-    raise Exception("❌ 브라우저 재시도 모두 실패")
-
-def normalize(text: str) -> str:
-    if not text:
-        return ''
-    text = re.sub(r'\s+', '', text)                 # 모든 공백 제거
-    text = re.sub(r'[^\w가-힣]', '', text)           # 특수문자 제거
-    text = re.sub(r'[\u200b\u200c\u200d\ufeff\xa0]', '', text)  # 비가시 문자 제거
-    return text.lower()
-
-def normalize_address_for_comparison(addr: str) -> str:
-    """Specific normalization for address comparison."""
-    if not addr:
-        return ''
-    # Remove floor info, parenthesized details, and all whitespace
-    addr = re.sub(r'(?:지하|지상)?\s?\d+층', '', addr.strip()).strip()
-    addr = re.sub(r'\b\d+호\b', '', addr.strip()).strip() # Remove building unit number like 201호
-    addr = re.sub(r'\(.*?\)', '', addr.strip()).strip()
-    addr = re.sub(r'\s+', '', addr)
-    # Keep essential address characters (Hangul, numbers, basic separators if needed later, but remove for now)
-    # Keep commas and hyphens which might be part of address numbers (e.g., 232-9)
-    addr = re.sub(r'[^\w가-힣,-]', '', addr)
-    return addr.lower()
-
 def extract_space_items(html_text: str):
     """
     PC 페이지 HTML에서 class="space_title" 요소를 모두 추출하여
@@ -331,125 +151,293 @@ def extract_apollo_place_items(html_text: str):
     """
     Extracts place summary items from the __APOLLO_STATE__ JSON in the HTML.
     """
-    parser = BeautifulSoup(html_text, "lxml")
-    scripts = parser.find_all("script")
-
-    apollo_data_raw = None
-    for script in scripts:
-        # Check if the script content exists and contains the target string
-        if script.string and "window.__APOLLO_STATE__" in script.string:
-            # --- Corrected Regex ---
-            # Removed the '$' anchor to match even if other JS code follows the APOLLO_STATE assignment.
-            # Added non-greedy match {.*?} just in case of nested structures, though {.*} often works too.
-            match = re.search(r"window\.__APOLLO_STATE__\s*=\s*({.*?});", script.string, re.DOTALL)
-            if match:
-                apollo_data_raw = match.group(1)
-                print("✅ APOLLO_STATE 스크립트 블록 찾음.")
-                break # Exit the loop once found
-
-    if not apollo_data_raw:
+    place_state = extract_apollo_state(html_text, ("PlaceSummary:",))
+    if place_state is None:
         print("🟡 APOLLO_STATE 데이터를 포함하는 스크립트를 찾지 못했습니다.")
         return []
 
-    try:
-        # Attempt to load the extracted string as JSON
-        apollo_json = json.loads(apollo_data_raw)
-        print("✅ APOLLO_STATE JSON 파싱 성공.")
-    except json.JSONDecodeError as e:
-        print(f"❌ JSON 파싱 실패: {e}")
-        # Optional: Print a snippet of the raw data for debugging JSON errors
-        # print("--- 파싱 시도한 데이터 (일부) ---")
-        # print(apollo_data_raw[:500] + "..." if apollo_data_raw else "N/A")
-        # print("-----------------------------")
-        return []
-
-    place_items = []
-    # Iterate through the parsed JSON dictionary
-    for key, value in apollo_json.items():
-        # Check if the key is a string, starts with "PlaceSummary:", and the value is a dictionary
-        if isinstance(key, str) and key.startswith("PlaceSummary:") and isinstance(value, dict):
-             # Optionally add more specific checks, e.g., if value must contain '__typename'
-             # if '__typename' in value and value['__typename'] == 'PlaceSummary':
-            place_items.append(value)
-
+    place_items = list(place_state.values())
     print(f"✅ APOLLO_STATE 내 PlaceSummary 항목 {len(place_items)}개 추출 완료")
     return place_items
 
 
+def find_best_match(items, business_name, road_address, tag):
+    """
+    Apollo PlaceSummary 후보 중 DB 가게와 일치하는 항목을 고른다.
+    이름이 여러 개 일치하면 주소로 한 번 더 좁히고, 이름 일치가 없으면 None.
+    """
+    normalized_db_name = normalize(business_name)
+    normalized_db_addr = normalize_address_for_comparison(road_address)
+
+    name_matches = []
+    for item in items:
+        normalized_item_name = normalize(item.get("name", ""))
+        if normalized_item_name == normalized_db_name:
+            name_matches.append(item)
+            print(f"     ✔️ 이름 일치!")
+
+    if not name_matches:
+        return None
+
+    if len(name_matches) == 1:
+        best_match = name_matches[0]
+        print(f"✅ {tag} 이름 유일 매칭 성공: '{best_match.get('name')}' (ID: {best_match.get('id')})")
+        return best_match
+
+    # Multiple name matches, use address to disambiguate
+    print(f"⚠️ {tag} '{business_name}' 이름 일치 항목 {len(name_matches)}개 발견. 주소 비교 시도...")
+    for match in name_matches:
+        addr_to_check = match.get("roadAddress") or match.get("address")  # Prefer road address
+        normalized_item_addr = normalize_address_for_comparison(addr_to_check)
+        print(f"   - 비교 대상 주소: '{addr_to_check}' (정규화: '{normalized_item_addr}')")
+        # Check if normalized DB address is contained within the normalized item address
+        if normalized_db_addr in normalized_item_addr:
+            print(f"✅ {tag} 주소 포함 확인: '{match.get('name')}' (ID: {match.get('id')})")
+            return match
+
+    best_match = name_matches[0]  # Fallback to the first name match if no address matches
+    print(f"🟡 {tag} 주소 일치/포함 없음. 첫 번째 이름 일치 항목 사용: '{best_match.get('name')}' (ID: {best_match.get('id')})")
+    return best_match
+
+
+async def open_worker_tab(shared):
+    tab = await shared.browser.get("about:blank", new_tab=True)
+    await install_resource_blocking(tab, CRAWLER_NAME)
+    tab._browser_generation = shared.generation
+    return tab
+
+
+async def close_tab_quietly(tab):
+    if tab is None:
+        return
+    try:
+        await tab.close()
+    except:
+        pass
+
 
-def extract_rq_items(html_text: str):
+async def ensure_worker_tab(tab_ref, shared):
     """
-    window.__RQ_STREAMING_STATE__.push({...}); 블록 안의 JSON을 추출해서
-    items 리스트를 전부 반환한다.
+    탭이 없거나 교체되기 전 브라우저의 탭이면 지금 브라우저에서 새로 연다.
+    탭조차 열리지 않으면 브라우저가 죽은 것이므로 풀에서 교체한 뒤 한 번 더 연다.
     """
-    parser = BeautifulSoup(html_text, "lxml")
-    scripts = parser.find_all("script")
-    # pprint.pprint(scripts) # 디버깅용
+    tab = tab_ref[0]
+    if tab is not None and tab._browser_generation == shared.generation:
+        return tab
+    await close_tab_quietly(tab)
+    tab_ref[0] = None
+    generation = shared.generation
+    try:
+        tab_ref[0] = await open_worker_tab(shared)
+    except Exception as e:
+        print(f"💥 탭 열기 실패: {e}")
+        await shared.recover(generation)
+        tab_ref[0] = await open_worker_tab(shared)
+    return tab_ref[0]
 
-    # window.__RQ_STREAMING_STATE__.push(...) 를 찾는 정규식
-    # JSON 객체가 복잡하고 여러 줄일 수 있으므로 관대한 패턴 사용
-    push_regex = re_compile(
-        r'window\.__RQ_STREAMING_STATE__\.push\((.*?)\)\s*;?\s*$', # 끝부분 공백/세미콜론 허용
-        re.DOTALL | re.MULTILINE # 여러 줄에 걸쳐 매칭
-    )
 
-    all_items = []
-    found_pushes = 0
+async def with_tab_get(url, tab_ref, shared, policy=PAGE_POLICY):
+    """
+    여러 워커가 풀에서 빌린 브라우저 하나를 공유하므로, 실패하면 먼저 브라우저가 살아 있는지 확인해
+    죽었을 때만 브라우저를 교체하고(다른 워커가 이미 바꿨으면 건너뜀), 탭이 죽은 경우(browser 분류)엔 해당 워커의 탭만 새로 연다.
+    에러 페이지 / 타임아웃은 같은 탭으로 백오프 후 다시 시도한다.
+    탭은 브라우저 로딩이 처음 필요할 때 연다.
+    """
+    await ensure_worker_tab(tab_ref, shared)
 
-    for script in scripts:
-        if not script.string:
-            continue
+    async def attempt():
+        print(f"📡 요청: {url}")
+        page, reason = await get_classified(tab_ref[0], url)
+        if reason:
+            raise PageLoadError(reason)
+        return page
 
-        # 정규식으로 push 호출 부분 찾기
-        matches = push_regex.findall(script.string.strip()) # 스크립트 내용 앞뒤 공백 제거
-        # pprint.pprint(matches) # 디버깅용
-        for match in matches:
-            found_pushes += 1
-            # print(f"DEBUG: Found push content: {match[:200]}...") # 디버깅용
-            try:
-                # JSON 파싱 시도
-                parsed = json.loads(match)
-
-                # 'queries' 키 확인 및 순회
-                queries = parsed.get("queries", [])
-                if not isinstance(queries, list):
-                    # print("DEBUG: 'queries' is not a list.")
-                    continue
-
-                for q_index, q in enumerate(queries):
-                    # 'state', 'data', 'items' 경로 확인
-                    items = q.get("state", {}).get("data", {}).get("items", [])
-
-                    # items가 리스트이고 내용이 있는지 확인
-                    if isinstance(items, list) and items:
-                        print(f"✅ Script 내에서 {len(items)}개의 items 발견 (query index: {q_index})")
-                        all_items.extend(items) # 찾은 아이템 추가
-
-            except json.JSONDecodeError as e:
-                # print(f"⚠️ JSON 파싱 실패: {e}. Content: {match[:300]}...") # 디버깅용
-                continue # 파싱 실패 시 다음 매치 또는 스크립트로
-            except Exception as e:
-                print(f"⚠️ 데이터 추출 중 예상치 못한 오류: {e}")
-                continue
+    async def on_failure(error_class, error):
+        swapped = await shared.recover(tab_ref[0]._browser_generation)
+        if error_class == BROWSER and not swapped:
+            print("🔄 탭 재생성 중...")
+            await close_tab_quietly(tab_ref[0])
+            tab_ref[0] = None
+        await ensure_worker_tab(tab_ref, shared)
+
+    return await policy.run(attempt, on_failure=on_failure)
 
-    if found_pushes == 0:
-         print("🟡 RQ_STREAMING_STATE push 호출을 찾지 못했습니다.")
-    elif not all_items:
-        print("🟡 push 호출은 찾았으나, 유효한 'items' 데이터를 포함한 호출이 없었습니다.")
+
+async def crawl_restaurant(tab_ref, shared, http_fetcher, tag, id, business_name, road_address):
+    """
+    가게 하나를 검색 → 상세 페이지 순으로 크롤링하고 (결과 종류, 데이터) 튜플을 돌려준다.
+    결과 종류는 "success", "need_check", "fail" 중 하나이며 파일 기록은 writer 가 맡는다.
+    """
+    search_query = road_address
+    encoded_query = urllib.parse.quote(search_query)
+    search_path = f"/place/searchByAddress/addressPlace?query={encoded_query}&x=126&y=37"
+    mob_url = f"{BASE_URL}{search_path}"
+    print(f"🔗 {tag} {business_name}")
+    print(f"🔗 {tag} {search_query} URL: {mob_url}")
+
+    html_src = None
+    if FETCH_MODE == "http":
+        html_src = await http_fetcher.fetch_apollo_html(search_path)
+    if html_src is None:
+        page = await with_tab_get(mob_url, tab_ref, shared)
+        await page.wait_for("header", timeout=10)
+        html_src = await page.get_content()
+    # Extract potential matches from Apollo state
+    items = extract_apollo_place_items(html_src)
+
+    if not items:
+        print(f"⚠️ {tag} Apollo items 추출 실패 또는 없음: {business_name}")
+        return "need_check", {"id": id, "title": business_name, "address": road_address, "url": mob_url, "error": "No Apollo items found"}
+
+    best = find_best_match(items, business_name, road_address, tag)
+    if not best:
+        print(f"🟡 {tag} 이름 일치 항목 없음: '{business_name}'")
+        return "need_check", {"id": id, "title": business_name, "address": road_address, "url": mob_url, "error": "No name match in Apollo items", "found_names": [i.get('name') for i in items]}
+    if not best.get("id"):
+        print(f"❌ {tag} 매칭 항목에 ID 없음: '{business_name}'")
+        return "fail", None
+
+    business_name = best.get("name")
+    print(f"✅ {tag} 최종 매칭 성공: '{business_name}' (ID: {best['id']})")
+
+    detail_path = f"/place/{best['id']}"
+    detail_url = f"{BASE_URL}{detail_path}"
+    parser = None
+    if FETCH_MODE == "http":
+        detail_html = await http_fetcher.fetch_apollo_html(detail_path)
+        if detail_html is not None:
+            parser = BeautifulSoup(detail_html, "lxml")
+            # 상세 필드는 APOLLO_STATE 가 아니라 렌더링된 DOM 에서 읽으므로, 서버 HTML 에 그 DOM 이 없으면 브라우저로 다시 받는다
+            if parser.select_one('div[class="place_fixed_maintab"]') is None or not extract_dynamic_place_info(parser):
+                print(f"🟡 {tag} HTTP 상세 페이지에 렌더링된 정보 없음 → 브라우저로 대체: {detail_path}")
+                parser = None
+    if parser is None:
+        page = await with_tab_get(detail_url, tab_ref, shared)
+        await with_retry(lambda: page.wait_for("div.place_fixed_maintab", timeout=10))
+        parser = BeautifulSoup(await page.get_content(), "lxml")
+    print(f"🔗 {tag} {detail_url} 로딩 완료")
+    print(f"🔗{tag} {search_query} 2차 URL: {detail_url}")
+
+    main_tab = parser.select_one('div[class="place_fixed_maintab"]')
+    href_list = []
+    if main_tab:
+        href_list = [
+            a['href']
+            for a in main_tab.select('a[href]')
+            if a['href'].strip() and not a['href'].strip().startswith('#')
+        ]
+        print(f"🍽️ {tag} {search_query} 유효한 링크 개수: {len(href_list)}")
+        print(f"🍽️ {tag} {search_query} 링크: {href_list}")
     else:
-         print(f"✅ 최종 추출된 items: {len(all_items)}개")
+        print(f"❌ {tag} {search_query} place_fixed_maintab not found.")
+
+    place_info = extract_dynamic_place_info(parser)
+    if not place_info:
+        # 셀렉터가 아무것도 못 찾은 빈 결과를 성공으로 기록하지 않는다
+        print(f"🟡 {tag} 상세 정보 추출 실패: '{business_name}'")
+        return "need_check", {"id": id, "title": business_name, "address": road_address, "url": detail_url, "error": "Empty place_info"}
+
+    data = {
+        "id": id,
+        "query": search_query,
+        "title": business_name,
+        "place_info": place_info,
+        "unique_links": f"/place/{best['id']}",
+        "tab_list": href_list,
+        "url": mob_url
+    }
+    print(data)
+    return "success", data
+
+
+async def feed_work(crawl_queue, work_queue):
+    """DB 작업 큐에서 배치 단위로 claim 해서 워커 큐에 넣는다. 끝나면 워커 수만큼 종료 신호(None)."""
+    index = 0
+    while True:
+        rows = await crawl_queue.claim_batch_async()
+        if not rows:
+            break
+        for row in rows:
+            await work_queue.put((index, row))
+            index += 1
+    for _ in range(TAB_COUNT):
+        await work_queue.put(None)
+
+
+async def crawl_worker(worker_id, shared, http_fetcher, crawl_queue, work_queue, result_queue, total):
+    tab_ref = [None]
+    handled = 0
+    try:
+        while True:
+            job = await work_queue.get()
+            if job is None:
+                break
+            index, (id, business_name, road_address) = job
+            # 워커 큐에서 기다린 시간만큼 lease 가 줄었으므로 처리 시작 시점부터 다시 늘린다
+            if not await crawl_queue.renew_async(id):
+                print(f"⏭️ [탭 {worker_id}] lease 만료로 다른 워커가 가져간 가게 건너뜀: {id}")
+                continue
 
-    return all_items
+            if handled and handled % TAB_RECYCLE_INTERVAL == 0 and tab_ref[0] is not None:
+                print(f"🔄 [탭 {worker_id}] 메모리 유출 방지 탭 재생성 중...")
+                await close_tab_quietly(tab_ref[0])
+                tab_ref[0] = None
 
+            # RSS / 탭 수가 한도를 넘었으면 다른 워커의 진행 중인 레코드가 끝난 뒤 브라우저를 교체한다
+            await shared.maybe_recycle()
+
+            tag = f"[{index + 1} | {total}]"
+            try:
+                start_record_budget()
+                async with shared.record():
+                    result = await crawl_restaurant(tab_ref, shared, http_fetcher, tag, id, business_name, road_address)
+            except Exception as e:
+                print(f"❌ {tag} JSON 매칭 실패: {e}")
+                result = ("fail", None)
+            await result_queue.put((id, *result))
+            handled += 1
+    finally:
+        await close_tab_quietly(tab_ref[0])
+
+
+QUEUE_STATUS = {"success": "done", "need_check": "need_check", "fail": "failed"}
 
-async def crawler():
-    restaurant_infos = load_10_restaurant_names_and_addresses()
 
-    if not restaurant_infos:
-        print("❌ 데이터베이스에서 가게 정보를 불러오지 못했습니다.")
+async def result_writer(result_queue, crawl_queue, counts, output_sink, error_path):
+    """
+    워커들의 결과를 한 곳에서 순서대로 output_sink 에 기록하고 작업 큐 상태를 갱신한다 (확인 필요 건은 error_path 에도).
+    CRAWL 플래그는 결과 파일을 fsync 한 뒤에 반영해 비정상 종료 시 결과 없이 플래그만 남지 않게 한다.
+    """
+    while True:
+        result = await result_queue.get()
+        if result is None:
+            break
+        id, kind, payload = result
+        if kind == "success" and not output_sink.append(payload):
+            # 같은 번호가 이미 결과 파일에 있으면 이번 결과는 쓰지 않았으므로 done 으로 닫지 않고 확인 대상으로 남긴다
+            kind = "need_check"
+            payload = {**payload, "error": "duplicate output"}
+        if kind == "need_check":
+            log_error_json(payload, error_path)
+        counts[kind] += 1
+        if await crawl_queue.finish_async(id, QUEUE_STATUS[kind]):
+            output_sink.sync()
+            await crawl_queue.flush_async()
+    output_sink.sync()
+    await crawl_queue.flush_async()
+
+
+async def crawler(output_sink, error_path):
+    """output_sink: 성공 결과를 쓸 JsonlWriter (번호 기준 중복 제거), error_path: 확인 필요 건 로그 파일"""
+    crawl_queue = CrawlQueue(batch_size=TAB_COUNT * 5)
+    total = crawl_queue.remaining()
+
+    if not total:
+        print("❌ 작업 큐에 남은 가게가 없습니다.")
+        crawl_queue.close()
         return
 
-    print(f"ℹ️ {len(restaurant_infos)}개 가게에 대한 크롤러를 시작합니다...")
+    print(f"ℹ️ 남은 {total}개 가게에 대한 크롤러를 {TAB_COUNT}개 탭으로 시작합니다... (워커: {crawl_queue.worker_id})")
 
     system = platform.platform()
     arch = platform.machine()
@@ -466,139 +454,50 @@ async def crawler():
         elif os.path.exists("/usr/bin/chromium"):
             executable = "/usr/bin/chromium"
 
+    # claim 한 만큼만 메모리에 두도록 크기를 제한한다
+    work_queue = asyncio.Queue(maxsize=TAB_COUNT * 2)
+    result_queue = asyncio.Queue()
+    counts = {"success": 0, "fail": 0, "need_check": 0}
+
+    started = time.perf_counter()
+    # 탭 워커들이 같이 쓰는 브라우저는 풀에서 빌려 크래시 / RSS 한도 초과 시 교체한다
+    shared = await SharedBrowser(BrowserPool(lambda: start_browser(executable))).start()
+    print("✅ Zendriver 시작 완료.")
+    print(f"ℹ️ 수집 모드: {FETCH_MODE}")
+    http_fetcher = await ApolloHttpFetcher(concurrency=TAB_COUNT * 2).open()
     try:
-        browser_ref = [await start_browser(executable)]
-
-        print("✅ Zendriver 시작 완료.")
-        success, fail, need_check = 0, 0, 0
-
-        for index, (id, business_name, road_address) in enumerate(restaurant_infos):
-            if (index + 1) % 10 == 0:
-                await browser_ref[0].stop()
-                print("🔄 메모리 유출 방지 브라우저 재시작 중...")
-                browser_ref = [await start_browser(executable)]
-                print("✅ 메모리 유출 방지 브라우저 재시작 완료.")
-
+        writer = asyncio.create_task(result_writer(result_queue, crawl_queue, counts, output_sink, error_path))
+        tasks = [asyncio.create_task(feed_work(crawl_queue, work_queue))] + [
+            asyncio.create_task(crawl_worker(worker_id, shared, http_fetcher, crawl_queue, work_queue, result_queue, total))
+            for worker_id in range(TAB_COUNT)
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            # 워커 하나가 예외로 끝나도(또는 Ctrl+C) 나머지를 멈추고, 이미 나온 결과는 기록 / 큐 반영까지 마친다
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await result_queue.put(None)
             try:
-                #search_query = make_search_query(business_name, road_address)
-                search_query = road_address
-                encoded_query = urllib.parse.quote(search_query)
-                mob_url = f"https://m.place.naver.com/place/searchByAddress/addressPlace?query={encoded_query}&x=126&y=37"
-                print(f"🔗 [{index + 1} | {len(restaurant_infos)}] {business_name}")
-                print(f"🔗 [{index + 1} | {len(restaurant_infos)}] {search_query} URL: {mob_url}")
-
-                page = await with_browser_get(mob_url, browser_ref, executable, retries=30, delay=3)
-                await page.wait_for("header", timeout=10)
-                html_src = await page.get_content()
-                # Extract potential matches from Apollo state
-                items = extract_apollo_place_items(html_src)
-
-                if not items:
-                    print(f"⚠️ [{index + 1} | {len(restaurant_infos)}] Apollo items 추출 실패 또는 없음: {business_name}")
-                    need_check += 1
-                    log_error_json({"id": id, "title": business_name, "address": road_address, "url": mob_url, "error": "No Apollo items found"}, os.path.join(ERROR_DIR, f"error_log_{start_index}.json"))
-                    continue
-
-                # --- Matching Logic ---
-                normalized_db_name = normalize(business_name)
-                normalized_db_addr = normalize_address_for_comparison(road_address)
-                #print(f"   정규화된 DB 이름: '{normalized_db_name}'")
-                #print(f"   정규화된 DB 주소: '{normalized_db_addr}'")
-
-                name_matches = []
-                for item in items:
-                    item_name = item.get("name", "")
-                    normalized_item_name = normalize(item_name)
-                    #print(f"   - 검사중인 이름: '{item_name}' (정규화: '{normalized_item_name}')") # Debug print
-                    if normalized_item_name == normalized_db_name:
-                        name_matches.append(item)
-                        print(f"     ✔️ 이름 일치!")
-
-                if not name_matches:
-                    print(f"🟡 [{index + 1} | {len(restaurant_infos)}] 이름 일치 항목 없음: '{business_name}'")
-                    need_check += 1
-                    log_error_json({"id": id, "title": business_name, "address": road_address, "url": mob_url, "error": "No name match in Apollo items", "found_names": [i.get('name') for i in items]}, os.path.join(ERROR_DIR, f"error_log_{start_index}.json"))
-                    continue
-
-                elif len(name_matches) == 1:
-                    best_match = name_matches[0]
-                    print(f"✅ [{index + 1} | {len(restaurant_infos)}] 이름 유일 매칭 성공: '{best_match.get('name')}' (ID: {best_match.get('id')})")
-
-                else: # Multiple name matches, use address to disambiguate
-                    print(f"⚠️ [{index + 1} | {len(restaurant_infos)}] '{business_name}' 이름 일치 항목 {len(name_matches)}개 발견. 주소 비교 시도...")
-                    found_address_match = False
-                    for match in name_matches:
-                        addr_to_check = match.get("roadAddress") or match.get("address") # Prefer road address
-                        normalized_item_addr = normalize_address_for_comparison(addr_to_check)
-
-                        print(f"   - 비교 대상 주소: '{addr_to_check}' (정규화: '{normalized_item_addr}')")
-
-                        # Check if normalized DB address is contained within the normalized item address
-                        # This is slightly more flexible than exact match
-                        if normalized_db_addr in normalized_item_addr:
-                            best_match = match
-                            print(f"✅ [{index + 1} | {len(restaurant_infos)}] 주소 포함 확인: '{best_match.get('name')}' (ID: {best_match.get('id')})")
-                            found_address_match = True
-                            break # Use the first address match found
-
-                    if not found_address_match:
-                        best_match = name_matches[0] # Fallback to the first name match if no address matches
-                        print(f"🟡 [{index + 1} | {len(restaurant_infos)}] 주소 일치/포함 없음. 첫 번째 이름 일치 항목 사용: '{best_match.get('name')}' (ID: {best_match.get('id')})")
-                # --- End Matching Logic ---
-
-                if best_match and best_match.get("id"):
-                    best = best_match
-                    business_name = best.get("name")
-                    print(f"✅ [{index + 1} | {len(restaurant_infos)}] 최종 매칭 성공: '{business_name}' (ID: {best['id']})")
-
-                await with_browser_retry(
-                    browser_ref, executable, browser_args,
-                    lambda b: b.get(f"https://m.place.naver.com/place/{best['id']}")
-                )
-                print(f"🔗 [{index + 1} | {len(restaurant_infos)}] {f"https://m.place.naver.com/place/{best['id']}"} 로딩 완료")
-                print(f"🔗[{index + 1} | {len(restaurant_infos)}] {search_query} 2차 URL: https://m.place.naver.com/place/{best['id']}")
-                await with_retry(lambda: page.wait_for("div.place_fixed_maintab", timeout=10))
-
-                parser = BeautifulSoup(await page.get_content(), "lxml")
-                main_tab = parser.select_one('div[class="place_fixed_maintab"]')
-                if main_tab:
-                    href_list = [
-                        a['href']
-                        for a in main_tab.select('a[href]')
-                        if a['href'].strip() and not a['href'].strip().startswith('#')
-                    ]
-                    print(f"🍽️ [{index + 1} | {len(restaurant_infos)}] {search_query} 유효한 링크 개수: {len(href_list)}")
-                    print(f"🍽️ [{index + 1} | {len(restaurant_infos)}] {search_query} 링크: {href_list}")
-                else:
-                    print(f"❌ [{index + 1} | {len(restaurant_infos)}] {search_query} place_fixed_maintab not found.")
-
-                place_info = extract_dynamic_place_info(parser)
-
-                data = {
-                    "id": id,
-                    "query": search_query,
-                    "title": business_name,
-                    "place_info": place_info,
-                    "unique_links": f'/place/{best['id']}',
-                    "tab_list": href_list,
-                    "url": mob_url
-                }
-                print(data)
-
-                append_to_json_file(data, output_path)
-                success += 1
-
-            except Exception as e:
-                print(f"❌ [{index + 1} | {len(restaurant_infos)}] JSON 매칭 실패: {e}")
-                fail += 1
-                continue
-
+                await writer
+            finally:
+                output_sink.sync()
+                await crawl_queue.flush_async()
 
     finally:
-        await browser_ref[0].stop()
+        output_sink.close()
+        crawl_queue.close()
+        await http_fetcher.close()
+        await shared.close()
+        profile_report()
+        retry_report()
+        elapsed = time.perf_counter() - started
+        done = sum(counts.values())
         print("🛑 Zendriver 종료 완료")
         print("🛑 크롤러 종료 완료")
-        print(f"\n✅ 완료: {success} / ❌ 실패: {fail} / ⚠️ 확인 필요: {need_check}")
+        print(f"\n✅ 완료: {counts['success']} / ❌ 실패: {counts['fail']} / ⚠️ 확인 필요: {counts['need_check']}")
+        print(f"⏱️ {done}건 / {elapsed:.1f}초 ({done / elapsed * 60 if elapsed else 0:.1f}건/분, 탭 {TAB_COUNT}개)")
 
 
 if __name__ == "__main__":
@@ -612,11 +511,6 @@ if __name__ == "__main__":
     if not os.path.exists("error_logs"):
         os.makedirs("error_logs")
 
-    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-    SCREENSHOT_DIR = os.path.join(BASE_DIR, "screenshots")
-    DATA_DIR = os.path.join(BASE_DIR, "web_data")
-    ERROR_DIR = os.path.join(BASE_DIR, "error_logs")
-
     os.makedirs(SCREENSHOT_DIR, exist_ok=True)
     os.makedirs(DATA_DIR, exist_ok=True)
     os.makedirs(ERROR_DIR, exist_ok=True)
@@ -626,21 +520,9 @@ if __name__ == "__main__":
     print("📂 ErrorLog 저장 경로:", ERROR_DIR)
 
     start_index = int(os.environ.get("crawl_second_START_INDEX", sys.argv[1] if len(sys.argv) > 1 else 0))
-    output_path = os.path.join(DATA_DIR, f"crawl_second_output_{start_index}.json")
-
-    browser_args = [
-        "--no-sandbox",
-        "--disable-dev-shm-usage",
-        "--disable-setuid-sandbox",
-        "--disable-software-rasterizer",
-        "--disable-blink-features=AutomationControlled",
-        "--window-size=1280x800",  # 반드시 사이즈 지정
-        "--start-maximized",  # headless에서도 최대화처럼 보이게
-        "--disable-infobars",
-        "--disable-extensions",
-        "--disable-popup-blocking",
-        "--enable-logging=stderr",
-        "--log-level=1",
-    ]
-
-    asyncio.run(crawler())
\ No newline at end of file
+    output_path = os.path.join(DATA_DIR, f"crawl_second_output_{start_index}.jsonl")
+    # 같은 이름의 체인 지점이 서로 덮이지 않도록 가게 이름이 아니라 작업 큐 번호(id)로 중복을 거른다
+    output_sink = JsonlWriter(output_path, key="id")
+    error_path = os.path.join(ERROR_DIR, f"error_log_{start_index}.json")
+
+    asyncio.run(crawler(output_sink, error_path))
\ No newline at end of file
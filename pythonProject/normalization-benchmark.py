@@ -0,0 +1,101 @@
+import os
+import random
+import re
+import time
+
+import pandas as pd
+
+from normalization import normalize, normalize_address_for_comparison, normalize_series
+
+ROWS = int(os.environ.get("BENCH_ROWS", 1_000_000))
+# 실제 인허가 데이터처럼 같은 가게명/주소가 반복되도록 고유값 비율을 둔다
+UNIQUE_RATIO = float(os.environ.get("BENCH_UNIQUE_RATIO", 0.4))
+
+SYLLABLES = "가나다라마바사아자차카타파하김박이최정강조윤장임한오서신권황안송류홍"
+SUFFIXES = ["", " 본점", "(역삼점)", " 2호점", "&카페", " · 분식", "\u200b", "\xa0식당"]
+SIDO = ["서울특별시", "부산광역시", "경기도", "인천광역시", "대구광역시"]
+GU = ["강남구", "마포구", "수원시 영통구", "해운대구", "성남시 분당구", "중구"]
+ROAD = ["테헤란로", "월드컵북로", "봉은사로", "광교중앙로", "판교역로", "중앙대로"]
+
+
+def legacy_normalize_name(text):
+    """기존 DB_processing.py / id-processing.py 의 normalize"""
+    if not text:
+        return ''
+    text = re.sub(r'\(.*?\)', '', text)
+    text = re.sub(r'\s+', '', text)
+    text = re.sub(r'[^ㄱ-ㅣ가-힣\w]', '', text)
+    return text.lower()
+
+
+def legacy_normalize_crawler(text):
+    """기존 new-crawler.py 의 normalize (괄호 내용을 지우지 않아 DB 쪽과 결과가 달랐다)"""
+    if not text:
+        return ''
+    text = re.sub(r'\s+', '', text)
+    text = re.sub(r'[^\w가-힣]', '', text)
+    text = re.sub(r'[\u200b\u200c\u200d\ufeff\xa0]', '', text)
+    return text.lower()
+
+
+def legacy_normalize_address(addr):
+    if not addr:
+        return ''
+    addr = re.sub(r'(?:지하|지상)?\s?\d+층', '', addr.strip()).strip()
+    addr = re.sub(r'\b\d+호\b', '', addr.strip()).strip()
+    addr = re.sub(r'\(.*?\)', '', addr.strip()).strip()
+    addr = re.sub(r'\s+', '', addr)
+    addr = re.sub(r'[^\w가-힣,-]', '', addr)
+    return addr.lower()
+
+
+def synthetic_data(rows, unique_ratio, seed=42):
+    rng = random.Random(seed)
+    unique = max(1, int(rows * unique_ratio))
+    names, addresses = [], []
+    for _ in range(unique):
+        base = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 6)))
+        names.append(base + rng.choice(SUFFIXES) + rng.choice(["", " Pasta", " BBQ"]))
+        floor = rng.choice(["", f" {rng.randint(1, 5)}층", f" 지하{rng.randint(1, 2)}층", f" {rng.randint(101, 305)}호"])
+        detail = rng.choice(["", f" ({rng.choice(['역삼동', '서교동', '삼성동'])})", f", {rng.randint(1, 3)}동"])
+        addresses.append(
+            f"{rng.choice(SIDO)} {rng.choice(GU)} {rng.choice(ROAD)} {rng.randint(1, 500)}-{rng.randint(1, 30)}{floor}{detail}"
+        )
+    picks = [rng.randrange(unique) for _ in range(rows)]
+    return pd.DataFrame({
+        "사업장명": [names[i] for i in picks],
+        "도로명전체주소": [addresses[i] for i in picks],
+    })
+
+
+def timed(label, fn):
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    print(f"⏱️ {label:<40} {elapsed:6.2f}초 ({ROWS / elapsed / 1000:,.0f}k행/초)")
+    return result
+
+
+if __name__ == "__main__":
+    data = synthetic_data(ROWS, UNIQUE_RATIO)
+    names, addresses = data["사업장명"], data["도로명전체주소"]
+    print(f"📂 합성 데이터 {ROWS:,}행 (고유 가게명 {names.nunique():,} / 고유 주소 {addresses.nunique():,})")
+
+    legacy_names = timed("가게명: 기존 re.sub 3회 루프", lambda: [legacy_normalize_name(v) for v in names])
+    loop_names = timed("가게명: normalize() 루프", lambda: [normalize(v) for v in names])
+    series_names = timed("가게명: normalize_series()", lambda: normalize_series(names))
+
+    legacy_addrs = timed("주소: 기존 re.sub 5회 루프", lambda: [legacy_normalize_address(v) for v in addresses])
+    loop_addrs = timed("주소: normalize_address_for_comparison() 루프",
+                       lambda: [normalize_address_for_comparison(v) for v in addresses])
+    series_addrs = timed("주소: normalize_series()",
+                         lambda: normalize_series(addresses, normalize_address_for_comparison))
+
+    # 결과 비교: 가게명은 DB 쪽 기존 결과와 같아야 하고, 크롤러 쪽 기존 결과와는 괄호 처리만큼 달라진다
+    assert loop_names == series_names.tolist()
+    assert loop_addrs == series_addrs.tolist()
+    db_diff = sum(a != b for a, b in zip(legacy_names, loop_names))
+    crawler_diff = sum(legacy_normalize_crawler(v) != n for v, n in zip(names[:100_000], loop_names))
+    addr_diff = sum(a != b for a, b in zip(legacy_addrs, loop_addrs))
+    print(f"📊 가게명 DB 기존 대비 차이 {db_diff:,}건 / 크롤러 기존 대비 차이(앞 10만행) {crawler_diff:,}건")
+    print(f"📊 주소 기존 대비 차이 {addr_diff:,}건")
@@ -0,0 +1,60 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# 괄호 안 내용(지점명 등) + 글자/숫자/_ 가 아닌 모든 문자(공백, 특수문자, 비가시 문자)를 한 번에 지운다.
+# 한글/자모는 \w 에 포함된다. DB 쪽과 크롤러 쪽이 같은 규칙을 쓰도록 여기서만 정의한다.
+_NAME_STRIP = re.compile(r"\(.*?\)|\W")
+
+# 주소는 기존 규칙과 결과가 같아야 한다 (이미 매칭된 id 가 바뀌면 안 됨).
+# 기존 코드는 층 정보를 먼저 지운 문자열에서 호수의 \b 를 판단하므로 ("3층101호" → 101호도 지움) 층만 먼저 지우고,
+# 호수 / 괄호 안 내용 / 공백·특수문자(주소 번지의 , - 는 유지)는 한 번에 지운다.
+# 호수는 앞뒤가 글자가 아닐 때만 지운다 ("B동101호" 의 101호는 기존처럼 남는다).
+_FLOOR_STRIP = re.compile(r"(?:지하|지상)?\s?\d+층")
+_ADDRESS_STRIP = re.compile(r"\b\d+호\b|\(.*?\)|[^\w,-]")
+
+NORMALIZED_NAME_COLUMN = "정규화_사업장명"
+ADDRESS_BLOCK_COLUMN = "주소블록"
+
+
+def normalize(text: str) -> str:
+    if not text:
+        return ''
+    return _NAME_STRIP.sub('', text).lower()
+
+
+def normalize_address_for_comparison(addr: str) -> str:
+    if not addr:
+        return ''
+    return _ADDRESS_STRIP.sub('', _FLOOR_STRIP.sub('', addr)).lower()
+
+
+def extract_address_prefix(address: str, parts: int = 3) -> str:
+    if not address:
+        return ''
+    tokens = address.split()
+    return ' '.join(tokens[:parts]) if len(tokens) >= parts else address
+
+
+def address_block(address: str, parts: int = 3) -> str:
+    """매칭 blocking key: 도로명주소 앞 parts 단계를 정규화한 값"""
+    return normalize(extract_address_prefix(address, parts))
+
+
+def normalize_series(series: pd.Series, func=normalize) -> pd.Series:
+    """
+    컬럼 전체를 정규화한다. 같은 값은 한 번만 계산하도록 factorize 로 고유값만 변환한 뒤
+    코드 배열로 다시 펼친다 (가게명/주소는 중복이 많아 행 수보다 호출 수가 훨씬 적다).
+    결측값은 ''.
+    """
+    codes, uniques = pd.factorize(series)
+    # 마지막 칸은 결측값(code -1) 용
+    table = np.empty(len(uniques) + 1, dtype=object)
+    table[:-1] = [func(value if isinstance(value, str) else str(value)) for value in uniques]
+    table[-1] = ''
+    return pd.Series(table[codes], index=series.index, name=series.name)
+
+
+def address_block_series(series: pd.Series, parts: int = 3) -> pd.Series:
+    return normalize_series(series, lambda address: address_block(address, parts))
@@ -0,0 +1,108 @@
+import os
+import re
+import time
+
+from zendriver import cdp
+
+from browser_profile import record_page_load
+
+# 에러 판정을 위해 읽는 <head> 최대 길이. 본문 전체를 파싱하지 않는다.
+HEAD_SCAN_LIMIT = 4096
+# 페이지마다 검사 소요 시간을 출력하는 디버그 모드 (PAGE_CHECK_DEBUG=1)
+DEBUG_PAGE_CHECK = os.environ.get("PAGE_CHECK_DEBUG", "0") == "1"
+
+# <title> 에 들어있으면 에러 페이지로 보는 문구 (nginx / 프록시 기본 에러 페이지 등)
+ERROR_TITLE_MARKERS = (
+    "internal server error", "bad gateway", "service unavailable", "gateway time-out",
+    "gateway timeout", "proxy error", "nginx", "html error",
+)
+# "500 Internal Server Error" 처럼 상태코드로 시작하는 제목만 본다 (가격 "500원" 등은 무시)
+ERROR_TITLE_STATUS = re.compile(r"^\s*5\d\d\b")
+# 크롬 자체 오류 화면 (탭 크래시 / 네트워크 오류)
+BROWSER_ERROR_MARKERS = ("aw snap", "sigkill", "sigtrap", "페이지를 표시하는 도중 문제")
+
+PAGE_HEAD_JS = f"""
+[location.href, document.title,
+ (document.head || document.documentElement).outerHTML.slice(0, {HEAD_SCAN_LIMIT})]
+"""
+
+
+class DocumentStatusTracker:
+    """CDP Network 이벤트에서 탭이 마지막으로 받은 문서(Document)의 HTTP 상태코드를 기록한다."""
+
+    def __init__(self):
+        self.status = None
+        self.url = None
+
+    def reset(self):
+        self.status = None
+        self.url = None
+
+    def on_response(self, event: cdp.network.ResponseReceived):
+        # iframe 문서보다 메인 문서 응답이 먼저 오므로 첫 Document 응답만 기록
+        if event.type_ == cdp.network.ResourceType.DOCUMENT and self.status is None:
+            self.status = event.response.status
+            self.url = event.response.url
+
+
+async def document_status_tracker(tab):
+    """탭마다 한 번만 핸들러를 등록하고 같은 tracker 를 돌려준다."""
+    tracker = getattr(tab, "_document_status_tracker", None)
+    if tracker is None:
+        tracker = DocumentStatusTracker()
+        await tab.send(cdp.network.enable())
+        tab.add_handler(cdp.network.ResponseReceived, tracker.on_response)
+        tab._document_status_tracker = tracker
+    return tracker
+
+
+def classify_page(status, url, title, head):
+    """
+    에러 페이지면 사유 문자열, 정상 페이지면 None.
+    HTTP 상태코드를 먼저 보고, 없을 때만 제목과 <head> 앞부분으로 판단한다.
+    """
+    if url and url.startswith("chrome-error://"):
+        return f"브라우저 오류 페이지 ({url})"
+    # 5xx 는 일시 오류, 429 는 요청 제한, 404/410 은 없는 페이지 (retry_policy 가 이 상태코드로 재시도 방식을 고른다)
+    if status is not None and (status >= 500 or status in (404, 410, 429)):
+        return f"HTTP {status}"
+
+    title = (title or "").strip().lower()
+    if ERROR_TITLE_STATUS.match(title):
+        return f"에러 제목: '{title}'"
+    for marker in ERROR_TITLE_MARKERS:
+        if marker in title:
+            return f"에러 제목: '{title}'"
+
+    head = (head or "")[:HEAD_SCAN_LIMIT].lower()
+    for marker in BROWSER_ERROR_MARKERS:
+        if marker in head:
+            return f"브라우저 오류 문구: '{marker}'"
+    return None
+
+
+async def classify_loaded_page(tab, tracker=None):
+    """로딩이 끝난 탭을 검사해 (사유 또는 None, 검사 소요 ms) 를 돌려준다."""
+    started = time.perf_counter()
+    url, title, head = await tab.evaluate(PAGE_HEAD_JS, return_by_value=True)
+    status = tracker.status if tracker else None
+    reason = classify_page(status, url, title, head)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if DEBUG_PAGE_CHECK:
+        print(f"🩺 페이지 검사 {elapsed_ms:.2f}ms (status={status}, {'정상' if reason is None else reason})")
+    # resource_blocking 으로 차단기가 붙은 탭이면 이 페이지에서 아낀 요청/바이트를 같이 남긴다
+    blocker = getattr(tab, "_resource_blocker", None)
+    if blocker is not None:
+        blocker.report_page()
+    return reason, elapsed_ms
+
+
+async def get_classified(tab, url):
+    """탭으로 url 을 열고 (tab, 에러 사유 또는 None) 을 돌려준다."""
+    tracker = await document_status_tracker(tab)
+    tracker.reset()
+    started = time.perf_counter()
+    page = await tab.get(url)
+    record_page_load(tab, time.perf_counter() - started)
+    reason, _ = await classify_loaded_page(page, tracker)
+    return page, reason
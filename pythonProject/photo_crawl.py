@@ -9,12 +9,31 @@ from datetime import datetime
 from tqdm import tqdm
 from playwright.async_api import async_playwright
 
+from photo_graphql import PhotoGraphqlClient, capture_query_template, load_query_template, save_query_template
+from photo_store import PhotoStore
+
 DB_PATH = "food_merged_final.db"
 TABLE_NAME = "restaurant_merged"
 BUSINESS_ID_COLUMN = "네이버_PLACE_ID_URL"
 MAX_SCROLL = 10
-MIN_DELAY = 1.5
-MAX_DELAY = 3
+
+# 브라우저 하나에 컨텍스트 여러 개, 컨텍스트마다 페이지(동시 작업) 여러 개
+CONTEXT_COUNT = int(os.environ.get("PHOTO_CONTEXT_COUNT", 3))
+PAGES_PER_CONTEXT = int(os.environ.get("PHOTO_PAGES_PER_CONTEXT", 2))
+# 컨텍스트 하나가 이만큼 처리하면 닫고 새로 연다 (브라우저 전체 재시작 대신)
+CONTEXT_RECYCLE_INTERVAL = int(os.environ.get("PHOTO_CONTEXT_RECYCLE_INTERVAL", 50))
+# 페이지 진입 후 첫 photoViewer 응답 / 스크롤 후 다음 응답을 기다리는 최대 시간(초)
+FIRST_RESPONSE_TIMEOUT = float(os.environ.get("PHOTO_FIRST_RESPONSE_TIMEOUT", 10))
+SCROLL_RESPONSE_TIMEOUT = float(os.environ.get("PHOTO_SCROLL_RESPONSE_TIMEOUT", 2))
+# "graphql": 브라우저로 photoViewer 쿼리를 한 번만 캡처하고 나머지는 직접 POST (실패한 업체만 브라우저로)
+# "browser": 예전처럼 모든 업체를 페이지 로딩 + 스크롤로 수집
+FETCH_MODE = os.environ.get("PHOTO_FETCH_MODE", "graphql")
+HTTP_CONCURRENCY = int(os.environ.get("PHOTO_HTTP_CONCURRENCY", 16))
+# 첫 업체로 graphql 요청/응답을 출력해 보는 디버그 모드
+DEBUG_GRAPHQL = os.environ.get("PHOTO_DEBUG_GRAPHQL", "0") == "1"
+
+VIEWPORT = {"width": 1280, "height": 800}
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36"
 
 PHOTO_QUERY_KEY = "photoViewer"
 
@@ -26,111 +45,179 @@ def log_failure(business_id, error=None):
             f.write(f"Error: {error}\n\n")
 
 
-def load_business_ids_range(start=0, end=100):
+def load_business_ids_range(start=0, end=100, batch_size=5000):
+    """
+    start < id <= end 범위의 (id, 업체 ID) 목록. id 기준 keyset 페이지네이션이라 OFFSET 스캔이 없고,
+    중간에 행이 추가/삭제돼도 컨테이너별 담당 범위가 밀리지 않는다.
+    """
     try:
-        import sqlite3
         conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute(f"""
-            SELECT id, {BUSINESS_ID_COLUMN}
-            FROM {TABLE_NAME}
-            WHERE {BUSINESS_ID_COLUMN} IS NOT NULL
-            LIMIT ? OFFSET ?
-        """, (end - start, start))
-        rows = cursor.fetchall()
-        conn.close()
         ids = []
-        for db_id, url in rows:
-            match = re.search(r'/restaurant/(\d+)', url)
-            if match:
-                business_id = match.group(1)
-                ids.append((db_id, business_id))
+        last_id = start
+        while True:
+            rows = conn.execute(f"""
+                SELECT id, {BUSINESS_ID_COLUMN}
+                FROM {TABLE_NAME}
+                WHERE id > ? AND id <= ? AND {BUSINESS_ID_COLUMN} IS NOT NULL
+                ORDER BY id
+                LIMIT ?
+            """, (last_id, end, batch_size)).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            for db_id, url in rows:
+                # main.py 는 /restaurant/{id}, new-crawler.py 는 /place/{id} 로 저장한다
+                match = re.search(r'/(?:restaurant|place)/(\d+)', url)
+                if match:
+                    business_id = match.group(1)
+                    ids.append((db_id, business_id))
+        conn.close()
         return ids
     except Exception as e:
         print(f"❌ DB 접근 오류: {e}")
         return []
 
 
-def save_jsonl(filename, items, output_path):
-    filepath = os.path.join(output_path, filename)
-    with open(filepath, "w", encoding="utf-8") as f:
-        for p in items:
-            f.write(json.dumps(p, ensure_ascii=False) + "\n")
-
-
-def random_delay():
-    delay = random.uniform(MIN_DELAY, MAX_DELAY)
-    time.sleep(delay)
-    return delay
-
-
-async def intercept_and_save_graphql(page, business_id, output_path):
-    """photoViewer GraphQL 응답을 가로채서 사진 정보만 저장 (이벤트 핸들러 내에서 즉시 처리)"""
-    photo_items = []
-    seen_view_ids = set()
-    protocol_error_count = 0
-
-    async def handle_response(response):
-        nonlocal protocol_error_count
+def parse_graphql_text(text):
+    try:
+        data = json.loads(text)
+    except Exception:
+        # 여러 JSON 오브젝트가 콤마로 이어진 경우(비표준 JSONL)
+        data = [json.loads(line) for line in text.splitlines() if line.strip()]
+    return data if isinstance(data, list) else [data]
+
+
+class PhotoCollector:
+    """
+    업체 하나의 photoViewer 응답을 모으는 수집기.
+    응답이 올 때마다 카운터를 올리고 이벤트를 깨워, 스크롤 루프가 고정 sleep 대신 다음 응답을 기다릴 수 있다.
+    응답의 hasNext / cursors / total 필드로 목록 끝을 판단한다.
+    """
+
+    def __init__(self, business_id):
+        self.business_id = business_id
+        self.items = []
+        self.seen_view_ids = set()
+        self.responses = 0
+        self.finished = False
+        self._changed = asyncio.Event()
+
+    def add_payload(self, datas):
+        """파싱된 GraphQL 응답 목록을 반영. photoViewer 응답이 하나라도 있으면 True."""
+        found = False
+        for d in datas:
+            viewer = (d.get('data') or {}).get(PHOTO_QUERY_KEY)
+            if viewer is None:
+                continue
+            found = True
+            for v in viewer if isinstance(viewer, list) else [viewer]:
+                if isinstance(v, dict):
+                    self._add_photos(v.get('photos') or [])
+                    self._check_end(v)
+        if found:
+            self.responses += 1
+            self._changed.set()
+        return found
+
+    def _add_photos(self, photos):
+        for photo in photos:
+            if not isinstance(photo, dict):
+                continue
+            view_id = photo.get("viewId")
+            if view_id and view_id not in self.seen_view_ids:
+                self.seen_view_ids.add(view_id)
+                author = photo.get("author") or {}
+                self.items.append({
+                    "url": photo.get("originalUrl"),
+                    "desc": photo.get("desc"),
+                    "author": author.get("nickname"),
+                    "video": photo.get("video"),
+                    "width": photo.get("width"),
+                    "height": photo.get("height"),
+                    "date": photo.get("date"),
+                    "viewId": view_id
+                })
+
+    def _check_end(self, viewer):
+        for key in ("hasNext", "hasMore"):
+            if viewer.get(key) is False:
+                self.finished = True
+        if "nextCursor" in viewer and not viewer["nextCursor"]:
+            self.finished = True
+        cursors = viewer.get("cursors")
+        if isinstance(cursors, list) and not any(isinstance(c, dict) and c.get("hasNext") for c in cursors):
+            self.finished = True
+        total = viewer.get("total") or viewer.get("totalCount")
+        if isinstance(total, int) and len(self.items) >= total:
+            self.finished = True
+        if not viewer.get("photos"):
+            self.finished = True
+
+    async def wait_for_response(self, after, timeout):
+        """응답 수가 after 를 넘을 때까지 최대 timeout 초 기다린다. 새 응답이 오면 True."""
+        deadline = asyncio.get_running_loop().time() + timeout
+        while self.responses <= after:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                return False
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+
+class ResponseRouter:
+    """
+    페이지마다 한 번만 등록하는 response 핸들러. 지금 처리 중인 업체의 collector 로만 응답을 넘긴다.
+    요청 body 로 photoViewer 쿼리인지, 현재 업체의 businessId 인지 먼저 확인하고 맞는 응답만 JSON 파싱하므로
+    업체를 몇 개 처리했든 응답 하나당 비용이 같다. 이전 업체의 늦게 도착한 응답은 버린다.
+    """
+
+    def __init__(self, page):
+        self.collector = None
+        self.dropped = 0
+        page.on('response', self.handle_response)
+
+    def route_to(self, collector):
+        self.collector = collector
+
+    def _target(self, request):
+        collector = self.collector
+        if collector is None:
+            return None
+        post_data = request.post_data
+        if not post_data or PHOTO_QUERY_KEY not in post_data:
+            return None
+        if f'"{collector.business_id}"' not in post_data:
+            self.dropped += 1
+            return None
+        return collector
+
+    async def handle_response(self, response):
         try:
-            if 'graphql' in response.url and response.request.method == 'POST':
-                try:
-                    text = await response.text()
-                except Exception as e:
-                    protocol_error_count += 1
-                    print(f"파싱 실패(즉시): {e}")
-                    return
-                try:
-                    data = json.loads(text)
-                except Exception:
-                    # 여러 JSON 오브젝트가 콤마로 이어진 경우(비표준 JSONL)
-                    try:
-                        data = [json.loads(line) for line in text.splitlines() if line.strip()]
-                    except Exception as e:
-                        print(f"JSON 파싱 실패: {e}")
-                        return
-                if isinstance(data, list):
-                    datas = data
-                else:
-                    datas = [data]
-                photo_found = False
-                for d in datas:
-                    viewer = d.get('data', {}).get(PHOTO_QUERY_KEY, {})
-                    if isinstance(viewer, list):
-                        viewers = viewer
-                    else:
-                        viewers = [viewer]
-                    for v in viewers:
-                        photos = v.get('photos', [])
-                        if photos:
-                            photo_found = True
-                            for photo in photos:
-                                if not isinstance(photo, dict):
-                                    continue
-                                view_id = photo.get("viewId")
-                                if view_id and view_id not in seen_view_ids:
-                                    seen_view_ids.add(view_id)
-                                    author = photo.get("author") or {}
-                                    photo_items.append({
-                                        "url": photo.get("originalUrl"),
-                                        "desc": photo.get("desc"),
-                                        "author": author.get("nickname"),
-                                        "video": photo.get("video"),
-                                        "width": photo.get("width"),
-                                        "height": photo.get("height"),
-                                        "date": photo.get("date"),
-                                        "viewId": view_id
-                                    })
-                if not photo_found:
-                    print(f"⚠️ 수집된 사진 없음")
+            if 'graphql' not in response.url or response.request.method != 'POST':
+                return
+            collector = self._target(response.request)
+            if collector is None:
+                return
+            try:
+                text = await response.text()
+            except Exception as e:
+                print(f"파싱 실패(즉시): {e}")
+                return
+            try:
+                datas = parse_graphql_text(text)
+            except Exception as e:
+                print(f"JSON 파싱 실패: {e}")
+                return
+            # 본문을 기다리는 사이 다음 업체로 넘어갔으면 버린다
+            if collector is self.collector:
+                collector.add_payload(datas)
         except Exception as e:
             print(f"파싱 실패(핸들러): {e}")
 
-    page.on('response', handle_response)
-    # 스크롤 및 네트워크 응답 대기
-    await asyncio.sleep(0.5)  # 첫 로딩 대기
-    return photo_items
-
 
 async def debug_graphql_network(page, business_id):
     async def on_request(request):
@@ -174,10 +261,188 @@ async def block_images(context):
     await context.route("**/*", handle_route)
 
 
+class CrawlStats:
+    """처리 결과 카운트 + 진행 바에 분당 처리량을 실시간으로 표시"""
+
+    def __init__(self, total):
+        self.total = total
+        self.success = 0
+        self.skip = 0
+        self.error = 0
+        self.photos = 0
+        self.recycled = 0
+        self.started = time.time()
+        self.bar = tqdm(total=total, desc="📦 범위 내 업체 처리")
+
+    def per_minute(self):
+        elapsed = time.time() - self.started
+        done = self.success + self.skip + self.error
+        return done / elapsed * 60 if elapsed > 0 else 0.0
+
+    def record(self, kind, photos=0):
+        setattr(self, kind, getattr(self, kind) + 1)
+        self.photos += photos
+        self.bar.update(1)
+        self.bar.set_postfix(
+            per_min=f"{self.per_minute():.1f}", ok=self.success, skip=self.skip, fail=self.error, photos=self.photos
+        )
+
+    def close(self):
+        self.bar.close()
+
+
+async def launch_browser(p):
+    return await p.chromium.launch(headless=False)
+
+
+async def new_crawl_context(browser):
+    context = await browser.new_context(viewport=VIEWPORT, user_agent=USER_AGENT)
+    await block_images(context)
+    return context
+
+
+async def crawl_business(page, router, db_id, business_id, store):
+    """
+    업체 하나의 사진 목록을 수집해 저장하고 수집한 사진 수를 돌려준다.
+    스크롤할 때마다 다음 photoViewer 응답을 기다리고, 응답에서 목록 끝이 확인되면 바로 멈춘다.
+    """
+    collector = PhotoCollector(business_id)
+    router.route_to(collector)
+    url = f"https://m.place.naver.com/restaurant/{business_id}/photo"
+    await page.goto(url, wait_until="domcontentloaded")
+
+    # 첫 photoViewer 응답이 없으면 사진이 없는 업체
+    if await collector.wait_for_response(0, FIRST_RESPONSE_TIMEOUT):
+        # 스크롤 다운 반복 (사진 더보기 로딩)
+        idle_scrolls = 0
+        for _ in range(MAX_SCROLL):
+            if collector.finished:
+                break
+            seen = collector.responses
+            await page.mouse.wheel(0, 1000)
+            if await collector.wait_for_response(seen, SCROLL_RESPONSE_TIMEOUT):
+                idle_scrolls = 0
+            else:
+                idle_scrolls += 1
+                if idle_scrolls >= 2:
+                    break
+
+    router.route_to(None)
+
+    # 사진 저장
+    if collector.items:
+        store.add(db_id, business_id, collector.items)
+    return len(collector.items)
+
+
+async def graphql_worker(client, queue, browser_queue, stats, store):
+    """큐의 업체를 GraphQL 직접 요청으로 처리한다. HTTP 로 못 받은 업체는 browser_queue 로 넘긴다."""
+    while True:
+        try:
+            db_id, business_id = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        collector = PhotoCollector(business_id)
+        try:
+            fetched = await client.fetch_photos(collector)
+        except Exception as e:
+            print(f"⚠️ GraphQL 처리 오류({business_id}): {e}")
+            fetched = False
+        if not fetched:
+            browser_queue.put_nowait((db_id, business_id))
+            continue
+        if collector.items:
+            store.add(db_id, business_id, collector.items)
+        stats.record("success" if collector.items else "skip", len(collector.items))
+
+
+async def prepare_query_template(p, browser_ref, business_ids):
+    """저장된 photoViewer 쿼리 템플릿을 읽고, 없으면 브라우저로 앞쪽 업체 몇 개를 열어 한 번 캡처한다."""
+    template = load_query_template()
+    if template is not None:
+        print(f"📄 저장된 photoViewer 쿼리 템플릿 사용 ({template.get('captured_at')} 캡처)")
+        return template
+
+    print("🎯 photoViewer 쿼리 템플릿 캡처 중...")
+    browser_ref[0] = await launch_browser(p)
+    context = await new_crawl_context(browser_ref[0])
+    try:
+        page = await context.new_page()
+        for _, business_id in business_ids[:3]:
+            template = await capture_query_template(page, business_id, FIRST_RESPONSE_TIMEOUT)
+            if template is not None:
+                save_query_template(template)
+                return template
+    finally:
+        await context.close()
+    print("⚠️ photoViewer 쿼리를 캡처하지 못했습니다. 브라우저 수집으로 진행합니다.")
+    return None
+
+
+async def page_worker(page, queue, stats, store, budget):
+    """공유 큐에서 업체를 꺼내 처리한다. 컨텍스트 처리 한도(budget)를 다 쓰면 멈춘다."""
+    router = ResponseRouter(page)
+    while budget["left"] > 0:
+        try:
+            db_id, business_id = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        budget["left"] -= 1
+        try:
+            photos = await crawl_business(page, router, db_id, business_id, store)
+            stats.record("success" if photos else "skip", photos)
+        except Exception as e:
+            log_failure(business_id, error=str(e))
+            stats.record("error")
+            await asyncio.sleep(random.uniform(3, 5))
+
+
+async def context_worker(p, browser_ref, browser_lock, queue, stats, store):
+    """
+    컨텍스트 하나를 열고 PAGES_PER_CONTEXT 개 페이지로 큐를 나눠 처리한다.
+    CONTEXT_RECYCLE_INTERVAL 만큼 처리하면 컨텍스트만 닫고 새로 열어 이어서 처리한다.
+    """
+    while not queue.empty():
+        async with browser_lock:
+            # 브라우저가 죽었으면 처음 발견한 워커가 한 번만 다시 띄운다
+            if browser_ref[0] is None:
+                browser_ref[0] = await launch_browser(p)
+            elif not browser_ref[0].is_connected():
+                print("💥 브라우저 연결 끊김 → 재실행")
+                browser_ref[0] = await launch_browser(p)
+            browser = browser_ref[0]
+        context = None
+        budget = {"left": CONTEXT_RECYCLE_INTERVAL}
+        try:
+            context = await new_crawl_context(browser)
+            pages = [await context.new_page() for _ in range(PAGES_PER_CONTEXT)]
+            await asyncio.gather(*(page_worker(page, queue, stats, store, budget) for page in pages))
+        except Exception as e:
+            print(f"❌ 컨텍스트 오류: {e}")
+            if context is None:
+                # 확인 직후 브라우저가 죽은 경우: 다음 루프에서 다시 띄우도록 비워 둔다 (다른 워커가 이미 바꿨으면 그대로)
+                async with browser_lock:
+                    if browser_ref[0] is browser:
+                        browser_ref[0] = None
+                        try:
+                            await browser.close()
+                        except Exception:
+                            pass
+            await asyncio.sleep(random.uniform(3, 5))
+        finally:
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception:
+                    pass
+        if not queue.empty():
+            stats.recycled += 1
+
+
 async def main():
     start = int(os.environ.get("START_INDEX", 0))
     end = int(os.environ.get("END_INDEX", 100))
-    print(f"📦 현재 컨테이너는 {start} ~ {end} 범위를 담당합니다.")
+    print(f"📦 현재 컨테이너는 id {start} 초과 ~ {end} 이하 범위를 담당합니다.")
 
     business_ids = load_business_ids_range(start, end)
     if not business_ids:
@@ -185,95 +450,64 @@ async def main():
         return
 
     total = len(business_ids)
-    print(f"🔢 총 {total}개 업체를 처리합니다.")
+    print(f"🔢 총 {total}개 업체를 처리합니다. (모드 {FETCH_MODE}, 컨텍스트 {CONTEXT_COUNT}개 x 페이지 {PAGES_PER_CONTEXT}개)")
 
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-    output_path = os.path.join(BASE_DIR, "crawl_photo")
-    os.makedirs(output_path, exist_ok=True)
+    # 사진 메타데이터는 crawl_photo/shard=NN/*.parquet 로 모은다 (python photo_store.py 로 DB 적재)
+    store = PhotoStore(os.path.join(BASE_DIR, "crawl_photo"))
 
-    success_count = 0
-    skip_count = 0
-    error_count = 0
+    queue = asyncio.Queue()
+    for item in business_ids:
+        queue.put_nowait(item)
 
-    BROWSER_RESTART_INTERVAL = 50
     print("🌐 Playwright 초기화 중...")
     async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=False)
-        context = await browser.new_context(
-            viewport={"width": 1280, "height": 800},
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36"
-        )
-        await block_images(context)
-        page = await context.new_page()
+        # 브라우저는 필요해질 때(쿼리 캡처 / 브라우저 수집) 처음 띄운다
+        browser_ref = [None]
 
-        # 첫 업체에 대해 네트워크 graphql 감지 디버깅
-        if business_ids:
+        # 첫 업체에 대해 네트워크 graphql 감지 디버깅 (PHOTO_DEBUG_GRAPHQL=1)
+        if DEBUG_GRAPHQL:
             first_db_id, first_business_id = business_ids[0]
             print(f"🔎 첫 업체({first_business_id}) 네트워크 graphql 감지 테스트...")
-            await debug_graphql_network(page, first_business_id)
-            print("✅ 네트워크 감지 테스트 종료. 이후 코드 진행하려면 debug_graphql_network 호출을 주석 처리하세요.")
+            browser_ref[0] = await launch_browser(p)
+            debug_context = await new_crawl_context(browser_ref[0])
+            await debug_graphql_network(await debug_context.new_page(), first_business_id)
+            await debug_context.close()
+            print("✅ 네트워크 감지 테스트 종료.")
 
-        for i, (db_id, business_id) in enumerate(tqdm(business_ids, desc="📦 범위 내 업체 처리")):
-            try:
-                print(f"\n🚀 크롤링 시작: {business_id} (DB ID={db_id})")
-                photo_items = await intercept_and_save_graphql(page, business_id, output_path)
-                url = f"https://m.place.naver.com/restaurant/{business_id}/photo"
-                await page.goto(url, wait_until="networkidle")
-
-                # 스크롤 다운 반복 (사진 더보기 로딩)
-                no_new_graphql_count = 0
-                last_photo_count = len(photo_items)
-                for scroll_num in range(MAX_SCROLL):
-                    await page.mouse.wheel(0, 1000)
-                    await asyncio.sleep(0.3)
-                    print(f"⏬ 스크롤 다운 {scroll_num+1}/{MAX_SCROLL}")
-                    if len(photo_items) == last_photo_count:
-                        no_new_graphql_count += 1
-                    else:
-                        no_new_graphql_count = 0
-                    last_photo_count = len(photo_items)
-                    if scroll_num >= 2 and no_new_graphql_count >= 2:
-                        print('⏹️ 더 이상 새로운 GraphQL 응답이 없습니다. 스크롤 종료.')
-                        break
-
-                # 사진 저장
-                if photo_items:
-                    filename = f"{db_id}_photo_{business_id}.jsonl"
-                    save_jsonl(filename, photo_items, output_path)
-                    print(f"✅ 저장 완료: {filename} ({len(photo_items)}장)")
-                    success_count += 1
-                else:
-                    print(f"⚠️ 수집된 사진 없음")
-                    skip_count += 1
-
-                # N개마다 브라우저 재시작
-                if (i + 1) % BROWSER_RESTART_INTERVAL == 0:
-                    await page.close()
-                    await context.close()
-                    await browser.close()
-                    print(f'🔄 브라우저 재시작: {i+1}번째 업체까지 완료')
-                    browser = await p.chromium.launch(headless=False)
-                    context = await browser.new_context(
-                        viewport={"width": 1280, "height": 800},
-                        user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36"
-                    )
-                    await block_images(context)
-                    page = await context.new_page()
-
-            except Exception as e:
-                print(f"❌ 예외 발생: {e}")
-                log_failure(business_id, error=str(e))
-                error_count += 1
-                time.sleep(random.uniform(3, 5))
-                continue
-
-        await browser.close()
+        template = await prepare_query_template(p, browser_ref, business_ids) if FETCH_MODE == "graphql" else None
 
+        stats = CrawlStats(total)
+        browser_lock = asyncio.Lock()
+        try:
+            browser_queue = queue
+            if template is not None:
+                browser_queue = asyncio.Queue()
+                async with PhotoGraphqlClient(template, concurrency=HTTP_CONCURRENCY) as client:
+                    await asyncio.gather(*(
+                        graphql_worker(client, queue, browser_queue, stats, store)
+                        for _ in range(HTTP_CONCURRENCY)
+                    ))
+                if not browser_queue.empty():
+                    print(f"🧭 GraphQL 로 받지 못한 {browser_queue.qsize()}개 업체는 브라우저로 수집합니다.")
+
+            await asyncio.gather(*(
+                context_worker(p, browser_ref, browser_lock, browser_queue, stats, store)
+                for _ in range(CONTEXT_COUNT)
+            ))
+        finally:
+            stats.close()
+            store.close()
+            if browser_ref[0] is not None:
+                await browser_ref[0].close()
+
+    elapsed = time.time() - stats.started
     print("\n📊 크롤링 요약")
     print(f"🔢 전체 업체 수: {total}")
-    print(f"✅ 성공: {success_count}")
-    print(f"⚠️ 스킵: {skip_count}")
-    print(f"❌ 실패: {error_count}")
+    print(f"✅ 성공: {stats.success}")
+    print(f"⚠️ 스킵: {stats.skip}")
+    print(f"❌ 실패: {stats.error}")
+    print(f"⏱️ {elapsed:.1f}초, 분당 {stats.per_minute():.1f}개 업체 / 사진 {stats.photos}장 (컨텍스트 교체 {stats.recycled}회)")
 
 if __name__ == "__main__":
     asyncio.run(main())
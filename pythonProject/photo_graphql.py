@@ -0,0 +1,316 @@
+import asyncio
+import copy
+import json
+import os
+import sys
+import time
+
+import aiohttp
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# 브라우저에서 한 번 잡아 둔 photoViewer 요청(url / 헤더 / body). 지우면 다음 실행 때 다시 캡처한다.
+QUERY_TEMPLATE_PATH = os.environ.get("PHOTO_QUERY_TEMPLATE", os.path.join(BASE_DIR, "photo_query_template.json"))
+# 테스트 시 녹화한 응답을 내려주는 로컬 서버로 바꿔 끼울 수 있도록 (비워 두면 템플릿의 url 사용)
+GRAPHQL_URL = os.environ.get("PHOTO_GRAPHQL_URL", "")
+# 지정하면 받은 응답을 {business_id}_{page}.json 으로 남긴다 (replay 서버 입력)
+RECORD_DIR = os.environ.get("PHOTO_RECORD_DIR", "")
+MAX_PAGES = int(os.environ.get("PHOTO_GRAPHQL_MAX_PAGES", 30))
+# 성공 없이 서로 다른 업체가 이만큼 실패하면 템플릿(쿠키/해시)이 만료된 것으로 보고 잠시 브라우저로 넘긴다
+FAILURE_STREAK_LIMIT = 5
+# 템플릿을 끈 뒤 이 시간(초)이 지나면 다시 직접 요청을 시도한다. 그때 첫 업체가 또 실패하면 바로 다시 끈다
+TEMPLATE_COOLDOWN = float(os.environ.get("PHOTO_GRAPHQL_COOLDOWN", 300))
+
+PHOTO_QUERY_KEY = "photoViewer"
+# 요청 헤더 중 aiohttp 가 다시 계산하거나 연결마다 달라지는 것은 저장하지 않는다
+DROP_HEADERS = {"content-length", "host", "connection", "accept-encoding"}
+# 응답이 nextCursor 한 개만 주는 형태일 때 요청 input 에서 커서를 넣을 키 후보
+CURSOR_INPUT_KEYS = ("cursor", "after")
+
+
+def photo_page_url(business_id):
+    return f"https://m.place.naver.com/restaurant/{business_id}/photo"
+
+
+async def capture_query_template(page, business_id, timeout=10):
+    """
+    업체 사진 페이지를 한 번 열어 브라우저가 보내는 photoViewer POST 를 그대로 잡아 템플릿으로 돌려준다.
+    timeout 안에 요청이 없으면 None.
+    """
+    captured = asyncio.get_running_loop().create_future()
+
+    async def on_request(request):
+        if captured.done() or "graphql" not in request.url or request.method != "POST":
+            return
+        post_data = request.post_data
+        if not post_data or PHOTO_QUERY_KEY not in post_data:
+            return
+        try:
+            headers = await request.all_headers()
+            captured.set_result({
+                "url": request.url,
+                "headers": {k: v for k, v in headers.items() if not k.startswith(":") and k.lower() not in DROP_HEADERS},
+                "body": json.loads(post_data),
+                "business_id": str(business_id),
+                "captured_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            })
+        except Exception as e:
+            if not captured.done():
+                captured.set_exception(e)
+
+    page.on("request", on_request)
+    try:
+        await page.goto(photo_page_url(business_id), wait_until="domcontentloaded")
+        return await asyncio.wait_for(captured, timeout)
+    except Exception as e:
+        print(f"⚠️ photoViewer 요청 캡처 실패({business_id}): {e}")
+        return None
+    finally:
+        page.remove_listener("request", on_request)
+
+
+def save_query_template(template, path=QUERY_TEMPLATE_PATH):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(template, f, ensure_ascii=False, indent=2)
+    print(f"💾 photoViewer 쿼리 템플릿 저장: {path}")
+
+
+def load_query_template(path=QUERY_TEMPLATE_PATH):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def find_photo_input(node):
+    """쿼리 variables 안에서 businessId 를 가진 dict(= photoViewer input)를 찾는다."""
+    if isinstance(node, dict):
+        if "businessId" in node:
+            return node
+        children = node.values()
+    elif isinstance(node, list):
+        children = node
+    else:
+        return None
+    for child in children:
+        found = find_photo_input(child)
+        if found is not None:
+            return found
+    return None
+
+
+def photo_operations(body):
+    """배치 요청([op, op, ...])이면 photoViewer 쿼리만 남긴다."""
+    if isinstance(body, list):
+        return [op for op in body if PHOTO_QUERY_KEY in json.dumps(op, ensure_ascii=False)]
+    return body
+
+
+def build_request_body(template_body, business_id, cursor_state=None):
+    """템플릿 body 를 복사해 businessId 와 (두 번째 페이지부터) 커서 값을 바꿔 끼운다."""
+    body = photo_operations(copy.deepcopy(template_body))
+    for op in body if isinstance(body, list) else [body]:
+        photo_input = find_photo_input(op.get("variables"))
+        if photo_input is None:
+            continue
+        photo_input["businessId"] = str(business_id)
+        if cursor_state:
+            photo_input.update(cursor_state)
+    return body
+
+
+def next_cursor_state(viewer, template_body):
+    """
+    응답의 커서로 다음 요청 input 에 넣을 값을 만든다. 더 받을 페이지가 없으면 None.
+    - cursors: [{id, hasNext, lastCursor, ...}] 처럼 출처별 커서 목록이면 그대로 돌려보낸다
+    - nextCursor 하나면 템플릿 input 에 있던 커서 키(cursor / after)에 넣는다
+    """
+    cursors = viewer.get("cursors")
+    if isinstance(cursors, list):
+        cursors = [c for c in cursors if isinstance(c, dict)]
+        if not any(c.get("hasNext") for c in cursors):
+            return None
+        return {"cursors": [{k: v for k, v in c.items() if k != "__typename"} for c in cursors]}
+
+    next_cursor = viewer.get("nextCursor")
+    if next_cursor and viewer.get("hasNext", True) is not False:
+        template_input = find_photo_input(template_body) or {}
+        key = next((k for k in CURSOR_INPUT_KEYS if k in template_input), CURSOR_INPUT_KEYS[0])
+        return {key: next_cursor}
+    return None
+
+
+def photo_viewers(datas):
+    for d in datas:
+        viewer = (d.get("data") or {}).get(PHOTO_QUERY_KEY) if isinstance(d, dict) else None
+        for v in viewer if isinstance(viewer, list) else [viewer]:
+            if isinstance(v, dict):
+                yield v
+
+
+class PhotoGraphqlClient:
+    """
+    캡처해 둔 photoViewer 쿼리를 업체마다 businessId / 커서만 바꿔 aiohttp 로 직접 POST 한다.
+    페이지 렌더링, 스크롤, 이미지 차단 없이 커서가 끝날 때까지 응답을 collector(PhotoCollector)에 넘긴다.
+    """
+
+    def __init__(self, template, concurrency=16, timeout=10, retries=2, delay=1, max_pages=MAX_PAGES, record_dir=RECORD_DIR):
+        self.template = template
+        self.url = GRAPHQL_URL or template["url"]
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.delay = delay
+        self.max_pages = max_pages
+        self.record_dir = record_dir
+        self.session = None
+        # 마지막 성공 이후 실패한 업체들. 워커 16개가 동시에 돌아서 단순 연속 횟수로는 업체 하나의 재시도와
+        # 여러 업체의 일시적 실패가 섞이므로, 서로 다른 업체 수로 센다
+        self.failed_businesses = set()
+        self.disabled_until = 0.0
+        self.tripped = False
+        self.stats = {"requests": 0, "businesses": 0, "fallback": 0, "seconds": 0.0}
+
+    async def open(self):
+        connector = aiohttp.TCPConnector(limit=self.concurrency, ttl_dns_cache=300)
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers=self.template.get("headers", {}),
+        )
+        if self.record_dir:
+            os.makedirs(self.record_dir, exist_ok=True)
+        return self
+
+    async def close(self):
+        if self.session is None:
+            return
+        await self.session.close()
+        self.session = None
+        if self.stats["requests"]:
+            avg_ms = self.stats["seconds"] / self.stats["requests"] * 1000
+            print(f"🌐 GraphQL 직접 수집 {self.stats['businesses']}개 업체 / 요청 {self.stats['requests']}회"
+                  f" (평균 {avg_ms:.0f}ms) / 브라우저 대체 {self.stats['fallback']}건")
+
+    @property
+    def disabled(self):
+        return time.monotonic() < self.disabled_until
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def post(self, business_id, body):
+        """(응답 원문, 파싱된 응답 목록) 을 돌려준다. 200 이 아니거나 JSON 이 아니면 retries 만큼 재시도 후 (None, None)."""
+        headers = {"Referer": photo_page_url(business_id)}
+        for attempt in range(self.retries + 1):
+            started = time.perf_counter()
+            try:
+                async with self.session.post(self.url, json=body, headers=headers) as response:
+                    text = await response.text()
+                    if response.status != 200:
+                        print(f"⚠️ GraphQL 응답 {response.status} {attempt+1}/{self.retries + 1}: {business_id}")
+                        await asyncio.sleep(self.delay)
+                        continue
+                    data = json.loads(text)
+                self.stats["requests"] += 1
+                self.stats["seconds"] += time.perf_counter() - started
+                return text, data if isinstance(data, list) else [data]
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                print(f"⚠️ GraphQL 요청 실패 {attempt+1}/{self.retries + 1}: {business_id} → {e}")
+                await asyncio.sleep(self.delay)
+        return None, None
+
+    def record(self, business_id, page_no, text):
+        path = os.path.join(self.record_dir, f"{business_id}_{page_no}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    async def fetch_photos(self, collector):
+        """
+        collector.business_id 의 사진을 커서가 끝날 때까지 받아 collector 에 채운다.
+        HTTP 로 끝까지 받았으면 True, 템플릿이 안 맞거나 요청이 실패하면 False (호출 측에서 브라우저로 대체).
+        """
+        if self.disabled:
+            self.stats["fallback"] += 1
+            return False
+
+        business_id = collector.business_id
+        template_body = self.template["body"]
+        cursor_state = None
+        for page_no in range(self.max_pages):
+            body = build_request_body(template_body, business_id, cursor_state)
+            text, datas = await self.post(business_id, body)
+            viewers = list(photo_viewers(datas)) if datas else []
+            if not viewers:
+                self._failed(business_id)
+                return False
+            self.failed_businesses.clear()
+            self.tripped = False
+            if self.record_dir:
+                self.record(business_id, page_no, text)
+
+            collector.add_payload(datas)
+            cursor_state = next_cursor_state(viewers[-1], template_body)
+            if collector.finished or cursor_state is None:
+                break
+
+        self.stats["businesses"] += 1
+        return True
+
+    def _failed(self, business_id):
+        self.stats["fallback"] += 1
+        self.failed_businesses.add(business_id)
+        if self.disabled:
+            return
+        # 쿨다운 뒤 다시 켠 상태(tripped)에서 성공 없이 실패하면 템플릿이 여전히 안 맞는 것으로 보고 바로 다시 끈다
+        if self.tripped or len(self.failed_businesses) >= FAILURE_STREAK_LIMIT:
+            print(f"🛑 GraphQL 직접 요청이 성공 없이 업체 {len(self.failed_businesses)}곳 연속 실패 → 템플릿 만료로 보고"
+                  f" {TEMPLATE_COOLDOWN:.0f}초 동안 브라우저로 전환 ({QUERY_TEMPLATE_PATH} 를 지우면 다음 실행 때 다시 캡처)")
+            self.disabled_until = time.monotonic() + TEMPLATE_COOLDOWN
+            self.failed_businesses.clear()
+            self.tripped = True
+
+
+async def serve_recorded(directory, port=8765):
+    """
+    PHOTO_RECORD_DIR 로 녹화한 {business_id}_{page}.json 을 요청 순서대로 내려주는 로컬 GraphQL 서버.
+    PHOTO_GRAPHQL_URL=http://127.0.0.1:{port}/graphql 로 photo_crawl.py 를 네트워크 없이 돌려볼 수 있다.
+    """
+    from aiohttp import web
+
+    served = {}
+
+    async def graphql(request):
+        body = await request.json()
+        business_id = str((find_photo_input(body) or {}).get("businessId"))
+        page_no = served.get(business_id, 0)
+        path = os.path.join(directory, f"{business_id}_{page_no}.json")
+        if not os.path.exists(path):
+            return web.json_response({"errors": [{"message": f"녹화 없음: {business_id}_{page_no}"}]}, status=404)
+        served[business_id] = page_no + 1
+        with open(path, encoding="utf-8") as f:
+            return web.Response(text=f.read(), content_type="application/json")
+
+    app = web.Application()
+    app.router.add_post("/graphql", graphql)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    print(f"🎞️ 녹화 응답 서버: http://127.0.0.1:{port}/graphql ({directory})")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    # 사용법: python photo_graphql.py replay [녹화 디렉토리] [포트]
+    if len(sys.argv) < 2 or sys.argv[1] != "replay":
+        print("사용법: python photo_graphql.py replay [녹화 디렉토리] [포트]")
+        sys.exit(1)
+    asyncio.run(serve_recorded(
+        sys.argv[2] if len(sys.argv) > 2 else "photo_graphql_record",
+        int(sys.argv[3]) if len(sys.argv) > 3 else 8765,
+    ))
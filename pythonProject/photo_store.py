@@ -0,0 +1,247 @@
+import glob
+import os
+import re
+import sqlite3
+import sys
+import time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from jsonl_sink import iter_file_records
+
+DB_PATH = "food_merged_final.db"
+STORE_DIR = "crawl_photo"
+# restaurant_id % SHARD_COUNT 로 나눈 shard 디렉토리마다 실행당 파일 하나(ROWS_PER_FILE 마다 다음 파일)
+# 실행 중에는 .arrows (Arrow IPC stream) 로 쓰고, 파일을 닫을 때 parquet 로 옮긴다
+SHARD_COUNT = int(os.environ.get("PHOTO_STORE_SHARDS", 16))
+ROW_GROUP_SIZE = int(os.environ.get("PHOTO_STORE_ROW_GROUP", 20000))
+ROWS_PER_FILE = int(os.environ.get("PHOTO_STORE_ROWS_PER_FILE", 500000))
+BATCH_SIZE = 5000
+STREAM_SUFFIX = ".arrows"
+
+PHOTO_SCHEMA = pa.schema([
+    ("restaurant_id", pa.int64()),
+    ("business_id", pa.string()),
+    ("view_id", pa.string()),
+    ("url", pa.string()),
+    ("description", pa.string()),
+    ("author", pa.string()),
+    ("width", pa.int32()),
+    ("height", pa.int32()),
+    ("date", pa.string()),
+])
+# 업체/작성자/날짜처럼 반복되는 값은 parquet 딕셔너리 인코딩으로 한 번만 저장
+DICTIONARY_COLUMNS = ["business_id", "author", "date"]
+
+# 예전 save_jsonl 출력: {db_id}_photo_{business_id}.jsonl
+LEGACY_FILE = re.compile(r"(\d+)_photo_(\d+)\.jsonl$")
+
+
+def to_int(value):
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def photo_row(restaurant_id, business_id, item):
+    return {
+        "restaurant_id": int(restaurant_id),
+        "business_id": str(business_id),
+        "view_id": item.get("viewId"),
+        "url": item.get("url"),
+        "description": item.get("desc"),
+        "author": item.get("author"),
+        "width": to_int(item.get("width")),
+        "height": to_int(item.get("height")),
+        "date": item.get("date"),
+    }
+
+
+class PhotoStore:
+    """
+    업체별 사진 목록을 shard 별로 모으는 저장소.
+    실행 중에는 add() 한 번(업체 하나)마다 shard 의 Arrow IPC stream 파일(.arrows)에 배치로 이어 쓰고 flush 한다.
+    stream 은 끝(footer) 없이도 읽을 수 있어서, 중간에 죽어도 마지막으로 다 쓴 업체까지는 남는다.
+    파일이 ROWS_PER_FILE 행을 넘거나 close() 할 때 zstd parquet 로 옮겨 적고 stream 은 지운다.
+    (옮기지 못하고 남은 stream 은 load_photo_store 가 그대로 읽는다)
+    """
+
+    def __init__(self, directory=STORE_DIR, shards=SHARD_COUNT, row_group_size=ROW_GROUP_SIZE, rows_per_file=ROWS_PER_FILE):
+        self.directory = directory
+        self.shards = shards
+        self.row_group_size = row_group_size
+        self.rows_per_file = rows_per_file
+        self.run_tag = time.strftime("%Y%m%d%H%M%S") + f"-{os.getpid()}-{time.time_ns() % 1000000:06d}"
+        self.writers = {}
+        self.file_rows = {}
+        self.file_seq = {}
+        self.rows = 0
+
+    def add(self, restaurant_id, business_id, items):
+        if not items:
+            return
+        shard = int(restaurant_id) % self.shards
+        batch = pa.RecordBatch.from_pylist(
+            [photo_row(restaurant_id, business_id, item) for item in items], schema=PHOTO_SCHEMA,
+        )
+        writer, file, _ = self.writers[shard] if shard in self.writers else self._open(shard)
+        writer.write_batch(batch)
+        file.flush()
+        self.rows += len(items)
+        self.file_rows[shard] += len(items)
+        if self.file_rows[shard] >= self.rows_per_file:
+            self._close_file(shard)
+
+    def _open(self, shard):
+        seq = self.file_seq.get(shard, 0)
+        self.file_seq[shard] = seq + 1
+        shard_dir = os.path.join(self.directory, f"shard={shard:02d}")
+        os.makedirs(shard_dir, exist_ok=True)
+        path = os.path.join(shard_dir, f"part-{self.run_tag}-{seq:03d}")
+        file = open(path + STREAM_SUFFIX, "wb")
+        self.writers[shard] = (pa.ipc.new_stream(file, PHOTO_SCHEMA), file, path)
+        self.file_rows[shard] = 0
+        return self.writers[shard]
+
+    def _close_file(self, shard):
+        writer, file, path = self.writers.pop(shard)
+        writer.close()
+        file.close()
+        stream_to_parquet(path + STREAM_SUFFIX, path + ".parquet", self.row_group_size)
+
+    def close(self):
+        for shard in list(self.writers):
+            self._close_file(shard)
+        print(f"🗂️ 사진 {self.rows}장 parquet 저장 ({self.directory}, shard {self.shards}개)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def iter_stream_batches(path):
+    """.arrows stream 을 배치 단위로 읽는다. 비정상 종료로 끝이 잘렸으면 마지막 온전한 배치까지만 돌려준다."""
+    with open(path, "rb") as f:
+        try:
+            for batch in pa.ipc.open_stream(f):
+                yield batch
+        except (pa.ArrowInvalid, OSError) as e:
+            print(f"⚠️ 끝이 잘린 stream, 읽은 데까지만 사용: {path} → {e}")
+
+
+def stream_to_parquet(stream_path, parquet_path, row_group_size=ROW_GROUP_SIZE):
+    """stream 을 row_group_size 행씩 parquet 로 옮긴다. .tmp 로 쓰고 이름을 바꾼 뒤에야 stream 을 지운다."""
+    writer = pq.ParquetWriter(
+        parquet_path + ".tmp", PHOTO_SCHEMA, compression="zstd", use_dictionary=DICTIONARY_COLUMNS,
+    )
+    pending, pending_rows = [], 0
+    for batch in iter_stream_batches(stream_path):
+        pending.append(batch)
+        pending_rows += batch.num_rows
+        if pending_rows >= row_group_size:
+            writer.write_table(pa.Table.from_batches(pending, schema=PHOTO_SCHEMA))
+            pending, pending_rows = [], 0
+    if pending:
+        writer.write_table(pa.Table.from_batches(pending, schema=PHOTO_SCHEMA))
+    writer.close()
+    os.replace(parquet_path + ".tmp", parquet_path)
+    os.remove(stream_path)
+
+
+def rows_from_batch(batch):
+    return list(zip(*(column.to_pylist() for column in batch.columns)))
+
+
+def iter_store_batches(directory, batch_size=BATCH_SIZE):
+    for path in sorted(glob.glob(os.path.join(directory, "shard=*", "*.parquet"))):
+        print(f"🔍 처리 중: {os.path.relpath(path, directory)}")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size, columns=PHOTO_SCHEMA.names):
+            yield rows_from_batch(batch)
+    # parquet 로 옮겨지기 전에 크롤러가 죽어 남은 stream (읽을 수 있는 배치까지)
+    for path in sorted(glob.glob(os.path.join(directory, "shard=*", "*" + STREAM_SUFFIX))):
+        print(f"🩹 남은 stream 처리 중: {os.path.relpath(path, directory)}")
+        for batch in iter_stream_batches(path):
+            yield rows_from_batch(batch)
+
+
+def iter_legacy_batches(directory, batch_size=BATCH_SIZE):
+    """예전 {db_id}_photo_{business_id}.jsonl 파일도 같은 행 형태로 읽는다."""
+    batch = []
+    for path in sorted(glob.glob(os.path.join(directory, "*_photo_*.jsonl"))):
+        match = LEGACY_FILE.search(os.path.basename(path))
+        if not match:
+            continue
+        for item in iter_file_records(path):
+            batch.append(tuple(photo_row(match.group(1), match.group(2), item).values()))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def create_photo_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS restaurant_photo (
+            id INTEGER PRIMARY KEY,
+            restaurant_id INTEGER NOT NULL,
+            business_id TEXT,
+            view_id TEXT NOT NULL,
+            url TEXT,
+            description TEXT,
+            author TEXT,
+            width INTEGER,
+            height INTEGER,
+            date TEXT,
+            UNIQUE (restaurant_id, view_id)
+        )
+    """)
+
+
+def load_photo_store(directory=STORE_DIR, db_path=DB_PATH, batch_size=BATCH_SIZE):
+    """
+    parquet 저장소(와 비정상 종료로 남은 stream, 예전 JSONL)를 batch_size 행씩 restaurant_photo 에 넣는다.
+    같은 (restaurant_id, view_id) 는 최신 값으로 덮어써서 다시 돌려도 행이 늘지 않는다.
+    """
+    started = time.time()
+    columns = PHOTO_SCHEMA.names
+    updates = ", ".join(f"{col} = excluded.{col}" for col in columns[3:])
+    insert_sql = f"""
+        INSERT INTO restaurant_photo ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})
+        ON CONFLICT (restaurant_id, view_id) DO UPDATE SET {updates}
+    """
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    read = 0
+    conn.execute("BEGIN")
+    try:
+        create_photo_table(conn)
+        # 예전 JSONL 을 먼저 넣어 같은 사진이면 parquet(최신) 값이 남게 한다
+        for batches in (iter_legacy_batches(directory, batch_size), iter_store_batches(directory, batch_size)):
+            for batch in batches:
+                conn.executemany(insert_sql, (row for row in batch if row[2]))
+                read += len(batch)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_restaurant_photo_business ON restaurant_photo(business_id)")
+        total = conn.execute("SELECT COUNT(*) FROM restaurant_photo").fetchone()[0]
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+    elapsed = time.time() - started
+    print(f"✅ restaurant_photo: {read}행 처리, 현재 {total}행 ({elapsed:.1f}초, {read / elapsed if elapsed else 0:.0f}행/초)")
+    return read
+
+
+if __name__ == "__main__":
+    # 사용법: python photo_store.py [저장소 디렉토리] [DB 경로]
+    load_photo_store(
+        sys.argv[1] if len(sys.argv) > 1 else STORE_DIR,
+        sys.argv[2] if len(sys.argv) > 2 else DB_PATH,
+    )
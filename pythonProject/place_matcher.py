@@ -0,0 +1,207 @@
+import csv
+import heapq
+import json
+import sqlite3
+import time
+from collections import Counter
+
+import pandas as pd
+
+from normalization import (
+    ADDRESS_BLOCK_COLUMN, NORMALIZED_NAME_COLUMN,
+    address_block, address_block_series, extract_address_prefix, normalize, normalize_address_for_comparison,
+    normalize_series,
+)
+
+# 이 점수 미만이면 매칭 실패로 본다 (이름 bigram Dice 유사도)
+MATCH_THRESHOLD = 0.75
+TOP_K = 3
+# 2단계(시/구) 블록으로 넓혔을 때 bigram 이 많이 겹치는 순으로 이만큼만 정밀 점수를 매긴다
+WIDE_CANDIDATE_CAP = 200
+# 넓힌 블록에서는 같은 이름의 다른 지점(체인점, "김밥천국" 등)이 많으므로
+# 시/구 부분을 뺀 나머지 주소(도로명 / 번지)의 bigram Dice 가 이 값 이상인 후보만 남긴다
+WIDE_ADDRESS_THRESHOLD = 0.5
+# 매칭 결과는 한 줄에 레코드 하나(JSONL)로 써서 병합 / CRAWL 반영 단계가 스트리밍으로 읽게 한다
+ENRICHED_PATH = 'web_data_enriched.jsonl'
+UNMATCHED_PATH = 'unmatched_log.csv'
+
+
+def char_ngrams(text: str, n: int = 2) -> set:
+    if not text:
+        return set()
+    if len(text) < n:
+        return {text}
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def dice(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+class PlaceMatcher:
+    """
+    DB 가게를 주소 앞부분(blocking key) 기준으로 묶어 두고,
+    같은 블록 후보끼리만 정규화 이름의 문자 bigram 유사도로 점수를 매긴다.
+    - 1차 블록: 도로명주소 앞 3단계, 후보가 없으면 앞 2단계(시/구) 블록으로 넓힌다.
+      2단계 블록은 구 하나 전체일 수 있어서 블록별 bigram 역색인으로 이름이 겹치는 후보만 모으고,
+      시/구를 뺀 주소 유사도가 WIDE_ADDRESS_THRESHOLD 미만인 후보는 버린다 (이름만 같은 다른 지점 자동 매칭 방지).
+    - 이름 bigram 집합은 만들 때 한 번만 계산한다 (같은 bigram 문자열은 하나를 공유).
+    - 이름+블록이 완전히 같은 행은 덮어쓰지 않고 모두 후보로 남기고, 전체 주소 유사도로 순서를 정한다.
+    """
+
+    def __init__(self, rows):
+        """rows: (번호, 정규화 이름, 주소 블록, 2단계 블록, 정규화 주소)"""
+        self.ids = []
+        self.names = []
+        self.name_grams = []
+        self.addresses = []
+        self.blocks = {}
+        self.wide_blocks = {}
+        self.wide_index = {}
+        self.exact = {}
+        grams = {}
+
+        for no, norm_name, block, wide_block, norm_address in rows:
+            if no is None or not norm_name:
+                continue
+            idx = len(self.ids)
+            self.ids.append(no)
+            self.names.append(norm_name)
+            self.name_grams.append(frozenset(grams.setdefault(g, g) for g in char_ngrams(norm_name)))
+            self.addresses.append(norm_address)
+            self.blocks.setdefault(block, []).append(idx)
+            self.wide_blocks.setdefault(wide_block, []).append(idx)
+            self.exact.setdefault((block, norm_name), []).append(idx)
+
+    @classmethod
+    def from_frame(cls, frame):
+        """
+        번호 / 사업장명 / 도로명전체주소 컬럼의 DataFrame 에서 컬럼 단위로 정규화해 만든다.
+        store_first_db 가 미리 계산해 둔 정규화 컬럼이 있으면 그대로 쓴다.
+        """
+        frame = frame.dropna(subset=["번호", "사업장명"])
+        names = frame[NORMALIZED_NAME_COLUMN] if NORMALIZED_NAME_COLUMN in frame else normalize_series(frame["사업장명"])
+        blocks = frame[ADDRESS_BLOCK_COLUMN] if ADDRESS_BLOCK_COLUMN in frame else address_block_series(frame["도로명전체주소"])
+        wide_blocks = address_block_series(frame["도로명전체주소"], 2)
+        addresses = normalize_series(frame["도로명전체주소"], normalize_address_for_comparison)
+        return cls(zip(frame["번호"].tolist(), names.fillna(''), blocks.fillna(''), wide_blocks, addresses))
+
+    @classmethod
+    def from_db(cls, db_path='food_data.db'):
+        conn = sqlite3.connect(db_path)
+        columns = {col[1] for col in conn.execute("PRAGMA table_info(restaurants)")}
+        selected = ["번호", "사업장명", "도로명전체주소"]
+        selected += [col for col in (NORMALIZED_NAME_COLUMN, ADDRESS_BLOCK_COLUMN) if col in columns]
+        frame = pd.read_sql(f"SELECT {', '.join(selected)} FROM restaurants", conn)
+        conn.close()
+        return cls.from_frame(frame)
+
+    def _wide_postings(self, wide_block):
+        """2단계 블록의 bigram → 후보 목록 역색인. 처음 넓혀 찾는 블록에서만 만든다."""
+        postings = self.wide_index.get(wide_block)
+        if postings is None:
+            postings = {}
+            for idx in self.wide_blocks.get(wide_block, ()):
+                for gram in self.name_grams[idx]:
+                    postings.setdefault(gram, []).append(idx)
+            self.wide_index[wide_block] = postings
+        return postings
+
+    def _wide_candidates(self, wide_block, name_grams):
+        postings = self._wide_postings(wide_block)
+        shared = Counter()
+        for gram in name_grams:
+            shared.update(postings.get(gram, ()))
+        size = len(name_grams)
+        # 겹치는 bigram 수로 Dice 를 바로 계산해 상위 후보만 남긴다 (겹침이 없는 행은 애초에 점수 0)
+        return heapq.nlargest(
+            WIDE_CANDIDATE_CAP, shared, key=lambda idx: shared[idx] / (size + len(self.name_grams[idx])),
+        )
+
+    def _rank(self, indexes, norm_name, norm_address, k, min_address=0.0, shared_grams=frozenset()):
+        """shared_grams: 주소 비교에서 뺄 bigram (넓힌 블록의 시/구처럼 모든 후보가 공유하는 부분)"""
+        name_grams = char_ngrams(norm_name)
+        address_grams = char_ngrams(norm_address) - shared_grams
+        scored = []
+        for idx in indexes:
+            score = 1.0 if self.names[idx] == norm_name else dice(name_grams, self.name_grams[idx])
+            if score <= 0:
+                continue
+            # 이름 점수가 같을 때만 주소 유사도로 순서를 정한다 (min_address 가 있으면 그 미만은 후보에서 제외)
+            address_score = dice(address_grams, char_ngrams(self.addresses[idx]) - shared_grams) if address_grams else 0.0
+            if address_score < min_address:
+                continue
+            scored.append((score, address_score, idx))
+        scored.sort(reverse=True)
+        return [(self.ids[idx], round(score, 4), self.names[idx]) for score, _, idx in scored[:k]]
+
+    def match(self, name, address, k=TOP_K):
+        """(번호, 점수, 정규화된 DB 이름) 목록을 점수 높은 순으로 최대 k 개 돌려준다."""
+        norm_name = normalize(name)
+        norm_address = normalize_address_for_comparison(address)
+        block = address_block(address)
+
+        exact = self.exact.get((block, norm_name))
+        if exact:
+            return self._rank(exact, norm_name, norm_address, k)
+
+        candidates = self.blocks.get(block)
+        if candidates:
+            return self._rank(candidates, norm_name, norm_address, k)
+        wide_block = address_block(address, 2)
+        candidates = self._wide_candidates(wide_block, char_ngrams(norm_name))
+        return self._rank(
+            candidates, norm_name, norm_address, k,
+            min_address=WIDE_ADDRESS_THRESHOLD, shared_grams=char_ngrams(wide_block),
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def build_place_matcher(db_path='food_data.db'):
+    print("🔍 DB 레코드 블록 인덱싱 중...")
+    started = time.time()
+    matcher = PlaceMatcher.from_db(db_path)
+    print(f"✅ DB 인덱싱 완료: {len(matcher)}건 / 블록 {len(matcher.blocks)}개 ({time.time() - started:.1f}초)")
+    return matcher
+
+
+def enrich_json_with_ids(all_data, matcher, out_path=ENRICHED_PATH, unmatched_path=UNMATCHED_PATH, verbose=False):
+    """
+    매칭된 레코드(번호, match_score 추가)는 out_path(JSONL)에, 매칭 실패는 unmatched_path(CSV)에 바로 한 줄씩 쓴다.
+    메모리에 결과를 모아 두지 않고 (매칭 건수, 실패 건수) 만 돌려준다. verbose 면 레코드마다 결과를 출력한다.
+    """
+    matched, unmatched = 0, 0
+    with open(out_path, 'w', encoding='utf-8') as out, open(unmatched_path, 'w', newline='', encoding='utf-8') as fail:
+        writer = csv.DictWriter(fail, fieldnames=['title', 'query', 'best_id', 'best_name', 'best_score'])
+        writer.writeheader()
+        for item in all_data:
+            title = item.get("title", "").strip()
+            query = item.get("query", "").strip()
+            road_address = query[len(title):].strip() if query.startswith(title) else query
+
+            candidates = matcher.match(title, road_address)
+            if candidates and candidates[0][1] >= MATCH_THRESHOLD:
+                matched_id, score, _ = candidates[0]
+                if verbose:
+                    print(f"✅ 매칭 성공: {title} → {matched_id} (score={score})")
+                item["번호"] = matched_id
+                item["match_score"] = score
+                out.write(json.dumps(item, ensure_ascii=False) + "\n")
+                matched += 1
+            else:
+                if verbose:
+                    print(f"❌ 매칭 실패: {title} → {extract_address_prefix(road_address)} 후보: {candidates}")
+                best_id, best_score, best_name = candidates[0] if candidates else ("", "", "")
+                writer.writerow({
+                    "title": title, "query": query,
+                    "best_id": best_id, "best_name": best_name, "best_score": best_score,
+                })
+                unmatched += 1
+
+    print(f"📦 매칭된 {matched}건 저장 완료 → {out_path}")
+    print(f"⚠️ 매칭 실패 {unmatched}건 → {unmatched_path}")
+    return matched, unmatched
@@ -0,0 +1,218 @@
+import asyncio
+import fnmatch
+import json
+import os
+import sys
+
+from zendriver import cdp
+
+# 크롤러는 HTML 과 APOLLO_STATE 만 쓰므로 아래 분류의 요청은 보내지도 않는다.
+# - types: Fetch 로 요청 단계에서 멈춰 세우고 allow 패턴이 아니면 실패 처리하는 리소스 타입
+# - patterns: Network.setBlockedURLs 로 브라우저가 바로 막는 URL (지도 SDK / 로그 수집 스크립트)
+RESOURCE_CATEGORIES = {
+    "image": {"types": ("Image",), "patterns": ()},
+    "font": {"types": ("Font",), "patterns": ()},
+    "media": {"types": ("Media",), "patterns": ()},
+    "map": {"types": (), "patterns": (
+        "*map.pstatic.net*", "*oapi.map.naver.com*", "*naveropenapi.apigw.ntruss.com/map*",
+    )},
+    "analytics": {"types": (), "patterns": (
+        "*wcs.naver.net*", "*lcs.naver.com*", "*nlog.naver.com*", "*tivan.naver.com*", "*siape.veta.naver.com*",
+        "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    )},
+}
+ALL_CATEGORIES = tuple(RESOURCE_CATEGORIES)
+
+# 크롤러 네 개(main / new-crawler / crawl-menu / crawl-geo) 모두 HTML DOM 과 APOLLO_STATE 만 읽어서 기본은 전부 막는다.
+# (메뉴 사진은 APOLLO_STATE 의 URL 만 저장하고, 좌표도 placeDetail.coordinate 에서 읽으므로 지도 타일/SDK 가 필요 없다)
+# 크롤러마다 다르게 하려면 그 컨테이너에서 환경변수로 덮어쓴다:
+# BLOCK_RESOURCES="image,font" (none 이면 차단 안 함), BLOCK_ALLOW="*pattern*,..." (막힌 분류 안에서도 받을 URL)
+DEFAULT_BLOCK = ALL_CATEGORIES
+BLOCK_RESOURCES = os.environ.get("BLOCK_RESOURCES", "")
+BLOCK_ALLOW = os.environ.get("BLOCK_ALLOW", "")
+# 차단 없이 측정한 리소스 타입별 평균 바이트 (python resource_blocking.py <url>... 로 생성).
+# 막힌 요청은 받지 않았으니 크기를 알 수 없어, 절약 바이트는 이 평균 x 차단 건수로만 추정한다 (파일이 없으면 추정 안 함).
+BASELINE_PATH = os.environ.get(
+    "BLOCK_BASELINE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "resource_baseline.json")
+)
+BLOCKED_ERROR = "ERR_BLOCKED_BY_CLIENT"
+
+
+def blocking_config():
+    block = DEFAULT_BLOCK
+    if BLOCK_RESOURCES:
+        block = () if BLOCK_RESOURCES == "none" else tuple(c.strip() for c in BLOCK_RESOURCES.split(",") if c.strip())
+    allow = tuple(p.strip() for p in BLOCK_ALLOW.split(",") if p.strip())
+    return [c for c in block if c in RESOURCE_CATEGORIES], allow
+
+
+def load_baseline(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class ResourceBlocker:
+    """
+    탭 하나에 붙는 요청 차단기 + 페이지별 절약량 기록.
+    막힌 요청은 Network.loadingFailed(ERR_BLOCKED_BY_CLIENT) 에서 리소스 타입별로 세고,
+    실제로 받은 바이트는 loadingFinished 의 encodedDataLength 로 더한다.
+    절약 바이트는 측정값이 아니라 차단 없이 측정한 타입별 평균(baseline) x 차단 건수로 낸 추정치다 (baseline 이 없으면 None).
+    """
+
+    def __init__(self, tab, categories, allow, baseline=None):
+        self.tab = tab
+        self.categories = categories
+        self.allow = allow
+        self.baseline = baseline or {}
+        self.pending_types = {}
+        self.totals = {"pages": 0, "blocked": 0, "loaded_bytes": 0, "estimated_saved_bytes": 0}
+        self.reset()
+
+    def reset(self):
+        self.blocked = {}
+        self.loaded = {}
+        self.loaded_count = {}
+
+    def allowed(self, url):
+        return any(fnmatch.fnmatch(url, pattern) for pattern in self.allow)
+
+    async def install(self):
+        await self.tab.send(cdp.network.enable())
+        self.tab.add_handler(cdp.network.ResponseReceived, self.on_response)
+        self.tab.add_handler(cdp.network.LoadingFinished, self.on_finished)
+        self.tab.add_handler(cdp.network.LoadingFailed, self.on_failed)
+
+        patterns = [
+            p for c in self.categories for p in RESOURCE_CATEGORIES[c]["patterns"] if p not in self.allow
+        ]
+        if patterns:
+            await self.tab.send(cdp.network.set_blocked_ur_ls(patterns))
+
+        types = [t for c in self.categories for t in RESOURCE_CATEGORIES[c]["types"]]
+        if types:
+            self.tab.add_handler(cdp.fetch.RequestPaused, self.on_paused)
+            await self.tab.send(cdp.fetch.enable(patterns=[
+                cdp.fetch.RequestPattern(
+                    resource_type=cdp.network.ResourceType(t), request_stage=cdp.fetch.RequestStage.REQUEST,
+                )
+                for t in types
+            ]))
+
+    def on_paused(self, event: cdp.fetch.RequestPaused):
+        # 리스너 루프 안이라 await 하지 않고 feed_cdp 로 바로 응답한다
+        if self.allowed(event.request.url):
+            self.tab.feed_cdp(cdp.fetch.continue_request(event.request_id))
+        else:
+            self.tab.feed_cdp(cdp.fetch.fail_request(event.request_id, cdp.network.ErrorReason.BLOCKED_BY_CLIENT))
+
+    def on_response(self, event: cdp.network.ResponseReceived):
+        self.pending_types[event.request_id] = event.type_.value
+
+    def on_finished(self, event: cdp.network.LoadingFinished):
+        resource_type = self.pending_types.pop(event.request_id, "Other")
+        self.loaded[resource_type] = self.loaded.get(resource_type, 0) + int(event.encoded_data_length)
+        self.loaded_count[resource_type] = self.loaded_count.get(resource_type, 0) + 1
+
+    def on_failed(self, event: cdp.network.LoadingFailed):
+        self.pending_types.pop(event.request_id, None)
+        if BLOCKED_ERROR in (event.error_text or ""):
+            resource_type = event.type_.value
+            self.blocked[resource_type] = self.blocked.get(resource_type, 0) + 1
+
+    def page_summary(self):
+        """지난 reset 이후(= 한 페이지) 차단 건수 / 받은 바이트 / 추정 절약 바이트를 돌려주고 누적한다."""
+        blocked = sum(self.blocked.values())
+        loaded_bytes = sum(self.loaded.values())
+        estimated = sum(count * self.baseline.get(t, 0) for t, count in self.blocked.items()) if self.baseline else None
+        summary = {
+            "blocked": blocked, "by_type": dict(self.blocked), "loaded_bytes": loaded_bytes,
+            "estimated_saved_bytes": estimated,
+        }
+        self.totals["pages"] += 1
+        self.totals["blocked"] += blocked
+        self.totals["loaded_bytes"] += loaded_bytes
+        self.totals["estimated_saved_bytes"] += estimated or 0
+        return summary
+
+    def report_page(self):
+        summary = self.page_summary()
+        by_type = ", ".join(f"{t} {n}" for t, n in sorted(summary["by_type"].items())) or "-"
+        estimated = summary["estimated_saved_bytes"]
+        saved = f"약 {estimated / 1024:.0f}KB (baseline 평균 기준 추정)" if estimated is not None else "추정 불가 (baseline 없음)"
+        pages = self.totals["pages"]
+        print(f"🧹 요청 차단 {summary['blocked']}건 ({by_type}) / 받은 {summary['loaded_bytes'] / 1024:.0f}KB"
+              f" / 절약 {saved} · 누적 {pages}페이지 평균 차단 {self.totals['blocked'] / pages:.1f}건")
+        self.reset()
+        return summary
+
+
+async def install_resource_blocking(tab, crawler, baseline=None):
+    """탭마다 한 번만 차단기를 붙인다. crawler 는 로그에 남길 이름. 차단할 분류가 없으면 None."""
+    blocker = getattr(tab, "_resource_blocker", None)
+    if blocker is not None:
+        return blocker
+    categories, allow = blocking_config()
+    if not categories:
+        return None
+    blocker = ResourceBlocker(tab, categories, allow, load_baseline() if baseline is None else baseline)
+    await blocker.install()
+    tab._resource_blocker = blocker
+    print(f"🧹 [{crawler}] 요청 차단: {', '.join(categories)}" + (f" (허용 {len(allow)}개 패턴)" if allow else ""))
+    return blocker
+
+
+async def measure_page(tab, blocker, url, settle=2):
+    blocker.reset()
+    await tab.get(url)
+    await asyncio.sleep(settle)
+    return blocker.page_summary()
+
+
+async def measure_baseline(urls, path=BASELINE_PATH):
+    """
+    같은 URL 들을 차단 없이 / 차단해서 한 번씩 열어 페이지별 요청 수와 바이트 차이를 출력하고,
+    차단 없이 받은 리소스 타입별 평균 바이트를 baseline 파일로 저장한다.
+    """
+    import zendriver as zd
+
+    browser = await zd.start(headless=True, browser_args=["--no-sandbox", "--disable-dev-shm-usage"])
+    try:
+        # 차단 없이: 받은 바이트를 타입별로 세기 위해 기록기만 붙인다
+        plain_tab = await browser.get("about:blank", new_tab=True)
+        recorder = ResourceBlocker(plain_tab, [], ())
+        await recorder.install()
+        type_bytes, type_counts, plain = {}, {}, []
+        for url in urls:
+            summary = await measure_page(plain_tab, recorder, url)
+            for t, size in recorder.loaded.items():
+                type_bytes[t] = type_bytes.get(t, 0) + size
+                type_counts[t] = type_counts.get(t, 0) + recorder.loaded_count[t]
+            plain.append(summary["loaded_bytes"])
+        await plain_tab.close()
+
+        blocked_tab = await browser.get("about:blank", new_tab=True)
+        categories, allow = blocking_config()
+        blocker = ResourceBlocker(blocked_tab, categories, allow)
+        await blocker.install()
+        for url, plain_bytes in zip(urls, plain):
+            summary = await measure_page(blocked_tab, blocker, url)
+            print(f"📏 {url}\n   차단 없이 {plain_bytes / 1024:.0f}KB → 차단 {summary['blocked']}건,"
+                  f" {summary['loaded_bytes'] / 1024:.0f}KB (절약 {(plain_bytes - summary['loaded_bytes']) / 1024:.0f}KB)")
+    finally:
+        await browser.stop()
+
+    baseline = {t: type_bytes[t] // type_counts[t] for t in type_bytes}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, ensure_ascii=False, indent=2)
+    print(f"💾 리소스 타입별 평균 바이트 저장: {path} {baseline}")
+    return baseline
+
+
+if __name__ == "__main__":
+    # 사용법: python resource_blocking.py <장소 URL> [URL ...]
+    if len(sys.argv) < 2:
+        print("사용법: python resource_blocking.py <장소 URL> [URL ...]")
+        sys.exit(1)
+    asyncio.run(measure_baseline(sys.argv[1:]))
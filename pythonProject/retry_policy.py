@@ -0,0 +1,141 @@
+import asyncio
+import contextvars
+import json
+import os
+import random
+import re
+import time
+
+# 오류 분류
+TRANSIENT = "transient"   # 네트워크 끊김 / 타임아웃 / 5xx / 프록시 에러 페이지: 잠깐 기다렸다 다시
+THROTTLED = "throttled"   # 429: 길게 기다렸다 다시
+PARSE = "parse"           # 페이지는 떴는데 셀렉터/데이터가 없음: 한두 번만 다시
+BROWSER = "browser"       # CDP 연결 끊김 / 탭 크래시: 이때만 브라우저(탭)를 교체
+PERMANENT = "permanent"   # 404 / 410 등: 재시도하지 않음
+ERROR_CLASSES = (TRANSIENT, THROTTLED, PARSE, BROWSER, PERMANENT)
+
+# 분류별 최대 재시도 횟수와 백오프 기본 지연(초). 지연은 base * 2^(n-1) 상한 안에서 무작위(full jitter).
+DEFAULT_RETRIES = {TRANSIENT: 4, THROTTLED: 4, PARSE: 2, BROWSER: 2, PERMANENT: 0}
+DEFAULT_BASE_DELAY = {TRANSIENT: 1.0, THROTTLED: 5.0, PARSE: 0.5, BROWSER: 2.0, PERMANENT: 0.0}
+MAX_DELAY = float(os.environ.get("RETRY_MAX_DELAY", 30))
+# 레코드(가게) 하나에 재시도를 포함해 쓸 수 있는 최대 시간(초)
+RECORD_BUDGET = float(os.environ.get("RETRY_RECORD_BUDGET", 90))
+
+# 분류별 누적 발생 횟수 (retry_report 로 출력)
+ERROR_COUNTS = {c: 0 for c in ERROR_CLASSES}
+RETRY_COUNTS = {c: 0 for c in ERROR_CLASSES}
+
+_record_deadline = contextvars.ContextVar("record_deadline", default=None)
+
+HTTP_STATUS = re.compile(r"HTTP (\d{3})")
+BROWSER_FAULT_MARKERS = (
+    "connection closed", "websocket", "target closed", "no target with given id", "session closed",
+    "browser has disconnected", "aw snap", "sigkill", "sigtrap", "브라우저 오류 문구",
+)
+
+
+class PageLoadError(Exception):
+    """page_check 가 에러 페이지로 판정한 경우. reason 의 'HTTP 503' 등에서 상태코드를 읽어 둔다."""
+
+    def __init__(self, reason):
+        super().__init__(f"🛑 에러 페이지 탐지됨: {reason}")
+        self.reason = reason
+        match = HTTP_STATUS.search(reason or "")
+        self.status = int(match.group(1)) if match else None
+
+
+class RetryError(Exception):
+    """재시도 한도나 레코드 시간 예산을 다 쓴 경우. error_class 로 마지막 실패 분류를 알 수 있다."""
+
+    def __init__(self, message, error_class, cause):
+        super().__init__(f"{message} [{error_class}] {cause or type(cause).__name__}")
+        self.error_class = error_class
+        self.cause = cause
+
+
+def classify_error(error, timeout_as=TRANSIENT):
+    """
+    예외를 오류 분류로 바꾼다. timeout_as 는 타임아웃의 의미가 호출 위치마다 달라서 받는다
+    (페이지 로딩 타임아웃은 네트워크 문제, 셀렉터 대기 타임아웃은 페이지 내용 문제).
+    """
+    if isinstance(error, PageLoadError):
+        if error.status == 429:
+            return THROTTLED
+        if error.status is not None and 400 <= error.status < 500:
+            return PERMANENT
+        if any(marker in error.reason.lower() for marker in BROWSER_FAULT_MARKERS):
+            return BROWSER
+        return TRANSIENT
+
+    message = str(error).lower()
+    if isinstance(error, (ConnectionRefusedError, ConnectionResetError, BrokenPipeError)):
+        return BROWSER
+    if any(marker in message for marker in BROWSER_FAULT_MARKERS) or type(error).__name__ in ("ConnectionClosed", "ConnectionClosedError"):
+        return BROWSER
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)) or "time ran out" in message or "timeout" in message:
+        return timeout_as
+    if isinstance(error, (json.JSONDecodeError, KeyError, IndexError, ValueError)):
+        return PARSE
+    if "429" in message or "too many requests" in message:
+        return THROTTLED
+    return TRANSIENT
+
+
+def start_record_budget(seconds=RECORD_BUDGET):
+    """
+    레코드(가게) 하나를 시작할 때 호출. 현재 태스크 안의 RetryPolicy.run 들이 같은 마감 시각을 공유하고,
+    다음 레코드에서 다시 호출하면 새 마감 시각으로 바뀐다. (contextvar 라 워커 태스크끼리는 섞이지 않는다)
+    """
+    _record_deadline.set(time.monotonic() + seconds)
+
+
+class RetryPolicy:
+    """
+    분류별 재시도 횟수 + 지수 백오프(full jitter) + 레코드 시간 예산을 적용해 func 를 실행한다.
+    on_failure(error_class, error) 는 다음 시도 전에 불리며, 브라우저 교체처럼 분류에 따라 다른 복구를 할 때 쓴다.
+    """
+
+    def __init__(self, name, retries=None, base_delay=None, max_delay=MAX_DELAY):
+        self.name = name
+        self.retries = {**DEFAULT_RETRIES, **(retries or {})}
+        self.base_delay = {**DEFAULT_BASE_DELAY, **(base_delay or {})}
+        self.max_delay = max_delay
+
+    def backoff(self, error_class, attempt):
+        cap = min(self.max_delay, self.base_delay[error_class] * 2 ** (attempt - 1))
+        return random.uniform(0, cap)
+
+    async def run(self, func, on_failure=None, timeout_as=TRANSIENT):
+        attempts = {}
+        while True:
+            try:
+                return await func()
+            except Exception as e:
+                error_class = classify_error(e, timeout_as)
+                ERROR_COUNTS[error_class] += 1
+                attempts[error_class] = attempts.get(error_class, 0) + 1
+                attempt = attempts[error_class]
+                if attempt > self.retries[error_class]:
+                    raise RetryError(f"❌ [{self.name}] 재시도 한도 초과", error_class, e) from e
+
+                delay = self.backoff(error_class, attempt)
+                deadline = _record_deadline.get()
+                if deadline is not None and time.monotonic() + delay > deadline:
+                    raise RetryError(f"⌛ [{self.name}] 레코드 시간 예산 초과", error_class, e) from e
+
+                RETRY_COUNTS[error_class] += 1
+                print(f"⚠️ [{self.name}] {error_class} {attempt}/{self.retries[error_class]} → {delay:.1f}초 후 재시도: {e or type(e).__name__}")
+                if on_failure is not None:
+                    await on_failure(error_class, e)
+                await asyncio.sleep(delay)
+
+
+# 페이지 이동 / 셀렉터 대기용 기본 정책
+PAGE_POLICY = RetryPolicy("page")
+SELECTOR_POLICY = RetryPolicy("selector", retries={TRANSIENT: 2})
+
+
+def retry_report():
+    errors = " / ".join(f"{c} {ERROR_COUNTS[c]}" for c in ERROR_CLASSES if ERROR_COUNTS[c])
+    retries = " / ".join(f"{c} {RETRY_COUNTS[c]}" for c in ERROR_CLASSES if RETRY_COUNTS[c])
+    print(f"🔁 오류 분류별 발생: {errors or '없음'} · 재시도: {retries or '없음'}")
@@ -0,0 +1,53 @@
+from apollo_state import decode_apollo_state, extract_apollo_state, extract_rq_items, iter_rq_pushes
+
+
+def page(script):
+    return f"<html><head><script>{script}</script></head><body><div id='app-root'></div></body></html>"
+
+
+def test_brace_semicolon_inside_string_is_not_a_terminator():
+    # 예전 정규식은 `};` 에서 잘라 JSON 이 깨졌다
+    html = page('window.__APOLLO_STATE__ = {"Menu:1_0":{"name":"세트 {A};", "description":"}; 포함"}};\nvar x = {};')
+    state = decode_apollo_state(html)
+    assert state == {"Menu:1_0": {"name": "세트 {A};", "description": "}; 포함"}}
+
+
+def test_comparison_before_assignment_is_skipped():
+    html = page('if (window.__APOLLO_STATE__ == null) {}\nwindow.__APOLLO_STATE__={"ROOT_QUERY":{}};')
+    assert decode_apollo_state(html) == {"ROOT_QUERY": {}}
+
+
+def test_missing_or_broken_state_returns_none():
+    assert decode_apollo_state(page("var a = 1;")) is None
+    assert decode_apollo_state(page('window.__APOLLO_STATE__ = {"a": ')) is None
+
+
+def test_prefix_filter_keeps_dict_values_with_matching_keys():
+    html = page(
+        'window.__APOLLO_STATE__ = {"PlaceDetailBase:1":{"name":"김밥천국"},"Menu:1_0":{"name":"라면"},'
+        '"Menu:count":3,"ROOT_QUERY":{"x":1},"PlaceSummary:1":{"id":"1"}};'
+    )
+    assert extract_apollo_state(html, ("PlaceDetailBase:", "Menu:")) == {
+        "PlaceDetailBase:1": {"name": "김밥천국"},
+        "Menu:1_0": {"name": "라면"},
+    }
+    assert extract_apollo_state(html, "PlaceSummary:") == {"PlaceSummary:1": {"id": "1"}}
+    # 접두사가 없으면 전체
+    assert len(extract_apollo_state(html)) == 5
+
+
+def test_multiple_rq_pushes():
+    first = '{"queries":[{"state":{"data":{"items":[{"id":1},{"id":2}]}}}]}'
+    second = '{"queries":[{"state":{"data":{"items":[]}}},{"state":{"data":{"items":[{"id":"3 });"}]}}}]}'
+    html = page(
+        f"window.__RQ_STREAMING_STATE__.push({first});"
+        "window.__RQ_STREAMING_STATE__.push(oops);"
+        f"window.__RQ_STREAMING_STATE__.push( {second});"
+    )
+    assert len(list(iter_rq_pushes(html))) == 2
+    assert extract_rq_items(html) == [{"id": 1}, {"id": 2}, {"id": "3 });"}]
+
+
+def test_no_rq_push():
+    assert list(iter_rq_pushes(page("var a = 1;"))) == []
+    assert extract_rq_items(page("var a = 1;")) == []
@@ -0,0 +1,142 @@
+import json
+import os
+import sqlite3
+
+import pytest
+
+psycopg2 = pytest.importorskip("psycopg2")
+
+import dump
+from menu_items import ensure_menu_schema, refresh_menu_items
+
+# dump.py 상단의 PostGIS 컨테이너를 띄워 두고 돌린다. 같은 서버에 테스트용 DB 를 따로 만들어 쓴다.
+TEST_DBNAME = os.environ.get("PG_TEST_DBNAME", f"{dump.PG_CONFIG['dbname']}_dump_test")
+
+ROWS = [
+    (1, "김밥천국", "서울특별시 강남구 테헤란로 152", "37.5", "127.03", [{"name": "라면", "price": "4,000원"}]),
+    (2, "스타벅스 역삼점", "서울특별시 강남구 테헤란로 125", "37.49", "127.02", [{"name": "아메리카노", "price": "4,500"}]),
+    (3, "좌표없음식당", "서울특별시 마포구 월드컵북로 396", None, None, []),
+    (4, "깨진좌표", "부산광역시 해운대구 해운대해변로 264", "abc", "129.1", None),
+]
+
+
+def pg_test_connect():
+    try:
+        admin = psycopg2.connect(**dump.PG_CONFIG, connect_timeout=3)
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"PostgreSQL 에 연결할 수 없음 ({dump.PG_CONFIG['host']}:{dump.PG_CONFIG['port']}): {e}")
+    admin.autocommit = True
+    with admin.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s", (TEST_DBNAME,))
+        if cursor.fetchone() is None:
+            cursor.execute(f'CREATE DATABASE "{TEST_DBNAME}"')
+    admin.close()
+    conn = psycopg2.connect(**{**dump.PG_CONFIG, "dbname": TEST_DBNAME})
+    conn.set_client_encoding("UTF8")
+    return conn
+
+
+@pytest.fixture
+def pg_conn():
+    conn = pg_test_connect()
+    with conn.cursor() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS menu_item, restaurant_merged, menu_item_new, restaurant_merged_new")
+    conn.commit()
+    yield conn
+    conn.rollback()
+    conn.close()
+
+
+@pytest.fixture
+def sqlite_conn(tmp_path):
+    conn = sqlite3.connect(tmp_path / "merged.db", isolation_level=None)
+    conn.execute("""
+        CREATE TABLE restaurant_merged (
+            ID INTEGER PRIMARY KEY, 사업장명 TEXT, 도로명전체주소 TEXT, LATITUDE TEXT, LONGITUDE TEXT, MENU TEXT
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO restaurant_merged VALUES (?, ?, ?, ?, ?, ?)",
+        [(*row[:5], None if row[5] is None else json.dumps(row[5], ensure_ascii=False)) for row in ROWS],
+    )
+    ensure_menu_schema(conn)
+    yield conn
+    conn.close()
+
+
+def fetch(pg_conn, sql, args=None):
+    with pg_conn.cursor() as cursor:
+        cursor.execute(sql, args)
+        return cursor.fetchall()
+
+
+def sqlite_hashes(sqlite_conn):
+    return {row[0]: dump.row_hash(row) for row in dump.sqlite_select_restaurants(sqlite_conn)}
+
+
+def assert_in_sync(sqlite_conn, pg_conn):
+    assert dict(fetch(pg_conn, "SELECT id, row_hash FROM restaurant_merged")) == sqlite_hashes(sqlite_conn)
+    expected_menu = sqlite_conn.execute(
+        f"SELECT {', '.join(dump.MENU_ITEM_COLUMNS)} FROM menu_item ORDER BY id"
+    ).fetchall()
+    assert fetch(pg_conn, f"SELECT {', '.join(dump.MENU_ITEM_COLUMNS)} FROM menu_item ORDER BY id") == expected_menu
+
+
+def test_full_dump(sqlite_conn, pg_conn):
+    dump.full_dump(sqlite_conn, pg_conn)
+    assert_in_sync(sqlite_conn, pg_conn)
+    # 숫자 좌표만 geom 이 생기고 빈 값 / 깨진 값은 NULL
+    geoms = dict(fetch(pg_conn, "SELECT id, ST_AsText(geom) FROM restaurant_merged"))
+    assert geoms == {1: "POINT(127.03 37.5)", 2: "POINT(127.02 37.49)", 3: None, 4: None}
+    # 시퀀스가 MAX(id) 다음부터 이어진다
+    assert fetch(pg_conn, "SELECT nextval(pg_get_serial_sequence('restaurant_merged', 'id'))") == [(5,)]
+
+
+def test_swap_dump_renames_everything(sqlite_conn, pg_conn):
+    dump.full_dump(sqlite_conn, pg_conn)
+    sqlite_conn.execute("UPDATE restaurant_merged SET 사업장명 = '김밥천국 본점' WHERE ID = 1")
+    dump.swap_dump(sqlite_conn, pg_conn)
+    assert_in_sync(sqlite_conn, pg_conn)
+
+    tables = {name for (name,) in fetch(pg_conn, "SELECT tablename FROM pg_tables WHERE schemaname = current_schema()")}
+    assert {"restaurant_merged", "menu_item"} <= tables
+    assert not {"restaurant_merged_new", "menu_item_new"} & tables
+    indexes = {name for (name,) in fetch(pg_conn, "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema()")}
+    assert not [name for name in indexes if "_new" in name]
+    assert {"restaurant_merged_pkey", "idx_restaurant_merged_geom", "idx_menu_item_restaurant"} <= indexes
+    assert fetch(pg_conn, "SELECT pg_get_serial_sequence('restaurant_merged', 'id')") == [("public.restaurant_merged_id_seq",)]
+    # 메뉴 외래키도 새 restaurant_merged 를 가리킨다
+    assert fetch(pg_conn, """
+        SELECT confrelid::regclass::text FROM pg_constraint
+        WHERE conrelid = 'menu_item'::regclass AND contype = 'f'
+    """) == [("restaurant_merged",)]
+
+
+def test_incremental_sync(sqlite_conn, pg_conn):
+    # 대상 테이블이 없으면 swap 으로 처음 적재
+    dump.incremental_sync(sqlite_conn, pg_conn)
+    assert_in_sync(sqlite_conn, pg_conn)
+    untouched = fetch(pg_conn, "SELECT xmin::text FROM restaurant_merged WHERE id = 3")
+
+    # 이름 변경 / 메뉴 변경 / 삭제 / 추가
+    sqlite_conn.execute("UPDATE restaurant_merged SET 사업장명 = '김밥천국 본점' WHERE ID = 1")
+    sqlite_conn.execute(
+        "UPDATE restaurant_merged SET MENU = ? WHERE ID = 2",
+        (json.dumps([{"name": "아메리카노", "price": "5,000"}, {"name": "라떼", "price": "5,500"}], ensure_ascii=False),),
+    )
+    sqlite_conn.execute("DELETE FROM restaurant_merged WHERE ID = 4")
+    sqlite_conn.execute("INSERT INTO restaurant_merged VALUES (5, '새가게', '서울특별시 중구 명동길 14', '37.56', '126.98', NULL)")
+    sqlite_conn.execute("CREATE TEMP TABLE load_stage (id INTEGER PRIMARY KEY)")
+    sqlite_conn.execute("INSERT INTO temp.load_stage VALUES (2)")
+    refresh_menu_items(sqlite_conn)
+
+    dump.incremental_sync(sqlite_conn, pg_conn)
+    assert_in_sync(sqlite_conn, pg_conn)
+    assert fetch(pg_conn, "SELECT 사업장명 FROM restaurant_merged WHERE id = 1") == [("김밥천국 본점",)]
+    assert fetch(pg_conn, "SELECT ST_AsText(geom) FROM restaurant_merged WHERE id = 5") == [("POINT(126.98 37.56)",)]
+    # 바뀌지 않은 행은 다시 쓰지 않는다
+    assert fetch(pg_conn, "SELECT xmin::text FROM restaurant_merged WHERE id = 3") == untouched
+
+    # 변경이 없으면 아무 행도 건드리지 않는다
+    dump.incremental_sync(sqlite_conn, pg_conn)
+    assert_in_sync(sqlite_conn, pg_conn)
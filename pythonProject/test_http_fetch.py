@@ -0,0 +1,59 @@
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+import http_fetch
+from apollo_state import extract_apollo_state
+from http_fetch import ApolloHttpFetcher
+
+# 사이트 대신 내려줄 저장 HTML (서버 렌더링된 메뉴 페이지 / 클라이언트 렌더링 페이지)
+APOLLO_HTML = """<html><head><script>
+window.__APOLLO_STATE__ = {"PlaceDetailBase:1":{"name":"김밥천국","category":"분식"},"Menu:1_0":{"name":"라면","price":"4,000"}};
+</script></head><body><div id="app-root"></div></body></html>"""
+PLAIN_HTML = "<html><head></head><body><div id='app-root'></div><script src='/app.js'></script></body></html>"
+
+PAGES = {
+    "/restaurant/1/menu": (200, APOLLO_HTML),
+    "/restaurant/2/menu": (503, APOLLO_HTML),
+    "/restaurant/3/menu": (200, PLAIN_HTML),
+}
+
+
+async def handle(request):
+    status, body = PAGES.get(request.path, (404, "not found"))
+    return web.Response(status=status, text=body, content_type="text/html")
+
+
+def fetch_all(monkeypatch, paths):
+    async def run():
+        app = web.Application()
+        app.router.add_get("/{tail:.*}", handle)
+        async with TestServer(app) as server:
+            monkeypatch.setattr(http_fetch, "BASE_URL", str(server.make_url("")))
+            async with ApolloHttpFetcher(retries=0, delay=0) as fetcher:
+                results = [await fetcher.fetch_apollo_html(path) for path in paths]
+                return results, dict(fetcher.stats)
+
+    return asyncio.run(run())
+
+
+def test_apollo_page_is_parsed(monkeypatch):
+    (html,), stats = fetch_all(monkeypatch, ["/restaurant/1/menu"])
+    assert html is not None
+    state = extract_apollo_state(html, ("PlaceDetailBase:", "Menu:"))
+    assert state["PlaceDetailBase:1"]["name"] == "김밥천국"
+    assert state["Menu:1_0"]["price"] == "4,000"
+    assert stats["http"] == 1 and stats["fallback"] == 0
+
+
+def test_non_200_falls_back_to_browser(monkeypatch):
+    (html,), stats = fetch_all(monkeypatch, ["/restaurant/2/menu"])
+    assert html is None
+    assert stats["fallback"] == 1
+
+
+def test_page_without_marker_falls_back_to_browser(monkeypatch):
+    (html,), stats = fetch_all(monkeypatch, ["/restaurant/3/menu"])
+    assert html is None
+    assert stats["fallback"] == 1
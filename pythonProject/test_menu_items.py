@@ -0,0 +1,28 @@
+import pytest
+
+from menu_items import parse_price_won
+
+
+@pytest.mark.parametrize("price, expected", [
+    ("9,000", 9000),
+    ("9,000원", 9000),
+    ("1.5만원", 15000),
+    # '원' 바로 앞의 금액을 읽는다 (앞의 인원 수 등은 무시)
+    ("2인 30,000원", 30000),
+    ("1인 1만원", 10000),
+    ("3,000 원 (2인 기준)", 3000),
+    # 만 / 천 조각은 모두 더한다
+    ("1만 5천원", 15000),
+    ("1만5000원", 15000),
+    ("5천원", 5000),
+    # 범위는 앞 금액
+    ("10,000~15,000", 10000),
+    ("10,000~15,000원", 10000),
+    ("10,000원~15,000원", 10000),
+    ("변동", None),
+    ("시가", None),
+    (None, None),
+    (12000, 12000),
+])
+def test_parse_price_won(price, expected):
+    assert parse_price_won(price) == expected
@@ -0,0 +1,94 @@
+import random
+import re
+
+import pandas as pd
+import pytest
+
+from normalization import normalize, normalize_address_for_comparison, normalize_series
+
+
+def legacy_normalize_name(text):
+    """기존 DB_processing.py / id-processing.py 의 normalize"""
+    if not text:
+        return ''
+    text = re.sub(r'\(.*?\)', '', text)
+    text = re.sub(r'\s+', '', text)
+    text = re.sub(r'[^ㄱ-ㅣ가-힣\w]', '', text)
+    return text.lower()
+
+
+def legacy_normalize_address(addr):
+    """기존 DB_processing.py / id-processing.py 의 normalize_address_for_comparison"""
+    if not addr:
+        return ''
+    addr = re.sub(r'(?:지하|지상)?\s?\d+층', '', addr.strip()).strip()
+    addr = re.sub(r'\b\d+호\b', '', addr.strip()).strip()
+    addr = re.sub(r'\(.*?\)', '', addr.strip()).strip()
+    addr = re.sub(r'\s+', '', addr)
+    addr = re.sub(r'[^\w가-힣,-]', '', addr)
+    return addr.lower()
+
+
+# 인허가 데이터 / 네이버 지도에서 볼 수 있는 형태의 주소
+ADDRESSES = [
+    "서울특별시 강남구 테헤란로 152 (역삼동)",
+    "서울특별시 강남구 테헤란로 152, 지하1층 (역삼동, 강남파이낸스센터)",
+    "서울특별시 마포구 월드컵북로 396 1층 101호",
+    "서울특별시 마포구 월드컵북로 396, 2층 201호 (상암동)",
+    "경기도 성남시 분당구 판교역로 235 B동101호",
+    "경기도 성남시 분당구 판교역로 235, B동 101호",
+    "경기도 수원시 영통구 광교중앙로 145, 3층101호",
+    "경기도 수원시 영통구 광교중앙로 145 지하 2층 B101호",
+    "부산광역시 해운대구 해운대해변로 264, 지상1층 1-2호",
+    "부산광역시 해운대구 해운대해변로 264 101호점",
+    "인천광역시 중구 공항로 272 (운서동) 3층",
+    "대구광역시 중구 동성로2길 81-1, 1,2층",
+    "서울특별시 종로구 종로 1 (종로1가, 교보생명빌딩) 지하1층 B1-12호",
+    "서울특별시 중구 명동길 14 (명동2가) 12층1201호",
+    "서울특별시 송파구 올림픽로 300, 롯데월드몰 5층 (신천동)",
+    "서울특별시 용산구 한강대로 23길 55, 아이파크몰 6층 601-1호",
+    "서울특별시 강서구 공항대로 247 퀸즈파크나인 C동 2층 C-201호",
+    "서울특별시 서초구 강남대로 373\xa0(서초동)",
+    "서울특별시 성동구 왕십리로 83-21, 지하1,2층",
+    "  서울특별시 관악구 관악로 1 101호  ",
+    "서울특별시 관악구 관악로 1 (신림동",
+    "",
+]
+
+NAMES = [
+    "스타벅스 역삼점",
+    "스타벅스(역삼점)",
+    "김밥천국 2호점",
+    "BHC치킨 & 맥주",
+    "카페​봄",
+    "ㅋㅋ분식",
+    "Pasta_House · 이태원",
+    "",
+]
+
+
+def fuzz_addresses(count=2000, seed=7):
+    rng = random.Random(seed)
+    pieces = ["서울특별시", "강남구", "테헤란로", "152", "B동", "101호", "3층", "지하1층", "지상 2층", "(역삼동)",
+              "(신천동, 롯데월드몰)", ",", "-", "1-2호", "A", "호", "층", "\xa0", "·", "(", ")", "12", "B1"]
+    return [rng.choice(["", " "]).join(rng.choice(pieces) for _ in range(rng.randint(1, 8))) for _ in range(count)]
+
+
+@pytest.mark.parametrize("address", ADDRESSES)
+def test_address_matches_legacy(address):
+    assert normalize_address_for_comparison(address) == legacy_normalize_address(address)
+
+
+@pytest.mark.parametrize("name", NAMES)
+def test_name_matches_legacy(name):
+    assert normalize(name) == legacy_normalize_name(name)
+
+
+def test_normalize_series_matches_legacy():
+    addresses = pd.Series(ADDRESSES + fuzz_addresses() + ADDRESSES + [None])
+    expected = [legacy_normalize_address(a) if isinstance(a, str) else '' for a in addresses]
+    assert normalize_series(addresses, normalize_address_for_comparison).tolist() == expected
+
+    names = pd.Series(NAMES + NAMES + [None])
+    expected = [legacy_normalize_name(n) if isinstance(n, str) else '' for n in names]
+    assert normalize_series(names).tolist() == expected
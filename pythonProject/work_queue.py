@@ -0,0 +1,212 @@
+import asyncio
+import os
+import socket
+import sqlite3
+import time
+
+DB_PATH = os.environ.get("CRAWL_DB_PATH", "food_data.db")
+LEASE_SECONDS = int(os.environ.get("CRAWL_LEASE_SECONDS", 600))
+MAX_ATTEMPTS = 3
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class CrawlQueue:
+    """
+    restaurants.CRAWL 위에 올린 작업 큐 (crawl_queue 테이블).
+    여러 컨테이너가 같은 DB 파일을 보고 claim/lease 방식으로 배치를 나눠 가지며,
+    번호 기준 keyset 페이지네이션이라 OFFSET 스캔이 없고 중간에 행이 바뀌어도 밀리지 않는다.
+    결과가 기록되면 flush() 가 큐 상태와 restaurants.CRAWL 을 같은 트랜잭션에서 갱신한다.
+    모든 갱신은 claimed_by 가 자기 worker_id 인 행에만 적용되고, 워커가 레코드를 꺼낼 때와 결과를 넘길 때(finish_async) renew() 로 lease 를 늘린다.
+    비동기 코드에서는 *_async 메서드를 쓴다 (sqlite 호출과 잠금 대기를 스레드에서 하고, 한 번에 하나씩만 실행).
+    """
+
+    def __init__(self, db_path=DB_PATH, worker_id=None, batch_size=20, lease_seconds=LEASE_SECONDS):
+        self.conn = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.lock = asyncio.Lock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.worker_id = worker_id or default_worker_id()
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.cursor_key = None
+        self.wrapped = False
+        self.finished = []
+        self.ensure_schema()
+
+    def ensure_schema(self):
+        columns = [col[1].upper() for col in self.conn.execute("PRAGMA table_info(restaurants)")]
+        if "CRAWL" not in columns:
+            self.conn.execute("ALTER TABLE restaurants ADD COLUMN CRAWL INTEGER DEFAULT 0")
+            self.conn.execute("UPDATE restaurants SET CRAWL = 0 WHERE CRAWL IS NULL")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_restaurants_번호 ON restaurants(번호)")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS crawl_queue (
+                번호 INTEGER PRIMARY KEY,
+                status TEXT NOT NULL DEFAULT 'pending',
+                claimed_by TEXT,
+                lease_until REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_crawl_queue_status ON crawl_queue(status, 번호)")
+        # 아직 큐에 없는 미수집 가게만 추가 (이미 있는 행의 상태는 건드리지 않는다)
+        self.conn.execute("""
+            INSERT OR IGNORE INTO crawl_queue (번호)
+            SELECT 번호 FROM restaurants
+            WHERE CRAWL = 0 AND 번호 IS NOT NULL AND 사업장명 IS NOT NULL AND 도로명전체주소 IS NOT NULL
+        """)
+
+    def remaining(self):
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM crawl_queue WHERE status IN ('pending', 'claimed')"
+        ).fetchone()[0]
+
+    def _claim_after(self, after_key):
+        now = time.time()
+        lease_until = now + self.lease_seconds
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            keys = [row[0] for row in self.conn.execute("""
+                SELECT 번호 FROM crawl_queue
+                WHERE 번호 > ?
+                  AND (status = 'pending' OR (status = 'claimed' AND lease_until < ?))
+                ORDER BY 번호
+                LIMIT ?
+            """, (after_key, now, self.batch_size))]
+            if keys:
+                qmarks = ",".join("?" for _ in keys)
+                self.conn.execute(f"""
+                    UPDATE crawl_queue
+                    SET status = 'claimed', claimed_by = ?, lease_until = ?, attempts = attempts + 1, updated_at = ?
+                    WHERE 번호 IN ({qmarks})
+                """, (self.worker_id, lease_until, now, *keys))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+        if not keys:
+            return []
+        qmarks = ",".join("?" for _ in keys)
+        return self.conn.execute(f"""
+            SELECT 번호, 사업장명, 도로명전체주소 FROM restaurants
+            WHERE 번호 IN ({qmarks})
+            ORDER BY 번호
+        """, keys).fetchall()
+
+    def claim_batch(self):
+        """
+        다음 배치를 claim 해서 (번호, 사업장명, 도로명전체주소) 목록을 돌려준다.
+        끝까지 가면 처음부터 한 번 더 훑어 다른 워커의 만료된 lease / 재시도 대상을 가져오고,
+        그래도 없으면 빈 리스트.
+        """
+        while True:
+            rows = self._claim_after(self.cursor_key if self.cursor_key is not None else float("-inf"))
+            if rows:
+                self.cursor_key = rows[-1][0]
+                self.wrapped = False
+                return rows
+            if self.wrapped or self.cursor_key is None:
+                return []
+            self.cursor_key = None
+            self.wrapped = True
+
+    def renew(self, key):
+        """
+        레코드 처리를 시작할 때 lease 를 지금부터 다시 lease_seconds 로 늘린다.
+        lease 가 만료돼 다른 워커가 가져갔으면 False (이 레코드는 건너뛴다).
+        """
+        now = time.time()
+        return self.conn.execute("""
+            UPDATE crawl_queue SET lease_until = ?, updated_at = ?
+            WHERE 번호 = ? AND claimed_by = ? AND status = 'claimed'
+        """, (now + self.lease_seconds, now, key, self.worker_id)).rowcount == 1
+
+    def finish(self, key, status):
+        """
+        status: 'done' (CRAWL=1), 'need_check', 'failed'. flush() 전까지 모아 두고,
+        batch_size 만큼 쌓이면 True 를 돌려준다 (호출 측에서 결과 파일을 sync 한 뒤 flush).
+        """
+        self.finished.append((key, status))
+        return len(self.finished) >= self.batch_size
+
+    def flush(self):
+        self._write_pending(self._take_finished())
+
+    def _take_finished(self):
+        # 반영 중(스레드)에도 finish() 가 새 결과를 쌓을 수 있도록 목록을 먼저 떼어 낸다
+        pending, self.finished = self.finished, []
+        return pending
+
+    def _write_pending(self, pending):
+        try:
+            self._write_finished(pending)
+        except Exception:
+            self.finished = pending + self.finished
+            raise
+
+    def _write_finished(self, pending):
+        if not pending:
+            return
+        now = time.time()
+        done_keys, lost = [], 0
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            for key, status in pending:
+                if status == "failed":
+                    # 재시도 한도 전까지는 다시 pending 으로 돌려 다음 바퀴에서 가져가게 한다
+                    self.conn.execute("""
+                        UPDATE crawl_queue
+                        SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                            claimed_by = NULL, lease_until = NULL, updated_at = ?
+                        WHERE 번호 = ? AND claimed_by = ?
+                    """, (MAX_ATTEMPTS, now, key, self.worker_id))
+                else:
+                    updated = self.conn.execute("""
+                        UPDATE crawl_queue
+                        SET status = ?, claimed_by = NULL, lease_until = NULL, updated_at = ?
+                        WHERE 번호 = ? AND claimed_by = ?
+                    """, (status, now, key, self.worker_id)).rowcount
+                    if not updated:
+                        # lease 가 만료돼 다른 워커가 가져간 행: 그 워커의 결과로 닫히게 둔다
+                        lost += 1
+                    elif status == "done":
+                        done_keys.append(key)
+            if done_keys:
+                self.conn.executemany("UPDATE restaurants SET CRAWL = 1 WHERE 번호 = ?", [(k,) for k in done_keys])
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        print(f"🗂️ 작업 큐 반영: {len(pending)}건 (CRAWL=1 {len(done_keys)}건"
+              + (f", 다른 워커로 넘어간 lease {lost}건" if lost else "") + ")")
+
+    async def _run(self, method, *args):
+        async with self.lock:
+            return await asyncio.to_thread(method, *args)
+
+    async def claim_batch_async(self):
+        return await self._run(self.claim_batch)
+
+    async def renew_async(self, key):
+        return await self._run(self.renew, key)
+
+    async def finish_async(self, key, status):
+        """
+        finish() 전에 lease 를 한 번 더 늘린다. 처리가 오래 걸린 레코드도 flush 까지 자기 것으로 남아 있어
+        다른 워커가 같은 가게를 다시 가져가지 않는다 (이미 넘어갔으면 flush 에서 넘어간 lease 로 센다).
+        """
+        if not await self.renew_async(key):
+            print(f"⚠️ lease 가 만료돼 다른 워커로 넘어간 가게: {key}")
+        return self.finish(key, status)
+
+    async def flush_async(self):
+        # 떼어 내기는 이벤트 루프에서, 반영만 스레드에서 (flush 와 같은 도우미를 쓴다)
+        await self._run(self._write_pending, self._take_finished())
+
+    def close(self):
+        self.flush()
+        self.conn.close()